@@ -0,0 +1,127 @@
+"""
+Show tail latency of prioritized routes under synthetic overload.
+
+Floods the app with low-priority list requests whose query holds a pooled
+connection for a while (a stand-in for a saturated database), while a few
+bots send REST heartbeats. The run is repeated with admission control off
+and on; with it on, the flood is capped and shed with 503s so heartbeats
+keep finding a free connection.
+
+Usage: python benchmarks/admission_overload.py [flood_clients] [seconds]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_ROOT)
+
+SLOW_QUERY_SECONDS = 0.2
+HEARTBEAT_BOTS = 10
+HEARTBEAT_INTERVAL = 0.05
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def run_load(flood_clients: int, seconds: float) -> dict:
+    from httpx import ASGITransport, AsyncClient
+    from loguru import logger
+    from main import create_app, startup, shutdown
+    from src.pairing import pairing_core
+
+    logger.remove()
+    app = create_app()
+    await startup()
+
+    get_all_pairs = pairing_core.get_all_pairs
+
+    async def slow_get_all_pairs(db):
+        pairs = await get_all_pairs(db)
+        await asyncio.sleep(SLOW_QUERY_SECONDS)  # connection stays checked out
+        return pairs
+
+    pairing_core.get_all_pairs = slow_get_all_pairs
+
+    flood = {"ok": 0, "shed": 0, "other": 0}
+    heartbeat_latencies = []
+    heartbeat_errors = 0
+    deadline = time.monotonic() + seconds
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        bot_ids = []
+        for i in range(HEARTBEAT_BOTS):
+            response = await client.post("/api/bots", json={"name": f"hb-{i}", "bot_type": "bench", "endpoint": "local"})
+            bot_ids.append(response.json()["id"])
+
+        async def flood_client():
+            while time.monotonic() < deadline:
+                response = await client.get("/api/pairs")
+                if response.status_code == 200:
+                    flood["ok"] += 1
+                elif response.status_code == 503:
+                    flood["shed"] += 1
+                    await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+                else:
+                    flood["other"] += 1
+
+        async def heartbeat_client(bot_id: str):
+            nonlocal heartbeat_errors
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = await client.post(f"/api/bots/{bot_id}/heartbeat")
+                heartbeat_latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    heartbeat_errors += 1
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+        await asyncio.gather(
+            *(flood_client() for _ in range(flood_clients)),
+            *(heartbeat_client(bot_id) for bot_id in bot_ids),
+        )
+
+    await shutdown()
+    return {
+        "flood": flood,
+        "heartbeats": len(heartbeat_latencies),
+        "heartbeat_errors": heartbeat_errors,
+        "p50_ms": percentile(heartbeat_latencies, 0.50) * 1000,
+        "p99_ms": percentile(heartbeat_latencies, 0.99) * 1000,
+        "max_ms": max(heartbeat_latencies, default=0.0) * 1000,
+    }
+
+
+def run_phase(admission_enabled: bool, flood_clients: int, seconds: float) -> dict:
+    """Run one phase in a fresh process so settings are read from the environment."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["ADMISSION_ENABLED"] = "true" if admission_enabled else "false"
+        os.environ["METRICS_ENABLED"] = "false"
+        os.chdir(APP_ROOT)
+        return asyncio.run(run_load(flood_clients, seconds))
+
+
+def main(flood_clients: int, seconds: float):
+    print(f"=== {flood_clients} clients flooding GET /api/pairs ({SLOW_QUERY_SECONDS * 1000:.0f} ms each), "
+          f"{HEARTBEAT_BOTS} bots heartbeating, {seconds:.0f}s ===")
+    context = multiprocessing.get_context("spawn")
+    for enabled in (False, True):
+        with context.Pool(1) as pool:
+            r = pool.apply(run_phase, (enabled, flood_clients, seconds))
+        label = "admission on " if enabled else "admission off"
+        flood = r["flood"]
+        print(f"{label}: heartbeats={r['heartbeats']:>5} errors={r['heartbeat_errors']:>3} "
+              f"p50={r['p50_ms']:>8.1f} ms p99={r['p99_ms']:>8.1f} ms max={r['max_ms']:>8.1f} ms | "
+              f"flood ok={flood['ok']:>5} shed={flood['shed']:>6}")
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    main(clients, duration)
@@ -0,0 +1,58 @@
+"""
+Benchmark CPU cost per WebSocket frame for the JSON and MessagePack codecs.
+
+Each message type a bot exchanges is encoded and decoded repeatedly and
+the process CPU time per round trip is reported, along with frame size.
+
+Usage: python benchmarks/codec_cpu.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api.codec import json_codec, msgpack_codec
+
+MESSAGES = {
+    "heartbeat": {"type": "heartbeat", "timestamp": 1718000000.123},
+    "status_update": {"type": "status_update", "status": "busy", "timestamp": "2025-01-01T12:00:00"},
+    "pair_message": {
+        "type": "pair_message",
+        "pair_id": "0b6f4f3e-2d7e-4c1e-9a43-7d9f4c2b1a10",
+        "from_bot_id": "5a1c9e2b-8f3d-4b6a-a2e1-0c7d9b3f5e48",
+        "message": "sensor batch " + ",".join(str(i) for i in range(40)),
+        "timestamp": "2025-01-01T12:00:00.000000"
+    },
+}
+
+
+def measure(codec, message: dict, iterations: int):
+    """Return (CPU microseconds per encode+decode, frame bytes)."""
+    frame = codec.encode(message)
+    start = time.process_time()
+    for _ in range(iterations):
+        codec.decode(codec.encode(message))
+    elapsed = time.process_time() - start
+    size = len(frame.encode() if isinstance(frame, str) else frame)
+    return elapsed / iterations * 1e6, size
+
+
+def main(iterations: int):
+    codecs = [json_codec] + ([msgpack_codec] if msgpack_codec else [])
+    if msgpack_codec is None:
+        print("msgpack is not installed - only JSON will be measured")
+
+    print(f"=== codec CPU per message ({iterations:,} round trips) ===")
+    print(f"{'message':<15}" + "".join(f"{c.name + ' us':>14}{c.name + ' B':>12}" for c in codecs))
+    for name, message in MESSAGES.items():
+        row = f"{name:<15}"
+        for codec in codecs:
+            cpu_us, size = measure(codec, message, iterations)
+            row += f"{cpu_us:>14.2f}{size:>12}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,67 @@
+"""
+Measure k-way group formation time and quality as the number of bots grows.
+
+Builds N waiting bots with skewed type and capability mixes and forms
+groups of each size with ``GroupingEngine``, once greedy only and once with
+local search. For each run it reports the time taken and the mean pairwise
+complementarity of the groups, next to random groups of the same size as a
+baseline.
+
+Usage: python benchmarks/group_formation.py [bots] [sizes ...]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_ROOT)
+
+TYPES = ("chat", "search", "vision", "audio")
+TYPE_WEIGHTS = (0.7, 0.2, 0.08, 0.02)
+CAPABILITIES = ("text", "code", "math", "images", "speech", "translate")
+
+
+def make_bots(count: int, seed: int = 7) -> List[SimpleNamespace]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            id=str(i),
+            bot_type=rng.choices(TYPES, TYPE_WEIGHTS)[0],
+            capabilities=",".join(rng.sample(CAPABILITIES, rng.choice((1, 1, 2, 3)))),
+            available_since=start + timedelta(seconds=rng.uniform(0, 600))
+        )
+        for i in range(count)
+    ]
+
+
+def mean_score(engine, groups) -> float:
+    return sum(engine.group_score(group) for group in groups) / len(groups)
+
+
+def run(count: int, sizes: List[int]):
+    from src.pairing.grouping import GroupingEngine
+
+    bots = make_bots(count)
+    print(f"{count:,} bots")
+    for size in sizes:
+        shuffled = bots.copy()
+        random.Random(size).shuffle(shuffled)
+        baseline = [shuffled[i:i + size] for i in range(0, len(shuffled) - size + 1, size)]
+        line = [f"k={size}: random {mean_score(GroupingEngine(size), baseline):.3f}"]
+        for label, passes in (("greedy", 0), ("greedy+local search", 2)):
+            engine = GroupingEngine(size, passes=passes, seed=1)
+            started = time.perf_counter()
+            groups = engine.group_bots(bots)
+            elapsed = time.perf_counter() - started
+            line.append(f"{label} {mean_score(engine, groups):.3f} in {elapsed:.2f}s")
+        print("  " + " | ".join(line))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000, [int(arg) for arg in sys.argv[2:]] or [3, 4, 8])
@@ -0,0 +1,116 @@
+"""
+Compare list endpoint latency: response_model validation vs the fast path.
+
+Seeds N bots and N pairs, then times ``GET /api/bots`` and ``GET /api/pairs``
+against equivalent "legacy" routes that return ORM objects through
+``response_model`` validation and stdlib JSON, as the endpoints used to.
+
+Usage: python benchmarks/list_serialization.py [rows ...]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+from uuid import uuid4
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_ROOT)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def seed(rows: int):
+    from sqlalchemy import delete, insert
+    from src.bots.models import Bot, BotPair
+    from src.config.database import engine
+
+    now = datetime.utcnow()
+    bots = [
+        {"id": str(uuid4()), "name": f"bench-{i}", "bot_type": "bench", "status": "paired",
+         "endpoint": f"ws://bench/{i}", "capabilities": "chat,trade", "last_heartbeat": now,
+         "created_at": now, "updated_at": now}
+        for i in range(rows * 2)
+    ]
+    pairs = [
+        {"id": str(uuid4()), "primary_bot_id": bots[2 * i]["id"], "secondary_bot_id": bots[2 * i + 1]["id"],
+         "status": "active", "pairing_strategy": "default", "created_at": now, "terminated_at": None}
+        for i in range(rows)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(delete(BotPair.__table__))
+        await conn.execute(delete(Bot.__table__))
+        await conn.execute(insert(Bot.__table__), bots)
+        await conn.execute(insert(BotPair.__table__), pairs)
+
+
+async def time_route(client, path: str, iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(sizes: List[int]):
+    from fastapi import Depends
+    from httpx import ASGITransport, AsyncClient
+    from loguru import logger
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from main import create_app, startup, shutdown
+    from src.bots.manager import bot_manager
+    from src.bots.models import BotPairResponse, BotResponse
+    from src.config.database import get_db_session
+    from src.pairing import pairing_core
+
+    logger.remove()
+    app = create_app()
+
+    @app.get("/bench/legacy/bots", response_model=List[BotResponse])
+    async def legacy_bots(db: AsyncSession = Depends(get_db_session)):
+        return await bot_manager.get_all_bots(db)
+
+    @app.get("/bench/legacy/pairs", response_model=List[BotPairResponse])
+    async def legacy_pairs(db: AsyncSession = Depends(get_db_session)):
+        return await pairing_core.get_all_pairs(db)
+
+    await startup()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+        for rows in sizes:
+            await seed(rows)
+            iterations = max(3, min(30, 200_000 // rows))
+            print(f"--- {rows:,} pairs / {rows * 2:,} bots, {iterations} requests each ---")
+            for name, legacy, fast in (
+                ("bots ", "/bench/legacy/bots", "/api/bots"),
+                ("pairs", "/bench/legacy/pairs", "/api/pairs"),
+            ):
+                results = {}
+                for label, path in (("response_model", legacy), ("fast path", fast)):
+                    await time_route(client, path, 1)  # warm up
+                    samples = await time_route(client, path, iterations)
+                    results[label] = percentile(samples, 0.5)
+                    print(f"{name} {label:<15} p50={percentile(samples, 0.50) * 1000:>9.1f} ms "
+                          f"p99={percentile(samples, 0.99) * 1000:>9.1f} ms")
+                print(f"{name} speedup         {results['response_model'] / results['fast path']:.1f}x at p50")
+    await shutdown()
+
+
+def main(sizes: List[int]):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["ADMISSION_ENABLED"] = "false"
+        os.chdir(APP_ROOT)
+        asyncio.run(run(sizes))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,152 @@
+"""
+Compare server memory and task count for per-bot vs multiplexed WebSockets.
+
+Starts the application in a separate process, connects N bots either one
+socket per bot (``/ws/bot/{bot_id}``) or many bots per socket
+(``/ws/mux``), then reads the server's RSS and asyncio task count.
+
+Usage: python benchmarks/mux_connections.py [bots] [bots_per_mux_connection]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+import websockets
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+def read_rss_kb() -> int:
+    """Resident set size of the current process in KiB."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_server(database_path: str):
+    """Run the app with an extra stats route for the benchmark."""
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database_path}"
+    import uvicorn
+    from loguru import logger
+    from main import create_app
+    from src.api.websockets import manager
+
+    logger.remove()
+    app = create_app()
+
+    @app.get("/bench/stats")
+    async def bench_stats():
+        return {
+            "rss_kb": read_rss_kb(),
+            "tasks": len(asyncio.all_tasks()),
+            "connections": len(manager.active_connections),
+            "bots": len(manager.bot_connections),
+        }
+
+    uvicorn.run(app, host=HOST, port=PORT, log_level="warning")
+
+
+async def wait_for_server():
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"http://{HOST}:{PORT}/api/strategies") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+async def get_stats() -> dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://{HOST}:{PORT}/bench/stats") as response:
+            return await response.json()
+
+
+async def connect_per_bot(bots: int):
+    sockets = []
+    for i in range(bots):
+        ws = await websockets.connect(f"ws://{HOST}:{PORT}/ws/bot/bench-{i}", ping_interval=None)
+        await ws.recv()  # welcome
+        sockets.append(ws)
+    return sockets
+
+
+async def connect_mux(bots: int, per_connection: int):
+    sockets = []
+    for start in range(0, bots, per_connection):
+        ws = await websockets.connect(f"ws://{HOST}:{PORT}/ws/mux", ping_interval=None)
+        await ws.recv()  # welcome
+        for i in range(start, min(start + per_connection, bots)):
+            await ws.send(json.dumps({"type": "register", "bot_id": f"bench-{i}"}))
+        for i in range(start, min(start + per_connection, bots)):
+            await ws.recv()  # registered
+        sockets.append(ws)
+    return sockets
+
+
+async def measure(mode: str, bots: int, per_connection: int) -> dict:
+    await wait_for_server()
+    baseline = await get_stats()
+    if mode == "per-bot":
+        sockets = await connect_per_bot(bots)
+    else:
+        sockets = await connect_mux(bots, per_connection)
+    await asyncio.sleep(1)
+    loaded = await get_stats()
+    for ws in sockets:
+        await ws.close()
+    return {"baseline": baseline, "loaded": loaded}
+
+
+def run_mode(mode: str, bots: int, per_connection: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        server = multiprocessing.Process(target=run_server, args=(os.path.join(tmp, "bench.db"),))
+        server.start()
+        try:
+            return asyncio.run(measure(mode, bots, per_connection))
+        finally:
+            server.terminate()
+            server.join()
+            time.sleep(0.5)
+
+
+def main(bots: int, per_connection: int):
+    print(f"=== {bots:,} bots: one socket per bot vs {per_connection} bots per mux socket ===")
+    results = {}
+    for mode in ("per-bot", "mux"):
+        result = run_mode(mode, bots, per_connection)
+        base, loaded = result["baseline"], result["loaded"]
+        results[mode] = {
+            "rss_mb": (loaded["rss_kb"] - base["rss_kb"]) / 1024,
+            "tasks": loaded["tasks"] - base["tasks"],
+            "connections": loaded["connections"],
+            "bots": loaded["bots"],
+        }
+        r = results[mode]
+        print(f"{mode:<8} connections={r['connections']:>6,} bots={r['bots']:>6,} "
+              f"tasks=+{r['tasks']:>6,} rss=+{r['rss_mb']:>8.1f} MiB")
+
+    per_bot, mux = results["per-bot"], results["mux"]
+    if mux["tasks"] and mux["rss_mb"] > 0:
+        print(f"reduction: {per_bot['tasks'] / mux['tasks']:.0f}x fewer tasks, "
+              f"{per_bot['rss_mb'] / mux['rss_mb']:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    bot_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_mux = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    main(bot_count, per_mux)
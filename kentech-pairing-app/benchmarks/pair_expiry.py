@@ -0,0 +1,60 @@
+"""
+Measure the per-tick cost of pair expiry as the number of tracked pairs grows.
+
+Tracks N pairs with lifetimes spread over an hour and times one expiry
+tick (``PairExpiry.due``) through the timing wheel, next to a scan of
+every deadline as a naive sweep would do. The wheel's cost follows the
+number of pairs expiring in the tick, not N.
+
+Usage: python benchmarks/pair_expiry.py [pairs ...]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_ROOT)
+
+HORIZON = 3600.0
+TICKS = 20
+
+
+def run(sizes: List[int]):
+    from src.pairing.expiry import PairExpiry
+
+    for pairs in sizes:
+        expiry = PairExpiry(tick=1.0, activity_flush_interval=5.0)
+        start = time.time()
+        now = datetime.utcnow()
+        for i in range(pairs):
+            expiry.track(f"pair-{i}", now + timedelta(seconds=random.uniform(60, HORIZON)), None)
+
+        # Jump to one minute in, then time single ticks from there
+        expiry.due(start + 60)
+        wheel_times, scan_times, expired = [], [], 0
+        for tick in range(1, TICKS + 1):
+            at = start + 60 + tick
+
+            started = time.perf_counter()
+            due = expiry.due(at)
+            wheel_times.append(time.perf_counter() - started)
+            for pair_id, _ in due:
+                expiry.untrack(pair_id)
+            expired += len(due)
+
+            started = time.perf_counter()
+            [pair_id for pair_id, deadline in expiry.deadlines.items() if deadline.next_deadline() <= at]
+            scan_times.append(time.perf_counter() - started)
+
+        wheel_ms = sum(wheel_times) / TICKS * 1000
+        scan_ms = sum(scan_times) / TICKS * 1000
+        print(f"{pairs:>9,} pairs: {expired / TICKS:>6.1f} expired/tick | "
+              f"wheel {wheel_ms:>8.3f} ms/tick | full scan {scan_ms:>8.3f} ms/tick")
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
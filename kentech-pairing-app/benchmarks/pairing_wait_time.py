@@ -0,0 +1,113 @@
+"""
+Compare time to pair and match quality of pairing strategies under a synthetic arrival process.
+
+Bots arrive as a Poisson process with skewed type and capability mixes,
+so some kinds are rare, and an auto-pair run pairs the waiting pool every
+``INTERVAL`` simulated seconds. For each strategy this reports the p50,
+p99 and maximum time from arrival to pairing, the mean complementarity of
+the pairs formed (see ``complementarity``) and how many bots were still
+waiting at the end. ``wait_time`` holds fresh bots back for a better
+partner, so it pairs later at the median but better, while its tail stays
+under ``max_wait`` plus one interval.
+
+Usage: python benchmarks/pairing_wait_time.py [arrivals_per_second] [seconds]
+"""
+
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_ROOT)
+
+INTERVAL = 2.0
+TYPES = ("chat", "search", "vision", "audio")
+TYPE_WEIGHTS = (0.7, 0.2, 0.08, 0.02)
+CAPABILITIES = ("text", "code", "math", "images", "speech", "translate")
+
+
+def arrivals(rate: float, seconds: float, seed: int) -> List[SimpleNamespace]:
+    rng = random.Random(seed)
+    bots, at = [], 0.0
+    while True:
+        at += rng.expovariate(rate)
+        if at >= seconds:
+            return bots
+        capabilities = rng.sample(CAPABILITIES, rng.choice((1, 1, 2, 3)))
+        bots.append(SimpleNamespace(
+            id=str(len(bots)),
+            bot_type=rng.choices(TYPES, TYPE_WEIGHTS)[0],
+            capabilities=",".join(capabilities),
+            arrived=at,
+            available_since=None
+        ))
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def simulate(algorithm, bots: List[SimpleNamespace], seconds: float) -> dict:
+    from src.pairing.algorithms import WaitTimePairingAlgorithm, complementarity
+
+    epoch = datetime(2024, 1, 1)
+    waits, scores, pool, next_arrival = [], [], [], 0
+    tick = INTERVAL
+    while tick <= seconds:
+        while next_arrival < len(bots) and bots[next_arrival].arrived <= tick:
+            bot = bots[next_arrival]
+            bot.available_since = epoch + timedelta(seconds=bot.arrived)
+            pool.append(bot)
+            next_arrival += 1
+
+        now = epoch + timedelta(seconds=tick)
+        if isinstance(algorithm, WaitTimePairingAlgorithm):
+            pairs = algorithm.pair_bots(pool, now)
+        else:
+            pairs = algorithm.pair_bots(pool)
+        paired = set()
+        for bot1, bot2 in pairs:
+            scores.append(complementarity(bot1, bot2))
+            for bot in (bot1, bot2):
+                waits.append(tick - bot.arrived)
+                paired.add(bot.id)
+        pool = [bot for bot in pool if bot.id not in paired]
+        tick += INTERVAL
+
+    return {
+        "p50": percentile(waits, 0.5),
+        "p99": percentile(waits, 0.99),
+        "max": max(waits),
+        "quality": sum(scores) / len(scores),
+        "waiting": len(pool),
+    }
+
+
+def run(rate: float, seconds: float):
+    from src.pairing.algorithms import (
+        CapabilityBasedPairingAlgorithm,
+        DefaultPairingAlgorithm,
+        TypeBasedPairingAlgorithm,
+        WaitTimePairingAlgorithm,
+    )
+
+    algorithms = {
+        "default": DefaultPairingAlgorithm(),
+        "capability_based": CapabilityBasedPairingAlgorithm(),
+        "type_based": TypeBasedPairingAlgorithm(),
+        "wait_time": WaitTimePairingAlgorithm(max_wait=30.0, min_compatibility=0.5),
+    }
+    print(f"{rate:g} arrivals/s for {seconds:g}s, runs every {INTERVAL:g}s")
+    for name, algorithm in algorithms.items():
+        result = simulate(algorithm, arrivals(rate, seconds, seed=7), seconds)
+        print(f"{name:>16}: time to pair p50 {result['p50']:>6.1f}s  p99 {result['p99']:>6.1f}s  "
+              f"max {result['max']:>6.1f}s | quality {result['quality']:.3f} | "
+              f"left waiting {result['waiting']}")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 20.0, float(sys.argv[2]) if len(sys.argv) > 2 else 600.0)
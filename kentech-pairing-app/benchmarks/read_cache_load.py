@@ -0,0 +1,142 @@
+"""
+Show database load of hot read endpoints as the number of readers grows.
+
+Seeds a few hundred active pairs, then runs N concurrent readers polling
+``GET /api/status`` and ``GET /api/pairs/active`` while one bot sends a
+heartbeat every ``WRITE_INTERVAL`` seconds (each write invalidates the
+cached responses). The run is repeated with the response cache off and
+on. Without it, every read runs its own queries, so database load grows
+with the readers until the process saturates; with it, queries per second
+stay flat at roughly one computation per write and TTL, because
+concurrent misses share a single computation.
+
+Usage: python benchmarks/read_cache_load.py [seconds] [readers ...]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+from uuid import uuid4
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_ROOT)
+
+PAIRS = 500
+WRITE_INTERVAL = 0.2
+READ_PATHS = ("/api/status", "/api/pairs/active")
+
+
+async def seed(rows: int):
+    from sqlalchemy import insert
+    from src.bots.models import Bot, BotPair
+    from src.config.database import engine
+
+    now = datetime.utcnow()
+    bots = [
+        {"id": str(uuid4()), "name": f"bench-{i}", "bot_type": "bench", "status": "paired",
+         "endpoint": f"ws://bench/{i}", "capabilities": "chat", "last_heartbeat": now,
+         "created_at": now, "updated_at": now}
+        for i in range(rows * 2)
+    ]
+    pairs = [
+        {"id": str(uuid4()), "primary_bot_id": bots[2 * i]["id"], "secondary_bot_id": bots[2 * i + 1]["id"],
+         "status": "active", "pairing_strategy": "default", "created_at": now, "terminated_at": None}
+        for i in range(rows)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(Bot.__table__), bots)
+        await conn.execute(insert(BotPair.__table__), pairs)
+    return bots[0]["id"]
+
+
+async def run_load(readers: int, seconds: float) -> dict:
+    from httpx import ASGITransport, AsyncClient
+    from loguru import logger
+    from sqlalchemy import event
+    from main import create_app, startup, shutdown
+    from src.config.database import engine
+    from src.utils.cache import response_cache
+
+    logger.remove()
+    app = create_app()
+    await startup()
+    writer_id = await seed(PAIRS)
+
+    queries = 0
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    reads = 0
+    errors = 0
+    deadline = time.monotonic() + seconds
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        async def reader(offset: int):
+            nonlocal reads, errors
+            i = offset
+            while time.monotonic() < deadline:
+                response = await client.get(READ_PATHS[i % len(READ_PATHS)])
+                i += 1
+                reads += 1
+                if response.status_code != 200:
+                    errors += 1
+
+        async def writer():
+            while time.monotonic() < deadline:
+                await client.post(f"/api/bots/{writer_id}/heartbeat")
+                await asyncio.sleep(WRITE_INTERVAL)
+
+        queries = 0
+        started = time.monotonic()
+        await asyncio.gather(writer(), *(reader(i) for i in range(readers)))
+        elapsed = time.monotonic() - started
+
+    await shutdown()
+    return {
+        "reads_per_sec": reads / elapsed,
+        "queries_per_sec": queries / elapsed,
+        "queries_per_read": queries / max(reads, 1),
+        "errors": errors,
+        "cache": response_cache.stats(),
+    }
+
+
+def run_phase(cache_enabled: bool, readers: int, seconds: float) -> dict:
+    """Run one phase in a fresh process so settings are read from the environment."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["RESPONSE_CACHE_TTL"] = "1" if cache_enabled else "0"
+        os.environ["ADMISSION_ENABLED"] = "false"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["METRICS_ENABLED"] = "false"
+        os.chdir(APP_ROOT)
+        return asyncio.run(run_load(readers, seconds))
+
+
+def main(seconds: float, reader_counts: List[int]):
+    print(f"=== {PAIRS} active pairs, readers polling {', '.join(READ_PATHS)}, "
+          f"one write every {WRITE_INTERVAL * 1000:.0f} ms, {seconds:.0f}s per run ===")
+    context = multiprocessing.get_context("spawn")
+    for readers in reader_counts:
+        for enabled in (False, True):
+            with context.Pool(1) as pool:
+                r = pool.apply(run_phase, (enabled, readers, seconds))
+            label = "cache on " if enabled else "cache off"
+            cache = r["cache"]
+            print(f"readers={readers:>4} {label}: reads/s={r['reads_per_sec']:>8.1f} "
+                  f"queries/s={r['queries_per_sec']:>8.1f} queries/read={r['queries_per_read']:>6.3f} errors={r['errors']:>3} | "
+                  f"hits={cache['hits']:>6} misses={cache['misses']:>5} coalesced={cache['coalesced']:>5}")
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    counts = [int(arg) for arg in sys.argv[2:]] or [1, 10, 50, 200]
+    main(duration, counts)
@@ -0,0 +1,101 @@
+"""
+Benchmark pair_message relay throughput through handle_bot_message.
+
+Measures relayed messages per second for a single pair and aggregated
+across many pairs, with flow control disabled so the numbers reflect the
+routing and send path, then once more with the configured limits to show
+how many frames are turned into backpressure.
+
+Usage: python benchmarks/relay_throughput.py [pairs] [messages_per_pair]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+
+from src.api.websockets import manager, handle_bot_message
+from src.config.settings import get_settings
+from src.pairing.routing import pair_routes
+
+
+class NullWebSocket:
+    """WebSocket stand-in that counts frames instead of sending them."""
+
+    def __init__(self):
+        self.frames = 0
+        self.backpressure = 0
+
+    async def send_text(self, data: str):
+        self.frames += 1
+        if '"backpressure"' in data:
+            self.backpressure += 1
+
+
+def setup_pairs(count: int):
+    """Register ``count`` pairs with connected fake sockets."""
+    manager.active_connections.clear()
+    manager.bot_connections.clear()
+    bots = []
+    rows = []
+    for i in range(count):
+        a, b = f"bot-{i}-a", f"bot-{i}-b"
+        for bot_id in (a, b):
+            connection_id = f"bot_{bot_id}"
+            manager.active_connections[connection_id] = NullWebSocket()
+            manager.register_bot(bot_id, connection_id)
+        rows.append((f"pair-{i}", a, b))
+        bots.append((a, b))
+    pair_routes.rebuild(rows)
+    return bots
+
+
+async def relay(bots, messages_per_pair: int) -> float:
+    """Relay messages round-robin across all pairs, returning elapsed seconds."""
+    message = {"type": "pair_message", "message": "ping", "timestamp": 0}
+    start = time.perf_counter()
+    for _ in range(messages_per_pair):
+        for a, b in bots:
+            await handle_bot_message(a, {**message, "target_bot_id": b}, f"bot_{a}")
+    return time.perf_counter() - start
+
+
+async def main(pairs: int, messages_per_pair: int):
+    settings = get_settings()
+    logger.remove()
+
+    print("=== pair_message relay benchmark ===")
+
+    # Unthrottled single pair
+    pair_routes.rate = 0
+    bots = setup_pairs(1)
+    single_messages = messages_per_pair * 100
+    elapsed = await relay(bots, single_messages)
+    print(f"single pair:      {single_messages / elapsed:>12,.0f} msg/s")
+
+    # Unthrottled aggregate
+    bots = setup_pairs(pairs)
+    elapsed = await relay(bots, messages_per_pair)
+    total = pairs * messages_per_pair
+    print(f"{pairs} pairs:       {total / elapsed:>12,.0f} msg/s aggregate "
+          f"({total / elapsed / pairs:,.1f} msg/s per pair)")
+
+    # Throttled single pair: frames beyond the burst become backpressure
+    pair_routes.rate = settings.pair_relay_rate
+    bots = setup_pairs(1)
+    elapsed = await relay(bots, settings.pair_relay_burst * 10)
+    sockets = manager.active_connections.values()
+    backpressure = sum(ws.backpressure for ws in sockets)
+    relayed = sum(ws.frames for ws in sockets) - backpressure
+    print(f"throttled pair:   {relayed:,} relayed, {backpressure:,} backpressure frames "
+          f"in {elapsed:.2f}s (rate={settings.pair_relay_rate}/s burst={settings.pair_relay_burst})")
+
+
+if __name__ == "__main__":
+    pair_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    per_pair = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(pair_count, per_pair))
@@ -8,14 +8,20 @@ import websockets
 import aiohttp
 from typing import Optional
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 
 class ExampleBot:
     """Example bot that demonstrates the pairing system integration."""
     
-    def __init__(self, name: str, bot_type: str, endpoint: str = "http://localhost:8000"):
+    def __init__(self, name: str, bot_type: str, endpoint: str = "http://localhost:8000", encoding: str = "json"):
         self.name = name
         self.bot_type = bot_type
         self.endpoint = endpoint
+        self.encoding = encoding  # "json" or "msgpack"
         self.bot_id: Optional[str] = None
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
         self.session: Optional[aiohttp.ClientSession] = None
@@ -82,7 +88,7 @@ class ExampleBot:
     
     async def connect_websocket(self):
         """Connect to the WebSocket endpoint."""
-        ws_url = f"ws://localhost:8000/ws/bot/{self.bot_id}"
+        ws_url = f"ws://localhost:8000/ws/bot/{self.bot_id}?encoding={self.encoding}"
         
         try:
             async with websockets.connect(ws_url) as websocket:
@@ -95,7 +101,7 @@ class ExampleBot:
                 # Listen for messages
                 try:
                     async for message in websocket:
-                        await self.handle_message(json.loads(message))
+                        await self.handle_message(self.decode(message))
                 except websockets.exceptions.ConnectionClosed:
                     print(f"Bot {self.name} WebSocket connection closed")
                 finally:
@@ -104,6 +110,18 @@ class ExampleBot:
         except Exception as e:
             print(f"WebSocket connection error: {e}")
     
+    def encode(self, message: dict):
+        """Encode a message for the negotiated frame format."""
+        if self.encoding == "msgpack":
+            return msgpack.packb(message)
+        return json.dumps(message)
+    
+    def decode(self, frame) -> dict:
+        """Decode a text (JSON) or binary (MessagePack) frame."""
+        if isinstance(frame, bytes):
+            return msgpack.unpackb(frame, raw=False)
+        return json.loads(frame)
+    
     async def handle_message(self, message: dict):
         """Handle incoming WebSocket messages."""
         message_type = message.get("type")
@@ -142,7 +160,7 @@ class ExampleBot:
                     "type": "heartbeat",
                     "timestamp": asyncio.get_event_loop().time()
                 }
-                await self.websocket.send(json.dumps(heartbeat_msg))
+                await self.websocket.send(self.encode(heartbeat_msg))
                 await asyncio.sleep(30)  # Send heartbeat every 30 seconds
             except Exception as e:
                 print(f"Heartbeat error: {e}")
@@ -158,14 +176,14 @@ class ExampleBot:
                     "message": message,
                     "timestamp": asyncio.get_event_loop().time()
                 }
-                await self.websocket.send(json.dumps(pair_msg))
+                await self.websocket.send(self.encode(pair_msg))
             except Exception as e:
                 print(f"Failed to send pair message: {e}")
 
 
-async def run_example_bot(name: str, bot_type: str):
+async def run_example_bot(name: str, bot_type: str, encoding: str = "json"):
     """Run an example bot."""
-    bot = ExampleBot(name, bot_type)
+    bot = ExampleBot(name, bot_type, encoding=encoding)
     
     try:
         await bot.start()
@@ -183,11 +201,12 @@ async def run_example_bot(name: str, bot_type: str):
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) != 3:
-        print("Usage: python example_bot.py <bot_name> <bot_type>")
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python example_bot.py <bot_name> <bot_type> [json|msgpack]")
         sys.exit(1)
     
     bot_name = sys.argv[1]
     bot_type = sys.argv[2]
+    encoding = sys.argv[3] if len(sys.argv) == 4 else "json"
     
-    asyncio.run(run_example_bot(bot_name, bot_type))
+    asyncio.run(run_example_bot(bot_name, bot_type, encoding))
@@ -10,14 +10,20 @@ import aiohttp
 import websockets
 from datetime import datetime
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 
 class BotClient:
     """Simple bot client to connect to Kentech Pairing System."""
     
-    def __init__(self, name: str, bot_type: str, capabilities: str = ""):
+    def __init__(self, name: str, bot_type: str, capabilities: str = "", encoding: str = "json"):
         self.name = name
         self.bot_type = bot_type
         self.capabilities = capabilities
+        self.encoding = encoding  # "json" or "msgpack"
         self.bot_id = None
         self.server_url = "http://localhost:8000"
         self.websocket = None
@@ -71,19 +77,47 @@ class BotClient:
     async def connect_websocket(self):
         """Connect to WebSocket for real-time pairing events."""
         ws_url = f"ws://localhost:8000/ws/bot/{self.bot_id}"
+        subprotocols = ["kentech.msgpack"] if self.encoding == "msgpack" else None
         
         try:
-            async with websockets.connect(ws_url) as websocket:
+            async with websockets.connect(ws_url, subprotocols=subprotocols) as websocket:
                 self.websocket = websocket
-                print(f"🔗 {self.name} connected to WebSocket")
+                print(f"🔗 {self.name} connected to WebSocket ({self.encoding})")
+                
+                # Idle sockets are closed by the server, so keep sending heartbeats
+                heartbeat_task = asyncio.create_task(self.send_heartbeats())
                 
                 # Listen for pairing events
-                async for message in websocket:
-                    await self.handle_message(json.loads(message))
+                try:
+                    async for message in websocket:
+                        await self.handle_message(self.decode(message))
+                finally:
+                    heartbeat_task.cancel()
                     
         except Exception as e:
             print(f"🔌 WebSocket error: {e}")
     
+    async def send_heartbeats(self, interval: int = 30):
+        """Send a heartbeat frame every ``interval`` seconds."""
+        while self.websocket:
+            await self.websocket.send(self.encode({
+                "type": "heartbeat",
+                "timestamp": datetime.now().isoformat()
+            }))
+            await asyncio.sleep(interval)
+    
+    def encode(self, message: dict):
+        """Encode a message for the negotiated frame format."""
+        if self.encoding == "msgpack":
+            return msgpack.packb(message)
+        return json.dumps(message)
+    
+    def decode(self, frame):
+        """Decode a text (JSON) or binary (MessagePack) frame."""
+        if isinstance(frame, bytes):
+            return msgpack.unpackb(frame, raw=False)
+        return json.loads(frame)
+    
     async def handle_message(self, message):
         """Handle incoming messages from the pairing system."""
         msg_type = message.get("type")
@@ -118,7 +152,7 @@ class BotClient:
                 "message": message,
                 "timestamp": datetime.now().isoformat()
             }
-            await self.websocket.send(json.dumps(msg))
+            await self.websocket.send(self.encode(msg))
             print(f"📤 {self.name} sent: {message}")
 
 
@@ -126,11 +160,14 @@ class BotClient:
 async def run_multiple_bots():
     """Example: Run multiple bots that will auto-pair."""
     
+    # Binary bots speak MessagePack when it is installed; the server relays between both formats
+    binary = "msgpack" if msgpack else "json"
+    
     bots = [
         BotClient("ChatAssistant", "chatbot", "chat,help,conversation"),
         BotClient("TaskManager", "taskbot", "scheduling,automation,tasks"), 
-        BotClient("DataAnalyzer", "analytics", "data,analysis,reporting"),
-        BotClient("AlertSystem", "notification", "alerts,notifications,monitoring")
+        BotClient("DataAnalyzer", "analytics", "data,analysis,reporting", encoding=binary),
+        BotClient("AlertSystem", "notification", "alerts,notifications,monitoring", encoding=binary)
     ]
     
     # Start all bots
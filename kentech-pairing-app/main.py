@@ -4,6 +4,8 @@ Main entry point for the bot pairing system.
 """
 
 import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,9 +15,33 @@ from loguru import logger
 
 from src.config.settings import get_settings
 from src.api.routes import router as api_router
+from src.api.export import export_router
 from src.api.websockets import websocket_router
-from src.config.database import init_database
-from src.monitoring.health import health_router
+from src.api.ops import ops_router
+from src.api.admission import AdmissionMiddleware
+from src.api.ratelimit import RateLimitMiddleware, rate_limiter
+from src.config.database import init_database, async_session_maker
+from src.monitoring.health import health_router, health_checker
+from src.bots.presence import presence
+from src.monitoring.metrics import MetricsMiddleware, metrics_server
+from src.monitoring.queries import QueryTimingMiddleware
+from src.monitoring.loop import loop_monitor
+from src.pairing import pairing_core
+from src.pairing.expiry import pair_expiry
+from src.pairing.jobs import auto_pair_jobs
+from src.pairing.scheduler import auto_pair_scheduler
+from src.utils.outbox import outbox
+from src.utils.version import state_version
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup and shutdown tasks around the application lifetime."""
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
 
 
 def create_app() -> FastAPI:
@@ -26,9 +52,26 @@ def create_app() -> FastAPI:
         title="Kentech Bot Pairing API",
         description="API for managing and pairing bots in the Kentech ecosystem",
         version="1.0.0",
-        debug=settings.debug
+        debug=settings.debug,
+        lifespan=lifespan
     )
     
+    # Report per-request query count and db time
+    if settings.server_timing_enabled:
+        app.add_middleware(QueryTimingMiddleware)
+    
+    # Shed low-priority traffic first under overload
+    if settings.admission_enabled:
+        app.add_middleware(AdmissionMiddleware)
+    
+    # Per-client-IP request rates and WebSocket connection caps
+    if settings.rate_limit_enabled or settings.max_connections_per_ip > 0:
+        app.add_middleware(RateLimitMiddleware)
+    
+    # Record per-route request metrics
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -40,8 +83,11 @@ def create_app() -> FastAPI:
     
     # Include routers
     app.include_router(api_router, prefix="/api")
+    app.include_router(export_router, prefix="/api")
     app.include_router(websocket_router, prefix="/ws")
-    app.include_router(health_router, prefix="/health")
+    app.include_router(health_router)
+    if settings.ops_enabled:
+        app.include_router(ops_router, prefix="/ops")
     
     # Serve static files
     app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -66,12 +112,42 @@ async def startup():
         logger.error(f"Database initialization failed: {e}")
         # Don't raise the error to prevent startup failure
     
+    # Restore relay routes, expiry timers and the recent pairs filter from the previous process
+    async with async_session_maker() as db:
+        await state_version.init(db)
+        await pairing_core.load_routes(db)
+        await pairing_core.load_recent_pairs(db)
+    
+    presence.start()
+    pair_expiry.start()
+    outbox.start()
+    loop_monitor.start()
+    health_checker.start()
+    rate_limiter.start()
+    
+    settings = get_settings()
+    if settings.auto_pair_scheduler_enabled:
+        auto_pair_scheduler.start()
+    if settings.metrics_enabled:
+        await metrics_server.start(settings.host, settings.metrics_port)
+    
     logger.info("Application started successfully!")
 
 
 async def shutdown():
     """Application shutdown tasks."""
     logger.info("Shutting down Kentech Bot Pairing Application...")
+    
+    await auto_pair_scheduler.stop()
+    await auto_pair_jobs.stop()
+    await pair_expiry.stop()
+    # After everything that writes events, so their last notifications still go out
+    await outbox.stop()
+    await health_checker.stop()
+    await rate_limiter.stop()
+    await loop_monitor.stop()
+    await presence.stop()
+    await metrics_server.stop()
 
 
 def main():
@@ -86,13 +162,6 @@ def main():
         level=settings.log_level
     )
     
-    global app
-    app = create_app()
-    
-    # Add startup and shutdown events
-    app.add_event_handler("startup", startup)
-    app.add_event_handler("shutdown", shutdown)
-    
     # Run the application
     uvicorn.run(
         "main:app",
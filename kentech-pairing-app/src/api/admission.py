@@ -0,0 +1,199 @@
+"""
+Admission control for HTTP requests.
+
+Requests are classified by priority before routing. Critical traffic
+(health probes, bot heartbeats) is always admitted. Low-priority traffic
+(list and export endpoints, ``/api/status``, auto-pairing and grouping) runs through a small
+concurrency limit with a short bounded queue, and is shed immediately
+while the event loop is lagging or the connection pool is exhausted. A
+low-priority slot is given back once the first body chunk is sent, so a
+streamed export holds one for its first page rather than its whole
+download. Everything else is shed only once the total in-flight limit is reached.
+Shed requests get a fast 503 with ``Retry-After``. WebSocket traffic is
+not affected.
+"""
+
+import asyncio
+import json
+from enum import Enum
+from typing import Optional
+
+from src.config.database import engine
+from src.config.settings import get_settings
+from src.monitoring.loop import loop_monitor
+from src.monitoring.metrics import ADMISSION_IN_FLIGHT, ADMISSION_SHED
+
+
+class Priority(str, Enum):
+    """Request priority for admission control."""
+    CRITICAL = "critical"
+    NORMAL = "normal"
+    LOW = "low"
+
+
+# (method, path) pairs that are shed first under load
+LOW_PRIORITY_ROUTES = {
+    ("GET", "/api/bots"),
+    ("GET", "/api/pairs"),
+    ("GET", "/api/pairs/active"),
+    ("GET", "/api/status"),
+    ("POST", "/api/pairs/auto"),
+    ("GET", "/api/groups"),
+    ("GET", "/api/groups/active"),
+    ("POST", "/api/groups/auto"),
+    ("GET", "/api/export/bots"),
+    ("GET", "/api/export/pairs"),
+}
+
+
+def classify(method: str, path: str) -> Priority:
+    """Classify a request by method and raw path."""
+    path = path.rstrip("/") or "/"
+    if path.startswith("/health"):
+        return Priority.CRITICAL
+    if method == "POST" and path.startswith("/api/bots/") and path.endswith("/heartbeat"):
+        return Priority.CRITICAL
+    if (method, path) in LOW_PRIORITY_ROUTES:
+        return Priority.LOW
+    return Priority.NORMAL
+
+
+class AdmissionController:
+    """Decides whether a request may run now, wait briefly, or be shed."""
+
+    def __init__(self, max_in_flight: int, low_priority_limit: int, queue_timeout: float, max_loop_lag: float):
+        self.max_in_flight = max_in_flight
+        self.low_priority_limit = low_priority_limit
+        self.queue_timeout = queue_timeout
+        self.max_loop_lag = max_loop_lag
+        self.in_flight = 0
+        self.low_running = 0
+        self.low_waiting = 0
+        self._low_slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def low_slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the serving loop
+        if self._low_slots is None:
+            self._low_slots = asyncio.Semaphore(self.low_priority_limit)
+        return self._low_slots
+
+    def pool_saturated(self) -> bool:
+        """Whether every pooled connection, overflow included, is checked out."""
+        pool = engine.sync_engine.pool
+        size = getattr(pool, "size", None)
+        if not callable(size):
+            return False
+        capacity = size() + max(getattr(pool, "_max_overflow", 0), 0)
+        return pool.checkedout() >= capacity
+
+    def overloaded(self) -> bool:
+        """Whether shared resources are saturated."""
+        return loop_monitor.last_lag >= self.max_loop_lag or self.pool_saturated()
+
+    async def admit_low_priority(self) -> bool:
+        """Take a low-priority slot, waiting at most ``queue_timeout``."""
+        if self.overloaded() or self.low_waiting >= self.low_priority_limit:
+            return False
+        self.low_waiting += 1
+        try:
+            await asyncio.wait_for(self.low_slots.acquire(), self.queue_timeout)
+            self.low_running += 1
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.low_waiting -= 1
+
+    def release_low_priority(self):
+        """Give back a low-priority slot."""
+        self.low_running -= 1
+        self.low_slots.release()
+
+    def stats(self) -> dict:
+        """Summarize current admission state."""
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "low_priority_running": self.low_running,
+            "low_priority_waiting": self.low_waiting,
+            "overloaded": self.overloaded(),
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying admission control to HTTP requests."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        priority = classify(scope["method"], scope["path"])
+
+        if priority is Priority.LOW:
+            if not await controller.admit_low_priority():
+                await self._shed(priority, send)
+                return
+        elif priority is Priority.NORMAL and controller.in_flight >= controller.max_in_flight:
+            await self._shed(priority, send)
+            return
+
+        if priority is Priority.LOW:
+            holding = True
+
+            def release():
+                nonlocal holding
+                if holding:
+                    holding = False
+                    controller.release_low_priority()
+
+            async def send_and_release(message):
+                try:
+                    await send(message)
+                finally:
+                    if message["type"] == "http.response.body":
+                        release()
+        else:
+            release = None
+            send_and_release = send
+
+        controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            controller.in_flight -= 1
+            if release is not None:
+                release()
+
+    async def _shed(self, priority: Priority, send):
+        ADMISSION_SHED.labels(priority.value).inc()
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(settings.admission_retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+settings = get_settings()
+
+# Global admission controller
+admission = AdmissionController(
+    settings.admission_max_in_flight,
+    settings.admission_low_priority_limit,
+    settings.admission_queue_timeout,
+    settings.admission_max_loop_lag,
+)
+
+ADMISSION_IN_FLIGHT.set_function(lambda: {(): admission.in_flight})
@@ -0,0 +1,89 @@
+"""
+Frame codecs for bot WebSocket connections.
+
+JSON text frames are the default. Bots may negotiate binary MessagePack
+frames with the ``kentech.msgpack`` subprotocol or ``?encoding=msgpack``.
+Both carry the same message dictionaries.
+"""
+
+import json
+from typing import Optional, Tuple, Union
+
+from fastapi import WebSocket
+from loguru import logger
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = "kentech.msgpack"
+JSON_SUBPROTOCOL = "kentech.json"
+
+
+class FrameDecodeError(ValueError):
+    """Raised when a frame cannot be decoded into a message."""
+
+
+class FrameCodec:
+    """Encodes and decodes WebSocket message frames."""
+
+    name = "json"
+    binary = False
+
+    def encode(self, message: dict) -> Union[str, bytes]:
+        """Encode a message into a frame payload."""
+        return json.dumps(message)
+
+    def decode(self, data: Union[str, bytes]) -> dict:
+        """Decode a frame payload into a message."""
+        try:
+            message = json.loads(data)
+        except ValueError as e:
+            raise FrameDecodeError("Invalid JSON format") from e
+        if not isinstance(message, dict):
+            raise FrameDecodeError("Message must be an object")
+        return message
+
+
+class MessagePackCodec(FrameCodec):
+    """Binary MessagePack frames."""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: dict) -> bytes:
+        """Encode a message into a MessagePack frame."""
+        return msgpack.packb(message, default=str)
+
+    def decode(self, data: Union[str, bytes]) -> dict:
+        """Decode a MessagePack frame into a message."""
+        if isinstance(data, str):
+            raise FrameDecodeError("Expected a binary MessagePack frame")
+        try:
+            message = msgpack.unpackb(data, raw=False)
+        except Exception as e:
+            raise FrameDecodeError("Invalid MessagePack format") from e
+        if not isinstance(message, dict):
+            raise FrameDecodeError("Message must be a map")
+        return message
+
+
+json_codec = FrameCodec()
+msgpack_codec = MessagePackCodec() if msgpack is not None else None
+
+
+def negotiate_codec(websocket: WebSocket) -> Tuple[FrameCodec, Optional[str]]:
+    """Pick the codec for a connection and the subprotocol to accept it with."""
+    offered = websocket.scope.get("subprotocols") or []
+    wants_msgpack = (
+        MSGPACK_SUBPROTOCOL in offered
+        or websocket.query_params.get("encoding") == "msgpack"
+    )
+
+    if wants_msgpack:
+        if msgpack_codec is not None:
+            return msgpack_codec, MSGPACK_SUBPROTOCOL if MSGPACK_SUBPROTOCOL in offered else None
+        logger.warning("MessagePack requested but msgpack is not installed, using JSON")
+
+    return json_codec, JSON_SUBPROTOCOL if JSON_SUBPROTOCOL in offered else None
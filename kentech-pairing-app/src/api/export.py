@@ -0,0 +1,116 @@
+"""
+Streaming NDJSON exports of bots and pair history.
+
+Rows are read in keyset order by ``id`` in batches of ``export_batch_size``
+and written as one JSON object per line, so server memory stays flat
+whatever the table size. Each batch is its own short query: holding one
+cursor open for a whole export would keep SQLite's read lock for as long
+as the slowest client takes to download it. To resume an interrupted
+export, pass the ``id`` of the last line received as ``after``.
+"""
+
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Table, select
+from loguru import logger
+
+from src.api.responses import encode_json
+from src.bots.models import Bot, BotPair, BotStatus, PairStatus
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+export_router = APIRouter()
+
+
+def build_export_query(table: Table, after: Optional[str], since: Optional[datetime],
+                       until: Optional[datetime], statuses: Optional[List[str]]):
+    """Select a table's rows in id order with the export filters applied."""
+    query = select(*table.columns).order_by(table.c.id)
+    if after:
+        query = query.where(table.c.id > after)
+    if since is not None:
+        query = query.where(table.c.created_at >= since)
+    if until is not None:
+        query = query.where(table.c.created_at < until)
+    if statuses:
+        query = query.where(table.c.status.in_(statuses))
+    return query
+
+
+async def stream_ndjson(query, table: Table, batch_size: int, compress: bool = False) -> AsyncIterator[bytes]:
+    """Yield NDJSON chunks for a query, one keyset batch at a time."""
+    # wbits=31 writes a gzip container; sync flushes let each batch reach the client
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    last_id = None
+    rows_sent = 0
+
+    while True:
+        batch_query = query if last_id is None else query.where(table.c.id > last_id)
+        try:
+            async with async_session_maker() as db:
+                result = await db.execute(batch_query.limit(batch_size))
+                keys = tuple(result.keys())
+                rows = result.all()
+        except Exception as e:
+            # The client sees a truncated stream and resumes from its last id
+            logger.error(f"Export of {table.name} failed after {rows_sent} rows: {e}")
+            break
+
+        if not rows:
+            break
+
+        chunk = b"".join(encode_json(dict(zip(keys, row))) + b"\n" for row in rows)
+        rows_sent += len(rows)
+        last_id = rows[-1][0]
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield chunk
+
+        if len(rows) < batch_size:
+            break
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def export_response(request: Request, table: Table, after: Optional[str], since: Optional[datetime],
+                    until: Optional[datetime], statuses: Optional[List[str]]) -> StreamingResponse:
+    """Stream a filtered table export, gzipped if the client accepts it."""
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    query = build_export_query(table, after, since, until, statuses)
+    headers = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"} if compress else {}
+    return StreamingResponse(
+        stream_ndjson(query, table, get_settings().export_batch_size, compress),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers
+    )
+
+
+@export_router.get("/export/bots")
+async def export_bots(
+    request: Request,
+    after: Optional[str] = Query(None, description="Resume after this bot id"),
+    since: Optional[datetime] = Query(None, description="Only bots created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only bots created before this time"),
+    status: Optional[List[BotStatus]] = Query(None)
+):
+    """Stream all bots as NDJSON."""
+    return export_response(request, Bot.__table__, after, since, until, status)
+
+
+@export_router.get("/export/pairs")
+async def export_pairs(
+    request: Request,
+    after: Optional[str] = Query(None, description="Resume after this pair id"),
+    since: Optional[datetime] = Query(None, description="Only pairs created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only pairs created before this time"),
+    status: Optional[List[PairStatus]] = Query(None)
+):
+    """Stream pair history as NDJSON."""
+    return export_response(request, BotPair.__table__, after, since, until, status)
@@ -0,0 +1,61 @@
+"""
+Operational endpoints for profiling a running worker.
+
+The router is only mounted when ``ops_enabled`` is set, and every request
+must carry the ``ops_token`` in the ``X-Ops-Token`` header.
+"""
+
+import secrets
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.monitoring.profiler import ProfilerBusyError, profiler
+
+
+async def require_ops_token(x_ops_token: str = Header("")):
+    """Reject requests without the configured ops token."""
+    settings = get_settings()
+    if not settings.ops_token or not secrets.compare_digest(x_ops_token, settings.ops_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid ops token"
+        )
+
+
+ops_router = APIRouter(dependencies=[Depends(require_ops_token)])
+
+
+@ops_router.get("/profile", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(10.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=100)
+):
+    """Sample all threads and return a flamegraph-compatible collapsed stack file."""
+    logger.info(f"Profiling for {seconds}s at {interval_ms}ms intervals")
+    try:
+        collapsed = await profiler.profile(seconds, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    filename = f"profile-{datetime.utcnow():%Y%m%dT%H%M%S}.collapsed"
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@ops_router.get("/allocations")
+async def allocation_snapshot(
+    seconds: float = Query(5.0, ge=0, le=60),
+    top: int = Query(20, ge=1, le=200)
+):
+    """Trace allocations for a window and return the top allocation sites."""
+    logger.info(f"Tracing allocations for {seconds}s")
+    try:
+        return await profiler.allocations(seconds, top)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
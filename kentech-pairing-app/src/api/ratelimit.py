@@ -0,0 +1,355 @@
+"""
+Per-client-IP request rate limiting and WebSocket connection caps.
+
+When ``rate_limit_enabled`` is set, each request takes tokens from a
+bucket keyed by client IP; expensive routes cost more than one token.
+WebSocket handshakes hold one of ``max_connections_per_ip`` slots for the
+life of the connection whether or not request rates are limited. Buckets
+live in memory by default; the Redis backend shares them across workers.
+Health checks and bot heartbeats are never limited, since rejecting them
+would mark healthy bots offline.
+"""
+
+import asyncio
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.monitoring.metrics import RATE_LIMITED
+from src.utils.rate import TokenBucket
+
+
+class RateLimitBackend(ABC):
+    """Storage for per-key token buckets and connection counts."""
+
+    @abstractmethod
+    async def take(self, key: str, cost: float) -> Tuple[bool, float]:
+        """Take ``cost`` tokens for ``key``; returns (allowed, retry_after)."""
+        pass
+
+    @abstractmethod
+    async def acquire_connection(self, key: str, limit: int) -> bool:
+        """Take a connection slot for ``key`` if fewer than ``limit`` are held."""
+        pass
+
+    @abstractmethod
+    async def release_connection(self, key: str):
+        """Give back a connection slot for ``key``."""
+        pass
+
+    async def evict(self) -> int:
+        """Drop state for idle keys, returning how many were dropped."""
+        return 0
+
+    async def close(self):
+        """Release backend resources."""
+
+
+class MemoryBackend(RateLimitBackend):
+    """Process-local buckets in least-recently-used order."""
+
+    def __init__(self, rate: float, capacity: float, max_keys: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.connections: Dict[str, int] = {}
+
+    async def take(self, key: str, cost: float) -> Tuple[bool, float]:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.capacity)
+            if len(self.buckets) > self.max_keys:
+                # Dropping the least recently seen key only ever resets it to a full bucket
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+
+        if bucket.take(cost):
+            return True, 0.0
+        return False, bucket.retry_after(cost)
+
+    async def acquire_connection(self, key: str, limit: int) -> bool:
+        count = self.connections.get(key, 0)
+        if count >= limit:
+            return False
+        self.connections[key] = count + 1
+        return True
+
+    async def release_connection(self, key: str):
+        count = self.connections.get(key, 0) - 1
+        if count > 0:
+            self.connections[key] = count
+        else:
+            self.connections.pop(key, None)
+
+    async def evict(self) -> int:
+        if self.rate <= 0:
+            evicted = len(self.buckets)
+            self.buckets.clear()
+            return evicted
+
+        # A bucket untouched for capacity/rate seconds is full again, the same as a new one
+        idle_before = time.monotonic() - self.capacity / self.rate
+        evicted = 0
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if bucket.updated > idle_before:
+                break
+            del self.buckets[key]
+            evicted += 1
+        return evicted
+
+
+# Token bucket evaluated atomically on the Redis server, using its clock
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+# Give back a connection slot without going below zero once the count has expired
+_RELEASE_SCRIPT = """
+local count = redis.call('DECR', KEYS[1])
+if count <= 0 then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+end
+return count
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Buckets and connection counts shared by every worker through Redis."""
+
+    def __init__(self, url: str, rate: float, capacity: float, password: str = "",
+                 prefix: str = "kentech:ratelimit:", connection_ttl: int = 3600):
+        import redis.asyncio as redis
+
+        self.rate = rate
+        self.capacity = capacity
+        self.prefix = prefix
+        # Safety net so slots held by a crashed worker are eventually released
+        self.connection_ttl = connection_ttl
+        self.redis = redis.from_url(url, password=password or None)
+        self._take = self.redis.register_script(_TAKE_SCRIPT)
+        self._release = self.redis.register_script(_RELEASE_SCRIPT)
+
+    async def take(self, key: str, cost: float) -> Tuple[bool, float]:
+        if self.rate <= 0:
+            return True, 0.0
+        allowed, tokens = await self._take(
+            keys=[f"{self.prefix}bucket:{key}"], args=[self.rate, self.capacity, cost]
+        )
+        if allowed:
+            return True, 0.0
+        return False, (cost - float(tokens)) / self.rate
+
+    async def acquire_connection(self, key: str, limit: int) -> bool:
+        name = f"{self.prefix}connections:{key}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            count, _ = await pipe.incr(name).expire(name, self.connection_ttl).execute()
+        if count > limit:
+            await self.redis.decr(name)
+            return False
+        return True
+
+    async def release_connection(self, key: str):
+        await self._release(keys=[f"{self.prefix}connections:{key}"], args=[self.connection_ttl])
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+class RateLimiter:
+    """Applies request and connection limits through a backend."""
+
+    def __init__(self, backend: RateLimitBackend, route_costs: Dict[str, float],
+                 max_connections: int, evict_interval: float, limit_requests: bool = True):
+        self.backend = backend
+        self.route_costs = route_costs
+        self.limit_requests = limit_requests
+        self.max_connections = max_connections
+        self.evict_interval = evict_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def cost(self, method: str, path: str) -> float:
+        """Token cost of a request, from ``rate_limit_route_costs``."""
+        return self.route_costs.get(f"{method} {path.rstrip('/') or '/'}", 1.0)
+
+    async def check_request(self, key: str, cost: float) -> Tuple[bool, float]:
+        """Take tokens for a request; failures in a shared backend let it through."""
+        if not self.limit_requests:
+            return True, 0.0
+        try:
+            return await self.backend.take(key, cost)
+        except Exception as e:
+            logger.error(f"Rate limit backend failed: {e}")
+            return True, 0.0
+
+    async def acquire_connection(self, key: str) -> bool:
+        """Take a WebSocket slot for a client."""
+        if self.max_connections <= 0:
+            return True
+        try:
+            return await self.backend.acquire_connection(key, self.max_connections)
+        except Exception as e:
+            logger.error(f"Rate limit backend failed: {e}")
+            return True
+
+    async def release_connection(self, key: str):
+        """Give back a WebSocket slot for a client."""
+        if self.max_connections <= 0:
+            return
+        try:
+            await self.backend.release_connection(key)
+        except Exception as e:
+            logger.error(f"Rate limit backend failed: {e}")
+
+    async def run(self):
+        """Evict idle keys on an interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            evicted = await self.backend.evict()
+            if evicted:
+                logger.debug(f"Evicted {evicted} idle rate limit keys")
+
+    def start(self):
+        """Start the background eviction task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the eviction task and close the backend."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.backend.close()
+
+
+def client_ip(scope) -> str:
+    """Client address for a request, honouring X-Forwarded-For if trusted."""
+    if settings.trust_forwarded_for:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _exempt(method: str, path: str) -> bool:
+    """Whether a request bypasses rate limiting."""
+    if path.startswith("/health"):
+        return True
+    return (
+        method == "POST"
+        and path.startswith("/api/bots/")
+        and path.rstrip("/").endswith("/heartbeat")
+    )
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing per-IP request rates and WebSocket caps."""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _http(self, scope, receive, send):
+        # With only the connection cap enabled, HTTP requests pass straight through
+        if not self.limiter.limit_requests or _exempt(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after = await self.limiter.check_request(
+            client_ip(scope), self.limiter.cost(scope["method"], scope["path"])
+        )
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.labels("request").inc()
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _websocket(self, scope, receive, send):
+        key = client_ip(scope)
+        allowed, _ = await self.limiter.check_request(key, 1.0)
+        if not allowed or not await self.limiter.acquire_connection(key):
+            RATE_LIMITED.labels("connection").inc()
+            # Closing before accept rejects the handshake with a 403
+            await send({"type": "websocket.close", "code": 1008})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.limiter.release_connection(key)
+
+
+def create_backend() -> RateLimitBackend:
+    """Build the backend selected by ``rate_limit_backend``."""
+    if settings.rate_limit_backend == "redis":
+        return RedisBackend(
+            settings.redis_url,
+            settings.rate_limit_rate,
+            settings.rate_limit_burst,
+            settings.redis_password,
+        )
+    return MemoryBackend(
+        settings.rate_limit_rate, settings.rate_limit_burst, settings.rate_limit_max_keys
+    )
+
+
+settings = get_settings()
+
+# Global rate limiter
+rate_limiter = RateLimiter(
+    create_backend(),
+    settings.rate_limit_route_costs,
+    settings.max_connections_per_ip,
+    settings.rate_limit_evict_interval,
+    limit_requests=settings.rate_limit_enabled,
+)
@@ -0,0 +1,102 @@
+"""
+Fast JSON responses for large list endpoints.
+
+List endpoints build plain dicts straight from column tuples and return
+them through ``FastJSONResponse``. Returning a response object skips
+FastAPI's ``response_model`` re-validation, while the declared
+``response_model`` still documents the payload in the OpenAPI schema.
+Set ``validate_list_responses`` to validate the rows anyway.
+"""
+
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, List, Optional, Type
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_db_session
+from src.config.settings import get_settings
+from src.utils.version import etag_matches, state_version
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode content as compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+@lru_cache()
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def _validated(rows: List[dict], model: Type[BaseModel]) -> List[dict]:
+    if get_settings().validate_list_responses:
+        adapter = _list_adapter(model)
+        rows = adapter.dump_python(adapter.validate_python(rows), mode="json")
+    return rows
+
+
+def _cache_headers(etag: Optional[str]) -> Optional[dict]:
+    return {"ETag": etag, "Cache-Control": "no-cache"} if etag else None
+
+
+def list_response(rows: List[dict], model: Type[BaseModel], etag: Optional[str] = None) -> FastJSONResponse:
+    """Respond with trusted rows, validating them only if configured to."""
+    return FastJSONResponse(_validated(rows, model), headers=_cache_headers(etag))
+
+
+def list_body(rows: List[dict], model: Type[BaseModel]) -> bytes:
+    """Encode trusted rows once, for responses shared through the response cache."""
+    return encode_json(_validated(rows, model))
+
+
+def json_body_response(body: bytes, etag: Optional[str] = None) -> Response:
+    """Respond with an already encoded JSON body."""
+    return Response(body, media_type="application/json", headers=_cache_headers(etag))
+
+
+def conditional_get(*tables: str) -> Callable[..., Awaitable[str]]:
+    """Dependency answering ``If-None-Match`` from the table versions alone."""
+    async def check(request: Request, response: Response, db: AsyncSession = Depends(get_db_session)) -> str:
+        # Read the version before the data so a racing write can only make the ETag older
+        etag = await state_version.etag(db, *tables)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "no-cache"}
+            )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return etag
+    return check
+
+
+bots_etag = conditional_get("bots")
+# Pair responses embed their bots
+pairs_etag = conditional_get("bots", "pairs")
+# Group responses list member ids only
+groups_etag = conditional_get("groups")
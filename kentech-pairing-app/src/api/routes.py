@@ -2,20 +2,45 @@
 API routes for the Kentech Bot Pairing Application.
 """
 
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Sequence
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.database import get_db_session
-from src.bots.models import BotCreate, BotUpdate, BotResponse, BotPairCreate, BotPairResponse
+from src.config.database import async_session_maker, get_db_session
+from src.bots.models import (
+    BotCreate, BotUpdate, BotResponse, BotGroupCreate, BotGroupResponse, BotPairCreate,
+    BotPairResponse, BulkTerminateRequest, PairStatus
+)
 from src.bots.manager import bot_manager
-from src.api.websockets import notify_pair_created, notify_pair_terminated
+from src.bots.presence import presence
+from src.api.websockets import (
+    notify_bot_deregistered,
+    notify_bot_event,
+)
+from src.api.responses import (
+    bots_etag, groups_etag, json_body_response, list_body, list_response, pairs_etag
+)
 from src.pairing import pairing_core
-from src.pairing.strategies import get_available_strategies
+from src.pairing.grouping import GROUPING_STRATEGIES
+from src.pairing.groups import group_manager
+from src.pairing.jobs import JobConflictError, auto_pair_jobs
+from src.pairing.strategies import STRATEGY_REGISTRY, get_available_strategies
+from src.utils.cache import response_cache
 
 router = APIRouter()
 
 
+def _check_strategy(strategy: str, available: Sequence[str] = tuple(STRATEGY_REGISTRY)):
+    """Reject unknown strategies before they are stored or used as metric labels."""
+    if strategy not in available:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown strategy; available: {', '.join(available)}"
+        )
+
+
 # Bot endpoints
 @router.post("/bots", response_model=BotResponse, status_code=status.HTTP_201_CREATED)
 async def create_bot(
@@ -29,16 +54,21 @@ async def create_bot(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to register bot"
         )
+    
+    await notify_bot_event("bot_registered", bot)
     return bot
 
 
 @router.get("/bots", response_model=List[BotResponse])
-async def get_bots(db: AsyncSession = Depends(get_db_session)):
+async def get_bots(
+    etag: str = Depends(bots_etag),
+    db: AsyncSession = Depends(get_db_session)
+):
     """Get all registered bots."""
-    return await bot_manager.get_all_bots(db)
+    return list_response(await bot_manager.get_bot_rows(db), BotResponse, etag)
 
 
-@router.get("/bots/{bot_id}", response_model=BotResponse)
+@router.get("/bots/{bot_id}", response_model=BotResponse, dependencies=[Depends(bots_etag)])
 async def get_bot(
     bot_id: str,
     db: AsyncSession = Depends(get_db_session)
@@ -66,6 +96,8 @@ async def update_bot(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bot not found or update failed"
         )
+    
+    await notify_bot_event("bot_updated", bot)
     return bot
 
 
@@ -75,6 +107,10 @@ async def bot_heartbeat(
     db: AsyncSession = Depends(get_db_session)
 ):
     """Update bot heartbeat."""
+    # Socket-connected bots are tracked in memory and persisted in batches
+    if presence.heartbeat(bot_id):
+        return {"message": "Heartbeat updated"}
+    
     success = await bot_manager.heartbeat(bot_id, db)
     if not success:
         raise HTTPException(
@@ -96,6 +132,8 @@ async def deregister_bot(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bot not found"
         )
+    
+    await notify_bot_deregistered(bot_id)
     return {"message": "Bot deregistered"}
 
 
@@ -106,6 +144,7 @@ async def create_pair(
     db: AsyncSession = Depends(get_db_session)
 ):
     """Create a new bot pair."""
+    _check_strategy(pair_data.pairing_strategy)
     pair = await pairing_core.create_pair(pair_data, db)
     if not pair:
         raise HTTPException(
@@ -113,25 +152,31 @@ async def create_pair(
             detail="Failed to create bot pair"
         )
     
-    # Notify about pair creation via WebSocket
-    await notify_pair_created(pair.id, pair.primary_bot_id, pair.secondary_bot_id)
-    
     return pair
 
 
 @router.get("/pairs", response_model=List[BotPairResponse])
-async def get_pairs(db: AsyncSession = Depends(get_db_session)):
+async def get_pairs(
+    etag: str = Depends(pairs_etag),
+    db: AsyncSession = Depends(get_db_session)
+):
     """Get all bot pairs."""
-    return await pairing_core.get_all_pairs(db)
+    return list_response(await pairing_core.get_pair_rows(db), BotPairResponse, etag)
 
 
 @router.get("/pairs/active", response_model=List[BotPairResponse])
-async def get_active_pairs(db: AsyncSession = Depends(get_db_session)):
+async def get_active_pairs(etag: str = Depends(pairs_etag)):
     """Get active bot pairs."""
-    return await pairing_core.get_active_pairs(db)
+    async def load() -> bytes:
+        # Own session: the result is shared with every request coalesced onto it
+        async with async_session_maker() as db:
+            return list_body(await pairing_core.get_pair_rows(db, PairStatus.ACTIVE), BotPairResponse)
+    
+    body = await response_cache.get(("pairs/active", etag), load, ("bots", "pairs"))
+    return json_body_response(body, etag)
 
 
-@router.get("/pairs/{pair_id}", response_model=BotPairResponse)
+@router.get("/pairs/{pair_id}", response_model=BotPairResponse, dependencies=[Depends(pairs_etag)])
 async def get_pair(
     pair_id: str,
     db: AsyncSession = Depends(get_db_session)
@@ -151,56 +196,248 @@ async def terminate_pair(
     pair_id: str,
     db: AsyncSession = Depends(get_db_session)
 ):
-    """Terminate a bot pair."""
-    # Get pair info before terminating for notifications
-    pair = await pairing_core.get_pair(pair_id, db)
-    if not pair:
+    """Terminate a bot pair; terminating one that already ended changes nothing."""
+    terminated = await pairing_core.terminate_pairs([pair_id], db)
+    if terminated is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to terminate bot pair"
+        )
+    if not terminated and not await pairing_core.get_pair(pair_id, db):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bot pair not found"
         )
-    
-    success = await pairing_core.terminate_pair(pair_id, db)
-    if not success:
+    return {"message": "Bot pair terminated"}
+
+
+@router.post("/pairs/terminate")
+async def terminate_pairs(
+    request: BulkTerminateRequest,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Terminate every active pair matching the given ids and filters in one transaction."""
+    if not request.has_criteria():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to terminate bot pair"
+            detail="Give pair_ids or at least one filter"
         )
     
-    # Notify about pair termination via WebSocket
-    await notify_pair_terminated(pair.id, pair.primary_bot_id, pair.secondary_bot_id)
+    created_before = None
+    if request.older_than is not None:
+        created_before = datetime.utcnow() - timedelta(seconds=request.older_than)
+    pair_ids = await pairing_core.find_active_pair_ids(
+        db,
+        pair_ids=request.pair_ids,
+        strategy=request.pairing_strategy,
+        created_before=created_before,
+        bot_type=request.bot_type
+    )
+    terminated = await pairing_core.terminate_pairs(pair_ids, db) if pair_ids else []
+    if terminated is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to terminate bot pairs"
+        )
     
-    return {"message": "Bot pair terminated"}
+    return {"terminated": len(terminated), "pair_ids": [pair[0] for pair in terminated]}
 
 
-@router.post("/pairs/auto", response_model=List[BotPairResponse])
+@router.post(
+    "/pairs/auto",
+    response_model=List[BotPairResponse],
+    responses={status.HTTP_202_ACCEPTED: {"description": "Background job accepted"}}
+)
 async def auto_pair_bots(
     strategy: str = "default",
+    background: bool = False,
     db: AsyncSession = Depends(get_db_session)
 ):
-    """Automatically pair available bots."""
-    pairs = await pairing_core.auto_pair_bots(db, strategy)
-    return pairs
+    """Automatically pair available bots.
+    
+    With ``background=true`` the run becomes a job: the response is 202 with
+    the job, whose progress is at ``GET /api/pairs/auto/{job_id}``. While a
+    job for another strategy is unfinished the response is 409 naming it.
+    """
+    _check_strategy(strategy)
+    if background:
+        try:
+            job, _ = auto_pair_jobs.submit(strategy)
+        except JobConflictError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e),
+                headers={"Location": f"/api/pairs/auto/{e.job.id}"}
+            )
+        return JSONResponse(
+            job.to_dict(),
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"/api/pairs/auto/{job.id}"}
+        )
+    
+    try:
+        return await pairing_core.auto_pair_bots(db, strategy)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Auto-pairing failed"
+        )
+
+
+@router.get("/pairs/auto/{job_id}")
+async def get_auto_pair_job(job_id: str):
+    """Get a background auto-pair job's status and progress."""
+    job = auto_pair_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Auto-pair job not found"
+        )
+    return job.to_dict()
+
+
+@router.delete("/pairs/auto/{job_id}")
+async def cancel_auto_pair_job(job_id: str):
+    """Cancel a background auto-pair job before its next pair."""
+    job = auto_pair_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Auto-pair job not found"
+        )
+    if job.finished:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Auto-pair job already {job.status.value}"
+        )
+    return job.to_dict()
+
+
+# Group endpoints
+def _check_group_size(size: int):
+    reason = group_manager.validate_size(size)
+    if reason:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=reason)
+
+
+@router.post("/groups", response_model=BotGroupResponse, status_code=status.HTTP_201_CREATED)
+async def create_group(
+    group_data: BotGroupCreate,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Create a group of three or more online bots."""
+    _check_group_size(len(group_data.bot_ids))
+    _check_strategy(group_data.grouping_strategy, (*GROUPING_STRATEGIES, "manual"))
+    created = await group_manager.create_groups(
+        [group_data.bot_ids], group_data.grouping_strategy, db
+    )
+    if not created:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to create bot group"
+        )
+    rows = await group_manager.get_group_rows(db, group_ids=[created[0][0]])
+    return rows[0]
+
+
+@router.post("/groups/auto", response_model=List[BotGroupResponse])
+async def auto_group_bots(
+    size: int,
+    strategy: str = "default",
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Group available bots into groups of ``size`` in one transaction."""
+    _check_group_size(size)
+    _check_strategy(strategy, tuple(GROUPING_STRATEGIES))
+    created = await group_manager.auto_group_bots(db, size, strategy)
+    rows = []
+    if created:
+        group_ids = [group_id for group_id, _ in created]
+        rows = await group_manager.get_group_rows(db, group_ids=group_ids)
+    return list_response(rows, BotGroupResponse)
+
+
+@router.get("/groups", response_model=List[BotGroupResponse])
+async def get_groups(
+    etag: str = Depends(groups_etag),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Get all bot groups."""
+    return list_response(await group_manager.get_group_rows(db), BotGroupResponse, etag)
+
+
+@router.get("/groups/active", response_model=List[BotGroupResponse])
+async def get_active_groups(
+    etag: str = Depends(groups_etag),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Get active bot groups."""
+    rows = await group_manager.get_group_rows(db, PairStatus.ACTIVE)
+    return list_response(rows, BotGroupResponse, etag)
+
+
+@router.get(
+    "/groups/{group_id}", response_model=BotGroupResponse, dependencies=[Depends(groups_etag)]
+)
+async def get_group(
+    group_id: str,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Get a specific bot group by ID."""
+    rows = await group_manager.get_group_rows(db, group_ids=[group_id])
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bot group not found"
+        )
+    return rows[0]
+
+
+@router.delete("/groups/{group_id}")
+async def terminate_group(
+    group_id: str,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Terminate a bot group; terminating one that already ended changes nothing."""
+    terminated = await group_manager.terminate_groups([group_id], db)
+    if terminated is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to terminate bot group"
+        )
+    if not terminated and not await group_manager.get_group_rows(db, group_ids=[group_id]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bot group not found"
+        )
+    return {"message": "Bot group terminated"}
 
 
 # Strategy endpoints
 @router.get("/strategies")
 async def get_strategies():
     """Get available pairing strategies."""
-    return {"strategies": get_available_strategies()}
+    async def load() -> dict:
+        return {"strategies": get_available_strategies()}
+    
+    return await response_cache.get("strategies", load)
 
 
 # Status endpoint
 @router.get("/status")
-async def get_status(db: AsyncSession = Depends(get_db_session)):
+async def get_status(etag: str = Depends(pairs_etag)):
     """Get system status."""
-    all_bots = await bot_manager.get_all_bots(db)
-    active_pairs = await pairing_core.get_active_pairs(db)
+    async def load() -> dict:
+        async with async_session_maker() as db:
+            all_bots = await bot_manager.get_all_bots(db)
+            active_pairs = await pairing_core.get_active_pairs(db)
+        
+        return {
+            "total_bots": len(all_bots),
+            "online_bots": len([b for b in all_bots if b.status == "online"]),
+            "paired_bots": len([b for b in all_bots if b.status == "paired"]),
+            "active_pairs": len(active_pairs),
+            "available_strategies": get_available_strategies()
+        }
     
-    return {
-        "total_bots": len(all_bots),
-        "online_bots": len([b for b in all_bots if b.status == "online"]),
-        "paired_bots": len([b for b in all_bots if b.status == "paired"]),
-        "active_pairs": len(active_pairs),
-        "available_strategies": get_available_strategies()
-    }
+    return await response_cache.get(("status", etag), load, ("bots", "pairs"))
@@ -2,13 +2,32 @@
 WebSocket handlers for real-time communication.
 """
 
-import json
-from typing import Dict, Set
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple, Union
+from uuid import uuid4
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from loguru import logger
 
+from src.api.codec import FrameCodec, FrameDecodeError, json_codec, negotiate_codec
+from src.bots.manager import bot_manager
+from src.bots.models import Bot, BotResponse, BotPairSummary, BotStatus
+from src.bots.presence import presence
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+from src.monitoring.events import event_log
+from src.monitoring.metrics import WS_CONNECTED_BOTS, WS_CONNECTIONS, WS_FRAMES, WS_VIOLATIONS
+from src.pairing import pairing_core
+from src.pairing.expiry import pair_expiry
+from src.pairing.jobs import AutoPairJob, auto_pair_jobs
+from src.pairing.routing import pair_routes, RelayDecision
+from src.utils.outbox import BOT_MESSAGES, outbox
+from src.utils.rate import TokenBucket
+
 websocket_router = APIRouter()
 
+_frames_in = WS_FRAMES.labels("in")
+_frames_out = WS_FRAMES.labels("out")
+
 
 class ConnectionManager:
     """Manages WebSocket connections."""
@@ -16,44 +35,80 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.bot_connections: Dict[str, str] = {}  # bot_id -> connection_id
+        self.connection_codecs: Dict[str, FrameCodec] = {}  # connection_id -> codec, JSON if absent
+        self.connection_bots: Dict[str, Set[str]] = {}  # connection_id -> bot_ids
+        self.mux_connections: Set[str] = set()  # connections carrying many bots
+        self.monitor_connections: Set[str] = set()  # connections receiving the event feed
+        self.connection_limits: Dict[str, TokenBucket] = {}  # connection_id -> inbound frame budget
+        
+        settings = get_settings()
+        self.heartbeat_interval = settings.ws_heartbeat_interval
+        self.idle_timeout = settings.ws_heartbeat_interval * settings.ws_idle_heartbeats
+        self.max_message_size = settings.ws_message_max_size
+        self.message_rate = settings.ws_message_rate
+        self.message_burst = settings.ws_message_burst
+        
+        # Inbound limit violations, exported as metrics
+        self.violations: Dict[str, int] = {"oversize": 0, "rate_limited": 0, "idle_timeout": 0}
     
-    async def connect(self, websocket: WebSocket, connection_id: str):
+    async def connect(
+        self,
+        websocket: WebSocket,
+        connection_id: str,
+        codec: FrameCodec = json_codec,
+        subprotocol: Optional[str] = None
+    ):
         """Accept a new WebSocket connection."""
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
         self.active_connections[connection_id] = websocket
+        self.connection_limits[connection_id] = TokenBucket(self.message_rate, self.message_burst)
+        if codec is not json_codec:
+            self.connection_codecs[connection_id] = codec
         logger.info(f"WebSocket connection established: {connection_id}")
     
     def disconnect(self, connection_id: str):
         """Remove a WebSocket connection."""
         if connection_id in self.active_connections:
             del self.active_connections[connection_id]
+        self.connection_codecs.pop(connection_id, None)
+        self.connection_limits.pop(connection_id, None)
+        self.mux_connections.discard(connection_id)
+        self.monitor_connections.discard(connection_id)
         
-        # Remove bot connection mapping if exists
-        for bot_id, conn_id in list(self.bot_connections.items()):
-            if conn_id == connection_id:
+        # Remove bot connection mappings still pointing at this connection
+        for bot_id in self.connection_bots.pop(connection_id, ()):
+            if self.bot_connections.get(bot_id) == connection_id:
                 del self.bot_connections[bot_id]
-                break
+            presence.disconnected(bot_id, connection_id)
         
         logger.info(f"WebSocket connection closed: {connection_id}")
     
-    async def send_personal_message(self, message: dict, connection_id: str):
-        """Send a message to a specific connection."""
+    async def send_personal_message(self, message: dict, connection_id: str) -> bool:
+        """Send a message to a specific connection, returning whether it was sent."""
         if connection_id in self.active_connections:
             websocket = self.active_connections[connection_id]
+            codec = self.connection_codecs.get(connection_id, json_codec)
             try:
-                await websocket.send_text(json.dumps(message))
+                await self._send(websocket, codec, codec.encode(message))
+                return True
             except Exception as e:
                 logger.error(f"Failed to send message to {connection_id}: {e}")
                 self.disconnect(connection_id)
+        return False
     
     async def broadcast(self, message: dict):
         """Broadcast a message to all connected clients."""
-        message_text = json.dumps(message)
+        # Encode once per codec rather than once per connection
+        frames = {json_codec.name: json_codec.encode(message)}
         disconnected = []
         
-        for connection_id, websocket in self.active_connections.items():
+        for connection_id, websocket in list(self.active_connections.items()):
+            codec = self.connection_codecs.get(connection_id, json_codec)
+            frame = frames.get(codec.name)
+            if frame is None:
+                frame = frames[codec.name] = codec.encode(message)
             try:
-                await websocket.send_text(message_text)
+                await self._send(websocket, codec, frame)
             except Exception as e:
                 logger.error(f"Failed to broadcast to {connection_id}: {e}")
                 disconnected.append(connection_id)
@@ -62,30 +117,175 @@ class ConnectionManager:
         for connection_id in disconnected:
             self.disconnect(connection_id)
     
-    async def send_to_bot(self, message: dict, bot_id: str):
-        """Send a message to a specific bot."""
+    async def publish(self, event: dict) -> dict:
+        """Record an event in the sequenced log and send it to all monitors."""
+        event = event_log.append(event)
+        message_text = json_codec.encode(event)
+        disconnected = []
+        
+        for connection_id in list(self.monitor_connections):
+            websocket = self.active_connections.get(connection_id)
+            if websocket is None:
+                continue
+            try:
+                _frames_out.inc()
+                await websocket.send_text(message_text)
+            except Exception as e:
+                logger.error(f"Failed to publish to {connection_id}: {e}")
+                disconnected.append(connection_id)
+        
+        for connection_id in disconnected:
+            self.disconnect(connection_id)
+        
+        return event
+    
+    async def send_to_bot(self, message: dict, bot_id: str) -> bool:
+        """Send a message to a specific bot, returning whether it was sent."""
         if bot_id in self.bot_connections:
             connection_id = self.bot_connections[bot_id]
-            await self.send_personal_message(message, connection_id)
+            return await self.send_bot_reply(message, bot_id, connection_id)
+        logger.warning(f"Bot {bot_id} not connected via WebSocket")
+        return False
+    
+    async def send_bot_reply(self, message: dict, bot_id: str, connection_id: str) -> bool:
+        """Send a message for one bot, tagging it with the bot id on shared connections."""
+        if connection_id in self.mux_connections:
+            message = {**message, "bot_id": bot_id}
+        return await self.send_personal_message(message, connection_id)
+    
+    async def receive_message(self, websocket: WebSocket, connection_id: str) -> dict:
+        """Receive and decode the next frame, enforcing size, rate and idle limits.
+        
+        Limits are checked before the frame is decoded. Oversized frames and
+        idle connections are closed; frames over the rate are dropped with
+        one error reply per burst.
+        """
+        codec = self.connection_codecs.get(connection_id, json_codec)
+        bucket = self.connection_limits.get(connection_id)
+        throttled = False
+        
+        while True:
+            try:
+                if self.idle_timeout > 0:
+                    frame = await asyncio.wait_for(websocket.receive(), self.idle_timeout)
+                else:
+                    frame = await websocket.receive()
+            except asyncio.TimeoutError:
+                self.violations["idle_timeout"] += 1
+                await self._close(websocket, status.WS_1001_GOING_AWAY, "Idle timeout")
+                raise WebSocketDisconnect(status.WS_1001_GOING_AWAY)
+            
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            
+            _frames_in.inc()
+            data = frame.get("text")
+            if data is None:
+                data = frame.get("bytes") or b""
+            
+            if self._frame_size(data) > self.max_message_size:
+                self.violations["oversize"] += 1
+                await self._close(websocket, status.WS_1009_MESSAGE_TOO_BIG, "Message too big")
+                raise WebSocketDisconnect(status.WS_1009_MESSAGE_TOO_BIG)
+            
+            if bucket is not None and not bucket.take():
+                self.violations["rate_limited"] += 1
+                if not throttled:
+                    throttled = True
+                    await self.send_personal_message({
+                        "type": "error",
+                        "message": "Rate limit exceeded, frame dropped",
+                        "retry_after": round(bucket.retry_after(), 3)
+                    }, connection_id)
+                continue
+            
+            return codec.decode(data)
+    
+    def _frame_size(self, data: Union[str, bytes]) -> int:
+        """Frame size in bytes, encoding text only when it could exceed the limit."""
+        if isinstance(data, bytes) or len(data) * 4 <= self.max_message_size:
+            return len(data)
+        return len(data.encode("utf-8"))
+    
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int, reason: str):
+        """Close a connection, ignoring errors if it is already gone."""
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+    
+    @staticmethod
+    async def _send(websocket: WebSocket, codec: FrameCodec, frame):
+        """Send an encoded frame using the codec's frame type."""
+        _frames_out.inc()
+        if codec.binary:
+            await websocket.send_bytes(frame)
         else:
-            logger.warning(f"Bot {bot_id} not connected via WebSocket")
+            await websocket.send_text(frame)
     
     def register_bot(self, bot_id: str, connection_id: str):
         """Register a bot with a WebSocket connection."""
+        previous = self.bot_connections.get(bot_id)
+        if previous is not None and previous != connection_id:
+            self.connection_bots.get(previous, set()).discard(bot_id)
+        
         self.bot_connections[bot_id] = connection_id
+        self.connection_bots.setdefault(connection_id, set()).add(bot_id)
+        self._scale_limit(connection_id)
+        presence.connected(bot_id, connection_id)
         logger.info(f"Bot {bot_id} registered with connection {connection_id}")
+    
+    def unregister_bot(self, bot_id: str, connection_id: str):
+        """Detach one bot from a connection, leaving other bots on it untouched."""
+        bots = self.connection_bots.get(connection_id)
+        if bots is not None:
+            bots.discard(bot_id)
+            self._scale_limit(connection_id)
+        if self.bot_connections.get(bot_id) == connection_id:
+            del self.bot_connections[bot_id]
+        presence.disconnected(bot_id, connection_id)
+        logger.info(f"Bot {bot_id} unregistered from connection {connection_id}")
+    
+    def _scale_limit(self, connection_id: str):
+        """Give multiplexed connections one frame budget per registered bot."""
+        bucket = self.connection_limits.get(connection_id)
+        if bucket is None or connection_id not in self.mux_connections:
+            return
+        bots = max(1, len(self.connection_bots.get(connection_id, ())))
+        bucket.rate = self.message_rate * bots
+        bucket.capacity = self.message_burst * bots
+    
+    def is_bot_on(self, bot_id: str, connection_id: str) -> bool:
+        """Check whether a bot is currently registered on a connection."""
+        return self.bot_connections.get(bot_id) == connection_id
+
+    def connection_counts(self) -> Dict[str, int]:
+        """Open connections by kind."""
+        mux = len(self.mux_connections)
+        monitors = len(self.monitor_connections)
+        return {
+            "bot": len(self.active_connections) - mux - monitors,
+            "mux": mux,
+            "monitor": monitors,
+        }
 
 
 # Global connection manager
 manager = ConnectionManager()
 
+WS_CONNECTIONS.set_function(lambda: {(kind,): count for kind, count in manager.connection_counts().items()})
+WS_CONNECTED_BOTS.set_function(lambda: {(): len(manager.bot_connections)})
+WS_VIOLATIONS.set_function(lambda: {(limit,): count for limit, count in manager.violations.items()})
+
 
 @websocket_router.websocket("/bot/{bot_id}")
 async def bot_websocket_endpoint(websocket: WebSocket, bot_id: str):
     """WebSocket endpoint for bot connections."""
     connection_id = f"bot_{bot_id}"
+    codec, subprotocol = negotiate_codec(websocket)
     
-    await manager.connect(websocket, connection_id)
+    await manager.connect(websocket, connection_id, codec, subprotocol)
     manager.register_bot(bot_id, connection_id)
     
     try:
@@ -93,105 +293,200 @@ async def bot_websocket_endpoint(websocket: WebSocket, bot_id: str):
         await manager.send_personal_message({
             "type": "welcome",
             "bot_id": bot_id,
-            "message": "Connected to Kentech Bot Pairing System"
+            "message": "Connected to Kentech Bot Pairing System",
+            "encoding": codec.name,
+            "heartbeat_interval": manager.heartbeat_interval
         }, connection_id)
         
         while True:
             # Receive message from bot
-            data = await websocket.receive_text()
             try:
-                message = json.loads(data)
-                await handle_bot_message(bot_id, message, connection_id)
-            except json.JSONDecodeError:
+                message = await manager.receive_message(websocket, connection_id)
+            except FrameDecodeError as e:
                 await manager.send_personal_message({
                     "type": "error",
-                    "message": "Invalid JSON format"
+                    "message": str(e)
                 }, connection_id)
+                continue
+            
+            await handle_bot_message(bot_id, message, connection_id)
                 
     except WebSocketDisconnect:
         manager.disconnect(connection_id)
         logger.info(f"Bot {bot_id} disconnected")
 
 
-@websocket_router.websocket("/monitoring")
-async def monitoring_websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for web interface monitoring."""
-    connection_id = "web_monitor"
+@websocket_router.websocket("/mux")
+async def mux_websocket_endpoint(websocket: WebSocket):
+    """WebSocket endpoint carrying many bots over one connection.
     
-    await manager.connect(websocket, connection_id)
+    Bots join and leave with ``register``/``unregister`` frames. Every other
+    frame must carry ``bot_id`` and is handled exactly as on ``/ws/bot``;
+    frames sent back for a bot are tagged with its ``bot_id``.
+    """
+    connection_id = f"mux_{uuid4().hex}"
+    codec, subprotocol = negotiate_codec(websocket)
+    
+    await manager.connect(websocket, connection_id, codec, subprotocol)
+    manager.mux_connections.add(connection_id)
     
     try:
-        # Send initial status
         await manager.send_personal_message({
-            "type": "connected",
-            "message": "Connected to monitoring feed",
-            "active_connections": len(manager.active_connections),
-            "connected_bots": len(manager.bot_connections)
+            "type": "welcome",
+            "connection_id": connection_id,
+            "message": "Connected to Kentech Bot Pairing System",
+            "encoding": codec.name,
+            "heartbeat_interval": manager.heartbeat_interval
         }, connection_id)
         
         while True:
-            # Keep connection alive and handle any incoming messages
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            try:
+                message = await manager.receive_message(websocket, connection_id)
+            except FrameDecodeError as e:
+                await manager.send_personal_message({
+                    "type": "error",
+                    "message": str(e)
+                }, connection_id)
+                continue
             
-            if message.get("type") == "ping":
+            message_type = message.get("type")
+            bot_id = message.get("bot_id")
+            if not bot_id:
                 await manager.send_personal_message({
-                    "type": "pong",
-                    "timestamp": message.get("timestamp")
+                    "type": "error",
+                    "message": "Frames on a multiplexed connection must include bot_id"
+                }, connection_id)
+                continue
+            
+            if message_type == "register":
+                manager.register_bot(bot_id, connection_id)
+                await manager.send_bot_reply({"type": "registered"}, bot_id, connection_id)
+            elif message_type == "unregister":
+                manager.unregister_bot(bot_id, connection_id)
+                await manager.send_personal_message({
+                    "type": "unregistered",
+                    "bot_id": bot_id
+                }, connection_id)
+            elif manager.is_bot_on(bot_id, connection_id):
+                await handle_bot_message(bot_id, message, connection_id)
+            else:
+                await manager.send_personal_message({
+                    "type": "error",
+                    "bot_id": bot_id,
+                    "message": "Bot is not registered on this connection"
                 }, connection_id)
                 
     except WebSocketDisconnect:
+        bot_count = len(manager.connection_bots.get(connection_id, ()))
         manager.disconnect(connection_id)
+        logger.info(f"Multiplexed connection {connection_id} with {bot_count} bots disconnected")
+
+
+@websocket_router.websocket("/monitoring")
+async def monitoring_websocket_endpoint(websocket: WebSocket):
+    """WebSocket endpoint for web interface monitoring."""
+    await run_monitor(websocket, "web_monitor", {
+        "type": "connected",
+        "message": "Connected to monitoring feed"
+    })
 
 
 @websocket_router.websocket("/monitor")
 async def monitor_websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for monitoring connections."""
-    connection_id = "monitor"
+    await run_monitor(websocket, "monitor", {"type": "status"})
+
+
+async def run_monitor(websocket: WebSocket, prefix: str, greeting: dict):
+    """Serve a monitor connection: live events, ping/pong and resume."""
+    connection_id = f"{prefix}_{uuid4().hex}"
     
     await manager.connect(websocket, connection_id)
+    manager.monitor_connections.add(connection_id)
     
     try:
-        # Send system status
+        # Send initial status with the current position in the event log
         await manager.send_personal_message({
-            "type": "status",
+            **greeting,
             "active_connections": len(manager.active_connections),
-            "connected_bots": len(manager.bot_connections)
+            "connected_bots": len(manager.bot_connections),
+            "epoch": event_log.epoch,
+            "seq": event_log.seq,
+            "heartbeat_interval": manager.heartbeat_interval
         }, connection_id)
         
         while True:
-            # Keep connection alive
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            # Keep connection alive and handle any incoming messages
+            try:
+                message = await manager.receive_message(websocket, connection_id)
+            except FrameDecodeError as e:
+                await manager.send_personal_message({
+                    "type": "error",
+                    "message": str(e)
+                }, connection_id)
+                continue
             
             if message.get("type") == "ping":
                 await manager.send_personal_message({
                     "type": "pong",
                     "timestamp": message.get("timestamp")
                 }, connection_id)
+            elif message.get("type") == "resume":
+                await send_resume(connection_id, message.get("last_seq"), message.get("epoch"))
                 
     except WebSocketDisconnect:
         manager.disconnect(connection_id)
 
 
+async def send_resume(connection_id: str, last_seq: Optional[int], epoch: Optional[str]):
+    """Send a monitor the events after ``last_seq``, or a snapshot if they are gone."""
+    if isinstance(last_seq, int):
+        events = event_log.since(last_seq, epoch)
+        if events is not None:
+            await manager.send_personal_message({
+                "type": "replay",
+                "epoch": event_log.epoch,
+                "seq": event_log.seq,
+                "events": events
+            }, connection_id)
+            return
+    
+    # Events published while the snapshot is read are sent along with it;
+    # applying them again on top of the snapshot is harmless.
+    seq = event_log.seq
+    async with async_session_maker() as db:
+        bots = await bot_manager.get_all_bots(db)
+        pairs = await pairing_core.get_all_pairs(db)
+    
+    await manager.send_personal_message({
+        "type": "snapshot",
+        "epoch": event_log.epoch,
+        "seq": seq,
+        "bots": [BotResponse.model_validate(bot).model_dump(mode="json") for bot in bots],
+        "pairs": [BotPairSummary.model_validate(pair).model_dump(mode="json") for pair in pairs],
+        "events": event_log.since(seq) or []
+    }, connection_id)
+
+
 async def handle_bot_message(bot_id: str, message: dict, connection_id: str):
     """Handle incoming messages from bots."""
     message_type = message.get("type")
     
     if message_type == "heartbeat":
         # Handle heartbeat
-        await manager.send_personal_message({
+        presence.heartbeat(bot_id)
+        await manager.send_bot_reply({
             "type": "heartbeat_ack",
             "timestamp": message.get("timestamp")
-        }, connection_id)
+        }, bot_id, connection_id)
         
     elif message_type == "status_update":
         # Handle status update
         status = message.get("status")
         logger.info(f"Bot {bot_id} status update: {status}")
         
-        # Broadcast status update to monitors
-        await manager.broadcast({
+        # Publish status update to monitors
+        await manager.publish({
             "type": "bot_status_update",
             "bot_id": bot_id,
             "status": status,
@@ -201,19 +496,53 @@ async def handle_bot_message(bot_id: str, message: dict, connection_id: str):
     elif message_type == "pair_message":
         # Handle messages between paired bots
         target_bot_id = message.get("target_bot_id")
-        if target_bot_id:
+        decision, route = pair_routes.authorize(bot_id, target_bot_id)
+        
+        if decision == RelayDecision.ALLOWED:
+            pair_expiry.touch(route.pair_id)
             await manager.send_to_bot({
                 "type": "pair_message",
+                "pair_id": route.pair_id,
                 "from_bot_id": bot_id,
                 "message": message.get("message"),
                 "timestamp": message.get("timestamp")
-            }, target_bot_id)
+            }, route.partner_id)
+        elif decision == RelayDecision.THROTTLED:
+            # Tell the sender to slow down instead of queueing on the partner's socket
+            await manager.send_bot_reply({
+                "type": "backpressure",
+                "pair_id": route.pair_id,
+                "retry_after": round(route.bucket.retry_after(), 3),
+                "timestamp": message.get("timestamp")
+            }, bot_id, connection_id)
+        else:
+            await manager.send_bot_reply({
+                "type": "error",
+                "message": "Bot is not paired with the target bot",
+                "target_bot_id": target_bot_id
+            }, bot_id, connection_id)
         
     else:
         logger.warning(f"Unknown message type from bot {bot_id}: {message_type}")
 
 
-async def notify_pair_created(pair_id: str, primary_bot_id: str, secondary_bot_id: str):
+async def send_to_bots(messages: Dict[str, dict]):
+    """Send each bot its notification, here or on the worker holding its connection.
+    
+    Messages for bots connected elsewhere are forwarded through the outbox;
+    ``UndeliveredError`` is raised with those for bots connected nowhere.
+    """
+    undelivered = {}
+    for bot_id, message in messages.items():
+        connection_id = manager.bot_connections.get(bot_id)
+        if connection_id is None or not await manager.send_bot_reply(message, bot_id, connection_id):
+            undelivered[bot_id] = message
+    if undelivered:
+        await outbox.forward(undelivered)
+
+
+async def notify_pair_created(pair_id: str, primary_bot_id: str, secondary_bot_id: str,
+                              event_id: Optional[str] = None):
     """Notify about new pair creation."""
     notification = {
         "type": "pair_created",
@@ -221,16 +550,16 @@ async def notify_pair_created(pair_id: str, primary_bot_id: str, secondary_bot_i
         "primary_bot_id": primary_bot_id,
         "secondary_bot_id": secondary_bot_id
     }
+    if event_id:
+        notification["event_id"] = event_id
     
-    # Notify the paired bots
-    await manager.send_to_bot(notification, primary_bot_id)
-    await manager.send_to_bot(notification, secondary_bot_id)
-    
-    # Broadcast to monitors
-    await manager.broadcast(notification)
+    # Publish to monitors, then notify the paired bots
+    await manager.publish(notification)
+    await send_to_bots({primary_bot_id: notification, secondary_bot_id: notification})
 
 
-async def notify_pair_terminated(pair_id: str, primary_bot_id: str, secondary_bot_id: str):
+async def notify_pair_terminated(pair_id: str, primary_bot_id: str, secondary_bot_id: str,
+                                 reason: Optional[str] = None, event_id: Optional[str] = None):
     """Notify about pair termination."""
     notification = {
         "type": "pair_terminated",
@@ -238,10 +567,158 @@ async def notify_pair_terminated(pair_id: str, primary_bot_id: str, secondary_bo
         "primary_bot_id": primary_bot_id,
         "secondary_bot_id": secondary_bot_id
     }
+    if reason:
+        notification["reason"] = reason
+    if event_id:
+        notification["event_id"] = event_id
     
-    # Notify the bots
-    await manager.send_to_bot(notification, primary_bot_id)
-    await manager.send_to_bot(notification, secondary_bot_id)
+    # Publish to monitors, then notify the bots
+    await manager.publish(notification)
+    await send_to_bots({primary_bot_id: notification, secondary_bot_id: notification})
+
+
+async def notify_bot_event(event_type: str, bot: Bot):
+    """Notify monitors that a bot was registered or changed."""
+    await manager.publish({
+        "type": event_type,
+        "bot_id": bot.id,
+        "bot": BotResponse.model_validate(bot).model_dump(mode="json")
+    })
+
+
+async def notify_bot_deregistered(bot_id: str):
+    """Notify monitors that a bot was deregistered."""
+    await manager.publish({
+        "type": "bot_deregistered",
+        "bot_id": bot_id,
+        "status": BotStatus.OFFLINE.value
+    })
+
+
+async def notify_presence_change(bot_ids: List[str], status: BotStatus):
+    """Notify monitors about statuses derived from WebSocket presence."""
+    event_type = "bot_disconnected" if status == BotStatus.OFFLINE else "bot_connected"
+    for bot_id in bot_ids:
+        await manager.publish({
+            "type": event_type,
+            "bot_id": bot_id,
+            "status": status.value
+        })
+
+
+async def notify_auto_pair_job(job: AutoPairJob):
+    """Notify monitors about an auto-pair job's status and progress."""
+    await manager.publish({
+        "type": "auto_pair_job",
+        "job": job.to_dict()
+    })
+
+
+async def notify_pairs_terminated(pairs: List[Tuple[str, str, str]], reason: Optional[str] = None,
+                                  event_id: Optional[str] = None):
+    """Notify about many terminated pairs with one message per affected bot and one monitor event."""
+    event = {
+        "type": "pairs_terminated",
+        "pairs": [
+            {"pair_id": pair_id, "primary_bot_id": primary_bot_id, "secondary_bot_id": secondary_bot_id}
+            for pair_id, primary_bot_id, secondary_bot_id in pairs
+        ]
+    }
+    if reason:
+        event["reason"] = reason
+    if event_id:
+        event["event_id"] = event_id
+    await manager.publish(event)
+    
+    by_bot: Dict[str, List[Tuple[str, str, str]]] = {}
+    for pair in pairs:
+        for bot_id in pair[1:]:
+            by_bot.setdefault(bot_id, []).append(pair)
     
-    # Broadcast to monitors
-    await manager.broadcast(notification)
+    messages = {}
+    for bot_id, bot_pairs in by_bot.items():
+        pair_id, primary_bot_id, secondary_bot_id = bot_pairs[-1]
+        notification = {
+            "type": "pair_terminated",
+            "pair_id": pair_id,
+            "primary_bot_id": primary_bot_id,
+            "secondary_bot_id": secondary_bot_id
+        }
+        if len(bot_pairs) > 1:
+            notification["pair_ids"] = [pair[0] for pair in bot_pairs]
+        if reason:
+            notification["reason"] = reason
+        if event_id:
+            notification["event_id"] = event_id
+        messages[bot_id] = notification
+    await send_to_bots(messages)
+
+
+async def deliver_pair_created(event_id: str, payload: dict):
+    """Outbox handler for ``pair_created`` events."""
+    await notify_pair_created(
+        payload["pair_id"], payload["primary_bot_id"], payload["secondary_bot_id"], event_id=event_id
+    )
+
+
+async def deliver_pairs_terminated(event_id: str, payload: dict):
+    """Outbox handler for ``pairs_terminated`` events."""
+    pairs = [tuple(pair) for pair in payload["pairs"]]
+    if len(pairs) == 1:
+        await notify_pair_terminated(*pairs[0], reason=payload.get("reason"), event_id=event_id)
+    else:
+        await notify_pairs_terminated(pairs, payload.get("reason"), event_id)
+
+
+async def notify_groups_event(event_type: str, groups: List[dict], reason: Optional[str] = None,
+                              event_id: Optional[str] = None):
+    """Notify each member of the groups once about its group, and monitors with one event.
+    
+    ``event_type`` is ``group_created`` or ``group_terminated``; monitors get
+    the plural form with every group in it.
+    """
+    event = {"type": event_type.replace("group_", "groups_"), "groups": groups}
+    if reason:
+        event["reason"] = reason
+    if event_id:
+        event["event_id"] = event_id
+    await manager.publish(event)
+    
+    messages = {}
+    for group in groups:
+        notification = {
+            "type": event_type,
+            "group_id": group["group_id"],
+            "bot_ids": group["bot_ids"]
+        }
+        if reason:
+            notification["reason"] = reason
+        if event_id:
+            notification["event_id"] = event_id
+        for bot_id in group["bot_ids"]:
+            messages[bot_id] = notification
+    await send_to_bots(messages)
+
+
+async def deliver_groups_created(event_id: str, payload: dict):
+    """Outbox handler for ``groups_created`` events."""
+    await notify_groups_event("group_created", payload["groups"], event_id=event_id)
+
+
+async def deliver_groups_terminated(event_id: str, payload: dict):
+    """Outbox handler for ``groups_terminated`` events."""
+    await notify_groups_event("group_terminated", payload["groups"], payload.get("reason"), event_id)
+
+
+async def deliver_bot_messages(event_id: str, payload: dict):
+    """Outbox handler for messages forwarded to the bots connected to this worker."""
+    await send_to_bots(payload["messages"])
+
+
+presence.on_status_change = notify_presence_change
+auto_pair_jobs.on_update = notify_auto_pair_job
+outbox.register("pair_created", deliver_pair_created)
+outbox.register("pairs_terminated", deliver_pairs_terminated)
+outbox.register("groups_created", deliver_groups_created)
+outbox.register("groups_terminated", deliver_groups_terminated)
+outbox.register(BOT_MESSAGES, deliver_bot_messages)
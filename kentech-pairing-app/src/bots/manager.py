@@ -3,13 +3,15 @@ Bot management functionality.
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from loguru import logger
 
-from src.bots.models import Bot, BotStatus, BotCreate, BotUpdate
-from src.config.database import get_db_session
+from src.bots.models import Bot, BotStatus, BotCreate, BotResponse, BotUpdate, status_values
+from src.config.database import get_db_session, async_session_maker
+from src.monitoring.metrics import BOTS_BY_STATUS
+from src.utils.version import state_version
 
 
 class BotManager:
@@ -26,10 +28,12 @@ class BotManager:
                 bot_type=bot_data.bot_type,
                 endpoint=bot_data.endpoint,
                 capabilities=bot_data.capabilities,
-                status=BotStatus.ONLINE
+                status=BotStatus.ONLINE,
+                available_since=datetime.utcnow()
             )
             
             db.add(bot)
+            await state_version.bump(db, "bots")
             await db.commit()
             await db.refresh(bot)
             
@@ -61,17 +65,32 @@ class BotManager:
             logger.error(f"Failed to get all bots: {e}")
             return []
     
+    async def get_bot_rows(self, db: AsyncSession) -> List[dict]:
+        """Get all bots as column dicts, without building ORM objects."""
+        try:
+            # Only the response fields, so internal columns never reach clients
+            columns = [Bot.__table__.c[name] for name in BotResponse.model_fields]
+            result = await db.execute(select(*columns))
+            keys = tuple(result.keys())
+            return [dict(zip(keys, row)) for row in result]
+        except Exception as e:
+            logger.error(f"Failed to get bot rows: {e}")
+            return []
+    
     async def update_bot(self, bot_id: str, bot_data: BotUpdate, db: AsyncSession) -> Optional[Bot]:
         """Update a bot."""
         try:
             update_data = bot_data.dict(exclude_unset=True)
             update_data['updated_at'] = datetime.utcnow()
+            if update_data.get('status') is not None:
+                update_data.update(status_values(update_data['status']))
             
             await db.execute(
                 update(Bot)
                 .where(Bot.id == bot_id)
                 .values(**update_data)
             )
+            await state_version.bump(db, "bots")
             await db.commit()
             
             # Get updated bot
@@ -88,8 +107,9 @@ class BotManager:
             await db.execute(
                 update(Bot)
                 .where(Bot.id == bot_id)
-                .values(status=status, updated_at=datetime.utcnow())
+                .values(**status_values(status))
             )
+            await state_version.bump(db, "bots")
             await db.commit()
             
             logger.info(f"Bot {bot_id} status updated to {status}")
@@ -108,6 +128,7 @@ class BotManager:
                 .where(Bot.id == bot_id)
                 .values(last_heartbeat=datetime.utcnow())
             )
+            await state_version.bump(db, "bots")
             await db.commit()
             
             return True
@@ -128,6 +149,11 @@ class BotManager:
             logger.error(f"Failed to get available bots: {e}")
             return []
     
+    async def count_by_status(self, db: AsyncSession) -> Dict[str, int]:
+        """Count bots per status."""
+        result = await db.execute(select(Bot.status, func.count()).group_by(Bot.status))
+        return {str(status): count for status, count in result.all()}
+    
     async def deregister_bot(self, bot_id: str, db: AsyncSession) -> bool:
         """Deregister a bot."""
         try:
@@ -146,3 +172,12 @@ class BotManager:
 
 # Global bot manager instance
 bot_manager = BotManager()
+
+
+async def _collect_bots_by_status() -> Dict[tuple, int]:
+    async with async_session_maker() as db:
+        counts = await bot_manager.count_by_status(db)
+    return {(status.value,): counts.get(status.value, 0) for status in BotStatus}
+
+
+BOTS_BY_STATUS.set_function(_collect_bots_by_status)
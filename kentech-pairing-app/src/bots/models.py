@@ -1,13 +1,13 @@
 """
-Database models for bots and bot pairs.
+Database models for bots, bot pairs and bot groups.
 """
 
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from uuid import uuid4
 
-from sqlalchemy import String, DateTime, Text, Integer, Boolean, ForeignKey
+from sqlalchemy import String, DateTime, Text, Integer, Boolean, Float, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from pydantic import BaseModel, Field
 
@@ -41,6 +41,10 @@ class Bot(Base):
     endpoint: Mapped[str] = mapped_column(String(255), nullable=False)
     capabilities: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     last_heartbeat: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # When the bot last became ONLINE and available for pairing, None otherwise
+    available_since: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+    # Worker holding the bot's WebSocket connection, written by presence flushes
+    connection_worker: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -58,12 +62,81 @@ class BotPair(Base):
     secondary_bot_id: Mapped[str] = mapped_column(String(36), ForeignKey("bots.id"), nullable=False)
     status: Mapped[PairStatus] = mapped_column(String(20), default=PairStatus.ACTIVE)
     pairing_strategy: Mapped[str] = mapped_column(String(50), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    terminated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # maximum lifetime
+    idle_timeout: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # seconds without pair_message
+    # Last relayed pair_message, written in throttled batches for idle checks on every worker
+    last_activity_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    # Relationships, loaded with the pair so API responses never lazy-load per row
+    primary_bot = relationship("Bot", foreign_keys=[primary_bot_id], back_populates="pairs_as_primary", lazy="selectin")
+    secondary_bot = relationship("Bot", foreign_keys=[secondary_bot_id], back_populates="pairs_as_secondary", lazy="selectin")
+
+
+class BotGroup(Base):
+    """Group of bots formed together; pairs remain ``BotPair`` rows."""
+    __tablename__ = "bot_groups"
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
+    status: Mapped[PairStatus] = mapped_column(String(20), default=PairStatus.ACTIVE, index=True)
+    grouping_strategy: Mapped[str] = mapped_column(String(50), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     terminated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class BotGroupMember(Base):
+    """Membership of one bot in a group."""
+    __tablename__ = "bot_group_members"
     
-    # Relationships
-    primary_bot = relationship("Bot", foreign_keys=[primary_bot_id], back_populates="pairs_as_primary")
-    secondary_bot = relationship("Bot", foreign_keys=[secondary_bot_id], back_populates="pairs_as_secondary")
+    group_id: Mapped[str] = mapped_column(String(36), ForeignKey("bot_groups.id"), primary_key=True)
+    bot_id: Mapped[str] = mapped_column(String(36), ForeignKey("bots.id"), primary_key=True, index=True)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class SchedulerLease(Base):
+    """Named lease held by the one worker allowed to run a scheduler."""
+    __tablename__ = "scheduler_leases"
+    
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(255), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class TableVersion(Base):
+    """Write counter of one table, shared by all workers for ETags."""
+    __tablename__ = "table_versions"
+    
+    name: Mapped[str] = mapped_column(String(20), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class OutboxEvent(Base):
+    """Notification written in the same transaction as the change it announces."""
+    __tablename__ = "outbox_events"
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Not picked up before this time: set on retries and while a dispatcher holds the event
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    delivered_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+    # Only this worker's dispatcher claims the event; any dispatcher when None
+    worker_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
+
+
+def status_values(status: BotStatus, now: Optional[datetime] = None) -> dict:
+    """Column values for moving a bot to ``status``."""
+    now = now or datetime.utcnow()
+    return {
+        "status": status,
+        "available_since": now if status == BotStatus.ONLINE else None,
+        "updated_at": now,
+    }
 
 
 # Pydantic models for API serialization
@@ -92,6 +165,7 @@ class BotResponse(BaseModel):
     endpoint: str
     capabilities: Optional[str]
     last_heartbeat: Optional[datetime]
+    available_since: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     
@@ -104,6 +178,36 @@ class BotPairCreate(BaseModel):
     primary_bot_id: str
     secondary_bot_id: str
     pairing_strategy: str = "default"
+    max_lifetime: Optional[float] = Field(None, gt=0, description="Seconds before the pair is terminated")
+    idle_timeout: Optional[float] = Field(None, gt=0, description="Seconds without a pair_message before termination")
+
+
+class BulkTerminateRequest(BaseModel):
+    """Selects active pairs to terminate; every given criterion must match."""
+    pair_ids: Optional[List[str]] = None
+    pairing_strategy: Optional[str] = None
+    older_than: Optional[float] = Field(None, ge=0, description="Only pairs created at least this many seconds ago")
+    bot_type: Optional[str] = Field(None, description="Only pairs with a bot of this type")
+    
+    def has_criteria(self) -> bool:
+        """Whether anything narrows the selection down from all active pairs."""
+        return any(value is not None for value in self.dict().values())
+
+
+class BotPairSummary(BaseModel):
+    """Bot pair model without the nested bots."""
+    id: str
+    primary_bot_id: str
+    secondary_bot_id: str
+    status: PairStatus
+    pairing_strategy: str
+    created_at: datetime
+    terminated_at: Optional[datetime]
+    expires_at: Optional[datetime] = None
+    idle_timeout: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
 
 
 class BotPairResponse(BaseModel):
@@ -115,8 +219,27 @@ class BotPairResponse(BaseModel):
     pairing_strategy: str
     created_at: datetime
     terminated_at: Optional[datetime]
+    expires_at: Optional[datetime] = None
+    idle_timeout: Optional[float] = None
     primary_bot: BotResponse
     secondary_bot: BotResponse
     
     class Config:
         from_attributes = True
+
+
+class BotGroupCreate(BaseModel):
+    """Bot group creation model."""
+    bot_ids: List[str] = Field(..., description="At least three online bots, at most max_bots_per_pair")
+    grouping_strategy: str = "manual"
+
+
+class BotGroupResponse(BaseModel):
+    """Bot group response model."""
+    id: str
+    status: PairStatus
+    grouping_strategy: str
+    size: int
+    created_at: datetime
+    terminated_at: Optional[datetime]
+    bot_ids: List[str]
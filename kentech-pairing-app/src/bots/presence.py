@@ -0,0 +1,261 @@
+"""
+In-memory bot presence fed by WebSocket connections and heartbeats.
+
+Liveness is tracked per bot in memory and written to the database in
+periodic batches: ``Bot.last_heartbeat`` for bots seen since the last
+flush, ``Bot.connection_worker`` for bots that connected, and
+``Bot.status`` for bots that connected or stayed disconnected past the
+grace period.
+
+A bot that reconnects goes back to PAIRED if it is still in an active pair
+or group, and to ONLINE otherwise. A bot whose grace period runs out is
+only marked OFFLINE while no other worker has taken over its connection,
+and ``on_offline`` then ends its pairs and groups.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import bindparam, exists, or_, update
+from loguru import logger
+
+from src.bots.models import (
+    Bot, BotGroup, BotGroupMember, BotPair, BotStatus, PairStatus, status_values
+)
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+from src.utils.version import state_version
+
+
+def _in_active_pair_or_group():
+    """Condition on ``Bot`` matching bots that are in an active pair or group."""
+    in_pair = exists().where(
+        BotPair.status == PairStatus.ACTIVE,
+        or_(BotPair.primary_bot_id == Bot.id, BotPair.secondary_bot_id == Bot.id)
+    )
+    in_group = exists().where(
+        BotGroupMember.bot_id == Bot.id,
+        BotGroup.id == BotGroupMember.group_id,
+        BotGroup.status == PairStatus.ACTIVE
+    )
+    return or_(in_pair, in_group)
+
+
+class BotPresence:
+    """Presence entry for a single bot."""
+
+    __slots__ = ("bot_id", "connection_id", "worker_id", "connected", "last_seen", "disconnected_at")
+
+    def __init__(self, bot_id: str, connection_id: str, worker_id: str):
+        self.bot_id = bot_id
+        self.connection_id = connection_id
+        self.worker_id = worker_id
+        self.connected = True
+        self.last_seen = time.time()
+        self.disconnected_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """Serialize the entry for API responses."""
+        return {
+            "bot_id": self.bot_id,
+            "connected": self.connected,
+            "connection_id": self.connection_id,
+            "worker_id": self.worker_id,
+            "last_seen": datetime.utcfromtimestamp(self.last_seen).isoformat(),
+        }
+
+
+class PresenceTracker:
+    """Tracks bot liveness in memory and persists it in batches."""
+
+    def __init__(self, flush_interval: float, grace_period: float):
+        self.flush_interval = flush_interval
+        self.grace_period = grace_period
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.entries: Dict[str, BotPresence] = {}
+        self._seen: Set[str] = set()  # bots with a heartbeat since the last flush
+        self._connected: Set[str] = set()  # bots that (re)connected since the last flush
+        self._task: Optional[asyncio.Task] = None
+        # Called with the bot ids whose derived status changed in a flush
+        self.on_status_change: Optional[Callable[[List[str], BotStatus], Awaitable[None]]] = None
+        # Called with the bot ids marked offline, to end their pairs and groups
+        self.on_offline: Optional[Callable[[List[str]], Awaitable[None]]] = None
+
+    def connected(self, bot_id: str, connection_id: str):
+        """Record a bot attaching to a connection on this worker."""
+        entry = self.entries.get(bot_id)
+        if entry is None:
+            self.entries[bot_id] = BotPresence(bot_id, connection_id, self.worker_id)
+        else:
+            entry.connection_id = connection_id
+            entry.connected = True
+            entry.disconnected_at = None
+            entry.last_seen = time.time()
+        self._seen.add(bot_id)
+        self._connected.add(bot_id)
+
+    def heartbeat(self, bot_id: str) -> bool:
+        """Record a heartbeat, returning False if the bot is not connected here."""
+        entry = self.entries.get(bot_id)
+        if entry is None or not entry.connected:
+            return False
+        entry.last_seen = time.time()
+        self._seen.add(bot_id)
+        return True
+
+    def disconnected(self, bot_id: str, connection_id: str):
+        """Record a bot leaving, unless it already moved to another connection."""
+        entry = self.entries.get(bot_id)
+        if entry is None or entry.connection_id != connection_id:
+            return
+        entry.connected = False
+        entry.disconnected_at = time.monotonic()
+        self._connected.discard(bot_id)
+
+    def is_connected(self, bot_id: str) -> bool:
+        """Check whether a bot currently holds a connection on this worker."""
+        entry = self.entries.get(bot_id)
+        return entry is not None and entry.connected
+
+    def get(self, bot_id: str) -> Optional[BotPresence]:
+        """Get the presence entry for a bot."""
+        return self.entries.get(bot_id)
+
+    def stats(self) -> dict:
+        """Summarize the presence table."""
+        connected = sum(1 for entry in self.entries.values() if entry.connected)
+        return {
+            "worker_id": self.worker_id,
+            "connected": connected,
+            "disconnecting": len(self.entries) - connected,
+            "pending_heartbeats": len(self._seen),
+        }
+
+    async def flush(self):
+        """Write batched heartbeats and derived statuses to the database."""
+        seen, self._seen = self._seen, set()
+        connected, self._connected = self._connected, set()
+
+        now = time.monotonic()
+        expired = [
+            entry.bot_id for entry in self.entries.values()
+            if not entry.connected and now - entry.disconnected_at >= self.grace_period
+        ]
+
+        if not seen and not connected and not expired:
+            return
+
+        heartbeats = [
+            {"bot_id": bot_id, "seen_at": datetime.utcfromtimestamp(self.entries[bot_id].last_seen)}
+            for bot_id in seen if bot_id in self.entries
+        ]
+
+        went_online: List[str] = []
+        went_paired: List[str] = []
+        went_offline: List[str] = []
+        try:
+            async with async_session_maker() as db:
+                if heartbeats:
+                    # Core executemany so bots deleted since their last beat are skipped
+                    await db.execute(
+                        update(Bot.__table__)
+                        .where(Bot.__table__.c.id == bindparam("bot_id"))
+                        .values(last_heartbeat=bindparam("seen_at")),
+                        heartbeats
+                    )
+                if connected:
+                    # Lets other workers route notifications for these bots here
+                    await db.execute(
+                        update(Bot)
+                        .where(Bot.id.in_(connected))
+                        .values(connection_worker=self.worker_id)
+                    )
+                    # Bots whose pair or group outlived their disconnect are still taken
+                    result = await db.execute(
+                        update(Bot)
+                        .where(Bot.id.in_(connected), Bot.status == BotStatus.OFFLINE, _in_active_pair_or_group())
+                        .values(**status_values(BotStatus.PAIRED))
+                        .returning(Bot.id)
+                    )
+                    went_paired = list(result.scalars())
+                    result = await db.execute(
+                        update(Bot)
+                        .where(Bot.id.in_(connected), Bot.status == BotStatus.OFFLINE)
+                        .values(**status_values(BotStatus.ONLINE))
+                        .returning(Bot.id)
+                    )
+                    went_online = list(result.scalars())
+                if expired:
+                    # Unless the bot has since connected to another worker
+                    result = await db.execute(
+                        update(Bot)
+                        .where(
+                            Bot.id.in_(expired),
+                            Bot.status != BotStatus.OFFLINE,
+                            or_(Bot.connection_worker == self.worker_id, Bot.connection_worker.is_(None))
+                        )
+                        .values(**status_values(BotStatus.OFFLINE), connection_worker=None)
+                        .returning(Bot.id)
+                    )
+                    went_offline = list(result.scalars())
+                await state_version.bump(db, "bots")
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to flush bot presence: {e}")
+            # Retry on the next flush
+            self._seen |= seen
+            self._connected |= connected
+            return
+
+        for bot_id in expired:
+            entry = self.entries.get(bot_id)
+            if entry is not None and not entry.connected:
+                del self.entries[bot_id]
+
+        if went_offline:
+            logger.info(f"Marked {len(went_offline)} disconnected bots offline")
+            if self.on_offline is not None:
+                try:
+                    await self.on_offline(went_offline)
+                except Exception as e:
+                    logger.error(f"Failed to end pairs of {len(went_offline)} offline bots: {e}")
+        
+        if self.on_status_change is not None:
+            if went_online:
+                await self.on_status_change(went_online, BotStatus.ONLINE)
+            if went_paired:
+                await self.on_status_change(went_paired, BotStatus.PAIRED)
+            if went_offline:
+                await self.on_status_change(went_offline, BotStatus.OFFLINE)
+
+    async def run(self):
+        """Flush presence on an interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the background flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background task and flush what is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+settings = get_settings()
+
+# Global presence tracker
+presence = PresenceTracker(settings.presence_flush_interval, settings.presence_grace_period)
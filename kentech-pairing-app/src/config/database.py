@@ -3,11 +3,13 @@ Database configuration and initialization.
 """
 
 from typing import AsyncGenerator
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from loguru import logger
 
 from .settings import get_settings
+from src.monitoring.queries import instrument_engine
 
 settings = get_settings()
 
@@ -25,6 +27,9 @@ engine = create_async_engine(
     future=True
 )
 
+# Attribute statements to requests, log slow ones and feed the metrics layer
+instrument_engine(engine, settings.slow_query_threshold, record_metrics=settings.metrics_enabled)
+
 # Create async session maker
 async_session_maker = async_sessionmaker(
     engine,
@@ -55,15 +60,43 @@ async def init_database():
     try:
         async with engine.begin() as conn:
             # Import all models here to ensure they are registered
-            from src.bots.models import Bot, BotPair  # noqa
+            from src.bots.models import (  # noqa
+                Bot, BotGroup, BotGroupMember, BotPair, OutboxEvent, SchedulerLease, TableVersion
+            )
             
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_add_missing_columns)
+            await conn.run_sync(_add_missing_indexes)
             logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
 
 
+def _add_missing_columns(conn):
+    """Add nullable columns that were introduced after a table was created."""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            logger.info(f"Added column {table.name}.{column.name}")
+
+
+def _add_missing_indexes(conn):
+    """Create indexes that were introduced after a table was created."""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+                logger.info(f"Added index {index.name}")
+
+
 async def close_database():
     """Close database connections."""
     await engine.dispose()
@@ -4,7 +4,7 @@ Configuration management for the Kentech Bot Pairing Application.
 
 import os
 from functools import lru_cache
-from typing import List
+from typing import Dict, List
 
 from pydantic import validator
 from pydantic_settings import BaseSettings
@@ -22,6 +22,8 @@ class Settings(BaseSettings):
     # Database settings
     database_url: str = "sqlite+aiosqlite:///./kentech_pairing.db"
     database_echo: bool = False
+    slow_query_threshold: float = 0.1  # seconds before a statement is logged as slow, 0 disables
+    server_timing_enabled: bool = True  # per-request db time and query count in Server-Timing
     
     # Redis settings
     redis_url: str = "redis://localhost:6379/0"
@@ -35,18 +37,93 @@ class Settings(BaseSettings):
     max_bots_per_pair: int = 2
     pairing_timeout: int = 30
     health_check_interval: int = 60
+    pair_relay_rate: float = 50.0  # pair_message frames per second per direction, 0 disables
+    pair_relay_burst: int = 100
+    auto_pair_job_history: int = 100  # finished background auto-pair jobs kept for status lookups
+    auto_pair_progress_interval: float = 0.5  # seconds between job progress events to monitors
+    auto_pair_scheduler_enabled: bool = False  # run auto-pairing in the background on one worker
+    auto_pair_strategy: str = "default"  # strategy used by scheduled runs
+    auto_pair_interval: float = 10.0  # seconds between runs when auto_pair_target_pool bots are waiting
+    auto_pair_target_pool: int = 2  # more waiting bots shorten the interval proportionally
+    auto_pair_min_interval: float = 1.0
+    auto_pair_max_interval: float = 30.0
+    auto_pair_max_duty_cycle: float = 0.1  # longest fraction of time scheduled runs may take
+    scheduler_lease_ttl: float = 15.0  # seconds a worker keeps the scheduler lease without renewing
+    pairing_max_wait: float = 30.0  # wait_time strategy: seconds after which a bot takes any partner
+    pairing_min_compatibility: float = 0.5  # wait_time strategy: compatibility a newly waiting bot requires
+    pair_repeat_window: float = 3600.0  # seconds during which strategies avoid re-pairing the same bots, 0 disables
+    pair_max_lifetime: float = 0.0  # default seconds before a pair is terminated, 0 disables
+    pair_strategy_lifetimes: Dict[str, float] = {}  # per-strategy overrides of pair_max_lifetime
+    pair_idle_timeout: float = 0.0  # default seconds without a pair_message before termination, 0 disables
+    pair_expiry_tick: float = 1.0  # resolution of pair expiry in seconds
+    pair_activity_flush_interval: float = 5.0  # seconds between writes of pair activity, keep well below idle timeouts
+    outbox_batch_size: int = 100  # notification events delivered per outbox batch
+    outbox_poll_interval: float = 1.0  # seconds between outbox polls when not woken by a commit
+    outbox_max_attempts: int = 5  # deliveries tried before an event is left for inspection
+    outbox_retry_backoff: float = 0.5  # first retry delay in seconds, doubled per attempt
+    outbox_claim_timeout: float = 30.0  # seconds before events claimed by a dead dispatcher are retried
+    outbox_retention: float = 3600.0  # seconds delivered events are kept
     
     # Monitoring
     metrics_enabled: bool = True
     metrics_port: int = 9090
+    health_probe_interval: float = 5.0  # seconds between cached dependency health checks
+    event_log_size: int = 10000  # monitor events kept for resume-on-reconnect
+    loop_lag_interval: float = 0.25  # seconds between event loop lag samples
+    loop_stall_threshold: float = 0.1  # lag in seconds that counts as a stall and captures a stack
+    ops_enabled: bool = False  # mount the /ops profiling endpoints
+    ops_token: str = ""  # required in X-Ops-Token for /ops requests
     
     # API settings
     api_prefix: str = "/api/v1"
-    max_connections_per_ip: int = 100
+    validate_list_responses: bool = False  # re-validate list endpoint rows against their response models
+    export_batch_size: int = 1000  # rows read per query by the NDJSON export endpoints
+    response_cache_ttl: float = 1.0  # seconds hot read responses are shared, 0 disables
+    response_cache_max_entries: int = 256
+    max_connections_per_ip: int = 1000  # concurrent WebSocket connections per client IP, 0 disables
+    trust_forwarded_for: bool = False  # take the client IP from X-Forwarded-For behind a proxy
+    
+    # Rate limiting
+    rate_limit_enabled: bool = False  # opt in; clients behind one NAT or proxy share an IP
+    rate_limit_backend: str = "memory"  # "memory" per worker, or "redis" shared through redis_url
+    rate_limit_rate: float = 100.0  # request tokens per second per client IP, 0 disables
+    rate_limit_burst: int = 200
+    rate_limit_route_costs: Dict[str, float] = {
+        "POST /api/pairs/auto": 20.0,
+        "POST /api/pairs": 2.0,
+        "POST /api/pairs/terminate": 10.0,
+        "POST /api/groups/auto": 20.0,
+        "GET /api/export/bots": 10.0,
+        "GET /api/export/pairs": 10.0,
+    }
+    rate_limit_max_keys: int = 100000  # client IPs kept in memory, least recently seen dropped first
+    rate_limit_evict_interval: float = 60.0  # seconds between sweeps of idle client IPs
+    
+    # Admission control
+    admission_enabled: bool = True
+    admission_max_in_flight: int = 200  # normal-priority requests are shed above this
+    admission_low_priority_limit: int = 8  # concurrent list/status/auto-pair requests, keep below pool size
+    admission_queue_timeout: float = 0.5  # seconds a low-priority request may wait for a slot
+    admission_max_loop_lag: float = 0.25  # shed low-priority requests while loop lag exceeds this
+    admission_retry_after: int = 1  # Retry-After seconds on shed responses
     
     # WebSocket settings
     ws_heartbeat_interval: int = 30
     ws_message_max_size: int = 1024
+    ws_message_rate: float = 20.0  # frames per second per connection (per bot on /ws/mux), 0 disables
+    ws_message_burst: int = 40
+    ws_idle_heartbeats: int = 2  # close after this many silent heartbeat intervals, 0 disables
+    
+    # Presence settings
+    presence_flush_interval: float = 5.0  # seconds between batched heartbeat writes
+    presence_grace_period: float = 15.0  # seconds a disconnected bot stays online
+    
+    @validator('rate_limit_backend')
+    def validate_rate_limit_backend(cls, v):
+        """Validate rate limit backend."""
+        if v not in ('memory', 'redis'):
+            raise ValueError("Rate limit backend must be 'memory' or 'redis'")
+        return v
     
     @validator('log_level')
     def validate_log_level(cls, v):
@@ -0,0 +1,53 @@
+"""
+Sequenced event log for the monitoring feed.
+
+Every bot and pair event published to monitors gets a monotonic sequence
+number and is kept in a bounded ring buffer, so a reconnecting monitor can
+ask for everything after its ``last_seq`` instead of reloading all state.
+"""
+
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Deque, List, Optional
+from uuid import uuid4
+
+from src.config.settings import get_settings
+
+
+class EventLog:
+    """Bounded, sequenced log of monitor events."""
+
+    def __init__(self, capacity: int):
+        # Sequence numbers restart with the process; the epoch tells clients when that happened
+        self.epoch = uuid4().hex
+        self.seq = 0
+        self.events: Deque[dict] = deque(maxlen=capacity)
+
+    def append(self, event: dict) -> dict:
+        """Tag an event with the next sequence number and store it."""
+        self.seq += 1
+        event = {**event, "seq": self.seq, "timestamp": event.get("timestamp") or datetime.utcnow().isoformat()}
+        self.events.append(event)
+        return event
+
+    def since(self, last_seq: int, epoch: Optional[str] = None) -> Optional[List[dict]]:
+        """Events after ``last_seq``, or None if they are no longer all buffered."""
+        if epoch is not None and epoch != self.epoch:
+            return None
+        if last_seq > self.seq or last_seq < 0:
+            return None
+        if last_seq == self.seq:
+            return []
+
+        oldest = self.events[0]["seq"] if self.events else self.seq + 1
+        if last_seq + 1 < oldest:
+            return None
+
+        return list(islice(self.events, last_seq + 1 - oldest, None))
+
+
+settings = get_settings()
+
+# Global event log
+event_log = EventLog(settings.event_log_size)
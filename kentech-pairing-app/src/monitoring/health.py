@@ -1,17 +1,115 @@
 """
 Health check endpoints and monitoring.
+
+Dependency checks run in a background task every ``health_probe_interval``
+seconds; the probe endpoints only read the last result from memory, so
+frequent probing adds no database load.
 """
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import time
 from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from loguru import logger
 
-from src.config.database import get_db_session
+from src.config.database import engine
 from src.config.settings import get_settings
+from src.api.websockets import manager
+from src.api.admission import admission
+from src.monitoring.loop import loop_monitor
+from src.monitoring.metrics import TIME_TO_PAIR
+from src.pairing.expiry import pair_expiry
+from src.pairing.scheduler import auto_pair_scheduler
+from src.utils.cache import response_cache
+from src.utils.outbox import outbox
 
 health_router = APIRouter()
 
 
+class HealthChecker:
+    """Runs dependency checks on an interval and caches the results."""
+
+    def __init__(self, interval: float, timeout: float = 5.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.database: Optional[dict] = None
+        self._checked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def check_database(self) -> dict:
+        """Run ``SELECT 1`` on a pooled connection and time it."""
+        started = time.perf_counter()
+        try:
+            async with engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), self.timeout)
+            result = {"status": "healthy", "message": "Database connection successful"}
+        except Exception as e:
+            result = {"status": "unhealthy", "message": f"Database connection failed: {str(e) or type(e).__name__}"}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = datetime.utcnow().isoformat()
+        return result
+
+    async def run_checks(self):
+        """Refresh every cached check."""
+        previous = self.database
+        self.database = await self.check_database()
+        self._checked_at = time.monotonic()
+        if self.database["status"] != (previous or {}).get("status", "healthy"):
+            logger.warning(f"Database health changed: {self.database['status']} ({self.database['message']})")
+
+    @property
+    def stale(self) -> bool:
+        """Whether the cached results are missing or older than a few intervals."""
+        return self.database is None or time.monotonic() - self._checked_at > self.interval * 3 + self.timeout
+
+    @property
+    def ready(self) -> bool:
+        """Whether the service can take traffic."""
+        return not self.stale and self.database["status"] == "healthy"
+
+    async def run(self):
+        """Run checks on an interval until cancelled."""
+        while True:
+            await self.run_checks()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background check task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background check task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def pool_stats() -> dict:
+    """Connection pool usage for the engine."""
+    pool = engine.sync_engine.pool
+    stats = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+settings = get_settings()
+
+# Global health checker
+health_checker = HealthChecker(settings.health_probe_interval)
+
+
 @health_router.get("/health")
 async def health_check():
     """Basic health check endpoint."""
@@ -24,8 +122,8 @@ async def health_check():
 
 
 @health_router.get("/health/detailed")
-async def detailed_health_check(db: AsyncSession = Depends(get_db_session)):
-    """Detailed health check with database connectivity."""
+async def detailed_health_check():
+    """Detailed health check from the cached dependency checks."""
     health_status = {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
@@ -35,18 +133,45 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db_session)):
     }
     
     # Check database connectivity
-    try:
-        await db.execute("SELECT 1")
-        health_status["checks"]["database"] = {
-            "status": "healthy",
-            "message": "Database connection successful"
-        }
-    except Exception as e:
+    if health_checker.database is None:
         health_status["status"] = "unhealthy"
         health_status["checks"]["database"] = {
             "status": "unhealthy",
-            "message": f"Database connection failed: {str(e)}"
+            "message": "Database has not been checked yet"
         }
+    else:
+        health_status["checks"]["database"] = {**health_checker.database, "stale": health_checker.stale}
+        if not health_checker.ready:
+            health_status["status"] = "unhealthy"
+    health_status["checks"]["database"]["pool"] = pool_stats()
+    
+    # Check event loop responsiveness
+    loop_stats = loop_monitor.stats()
+    loop_stats["status"] = "degraded" if loop_monitor.last_lag >= loop_monitor.threshold else "healthy"
+    health_status["checks"]["event_loop"] = loop_stats
+    
+    # WebSocket connections
+    health_status["checks"]["websockets"] = manager.connection_counts()
+    
+    # Admission control
+    health_status["checks"]["admission"] = admission.stats()
+    
+    # Pair expiry timers
+    health_status["checks"]["pair_expiry"] = pair_expiry.stats()
+    
+    # Auto-pair scheduler
+    health_status["checks"]["scheduler"] = auto_pair_scheduler.stats()
+    
+    # Time from going online to being paired, per strategy
+    health_status["checks"]["time_to_pair"] = {
+        strategy: summary for (strategy,), summary in TIME_TO_PAIR.quantiles(0.5, 0.99).items()
+    }
+    
+    # Hot read response cache
+    health_status["checks"]["response_cache"] = response_cache.stats()
+    
+    # Notification outbox
+    health_status["checks"]["outbox"] = outbox.stats()
     
     # Check configuration
     try:
@@ -67,14 +192,14 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db_session)):
 
 
 @health_router.get("/health/ready")
-async def readiness_check(db: AsyncSession = Depends(get_db_session)):
+async def readiness_check():
     """Kubernetes readiness probe endpoint."""
-    try:
-        # Check if we can query the database
-        await db.execute("SELECT 1")
+    if health_checker.ready:
         return {"status": "ready"}
-    except Exception:
-        return {"status": "not ready"}, 503
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "not ready", "database": health_checker.database}
+    )
 
 
 @health_router.get("/health/live")
@@ -0,0 +1,144 @@
+"""
+Event loop lag monitor.
+
+A task on the loop sleeps for a fixed interval and records how late it
+wakes up; that delay is time the loop spent running something else. A
+watchdog thread checks the task's last tick, and when the loop has been
+stuck for longer than ``loop_stall_threshold`` it captures the loop
+thread's stack, which points at the blocking code while it is still
+running. Both sides do a timestamp comparison per tick, so the monitor is
+cheap enough to leave on.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Deque, Optional
+
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.monitoring.metrics import LOOP_LAG, LOOP_STALLS
+
+
+class LoopStall:
+    """A loop stall and the stack that was running during it."""
+
+    __slots__ = ("started_at", "duration", "stack")
+
+    def __init__(self, started_at: float, duration: float, stack: str):
+        self.started_at = started_at
+        self.duration = duration
+        self.stack = stack
+
+    def to_dict(self) -> dict:
+        """Serialize the stall for API responses."""
+        return {
+            "started_at": datetime.utcfromtimestamp(self.started_at).isoformat(),
+            "duration_ms": round(self.duration * 1000, 1),
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """Measures event loop scheduling lag and captures stacks of stalls."""
+
+    def __init__(self, interval: float, threshold: float, history: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self.stalls: Deque[LoopStall] = deque(maxlen=history)
+        self._last_tick = time.monotonic()
+        self._pending_stall: Optional[LoopStall] = None  # captured by the watchdog, not yet over
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    async def run(self):
+        """Measure lag on an interval until cancelled."""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            self._record(max(0.0, now - expected))
+
+    def _record(self, lag: float):
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG.observe(lag)
+
+        stall, self._pending_stall = self._pending_stall, None
+        if lag < self.threshold:
+            return
+
+        self.stall_count += 1
+        LOOP_STALLS.inc()
+        if stall is not None:
+            stall.duration = lag
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms in:\n{stall.stack}")
+        else:
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms")
+
+    def _watch(self):
+        # Wake often enough to catch the stall while the blocking code is still on the stack
+        poll = max(self.threshold / 2, 0.01)
+        while not self._stopping.wait(poll):
+            stalled_for = time.monotonic() - self._last_tick - self.interval
+            if stalled_for < self.threshold or self._pending_stall is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stall = LoopStall(time.time() - stalled_for, stalled_for, "".join(traceback.format_stack(frame, limit=20)))
+            self._pending_stall = stall
+            self.stalls.append(stall)
+
+    def stats(self) -> dict:
+        """Summarize lag since startup."""
+        return {
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "stall_threshold_ms": round(self.threshold * 1000, 1),
+            "stalls": self.stall_count,
+            "recent_stalls": [stall.to_dict() for stall in self.stalls],
+        }
+
+    def start(self):
+        """Start the lag task and the watchdog thread."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.create_task(self.run())
+        self._stopping.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        """Stop the lag task and the watchdog thread."""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+
+settings = get_settings()
+
+# Global loop monitor
+loop_monitor = LoopMonitor(settings.loop_lag_interval, settings.loop_stall_threshold)
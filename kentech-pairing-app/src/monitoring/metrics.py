@@ -0,0 +1,361 @@
+"""
+Prometheus metrics for the Kentech Bot Pairing Application.
+
+Metrics are plain in-process counters updated from the event loop, so
+recording a sample is a cached label lookup plus an addition. They are
+rendered in the Prometheus text format by a small listener on
+``metrics_port``, separate from the API server.
+"""
+
+import asyncio
+import inspect
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from loguru import logger
+
+LabelValues = Tuple[str, ...]
+SampleFunction = Callable[[], Union[Dict[LabelValues, float], Awaitable[Dict[LabelValues, float]]]]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label(value) -> str:
+    """Escape a label value as the text exposition format requires."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Value:
+    """Single counter or gauge sample."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramValue:
+    """Bucketed observations for one label set."""
+
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile by interpolating within its bucket, like ``histogram_quantile``."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.upper_bounds, self.counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        # In the +Inf bucket: the highest finite bound is the best estimate
+        return self.upper_bounds[-1]
+
+
+class Metric:
+    """Base class for a named metric family with optional labels."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._function: Optional[SampleFunction] = None
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values: str):
+        """Get the child for a label set, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def set_function(self, function: SampleFunction):
+        """Compute samples at scrape time instead of recording them."""
+        self._function = function
+
+    def _new_child(self):
+        return _Value()
+
+    def _format_labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    async def render(self) -> List[str]:
+        """Render the metric family in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        if self._function is not None:
+            samples = self._function()
+            if inspect.isawaitable(samples):
+                samples = await samples
+            for values, value in samples.items():
+                lines.append(f"{self.name}{self._format_labels(values)} {value}")
+        else:
+            lines.extend(self._render_children())
+        return lines
+
+    def _render_children(self) -> List[str]:
+        return [
+            f"{self.name}{self._format_labels(values)} {child.value}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0):
+        """Increment the unlabelled counter."""
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def set(self, value: float):
+        """Set the unlabelled gauge."""
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    """Distribution of observations in fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS, registry=None):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float):
+        """Observe a value on the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def quantiles(self, *qs: float) -> Dict[LabelValues, Dict[str, Optional[float]]]:
+        """Estimated quantiles and sample count per label set."""
+        summary = {}
+        for values, child in list(self._children.items()):
+            estimates = {f"p{round(q * 100):g}": child.quantile(q) for q in qs}
+            summary[values] = {**estimates, "count": child.count}
+        return summary
+
+    def _render_children(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds, child.counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{self._format_labels(values, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._format_labels(values, le)} {child.count}")
+            lines.append(f"{self.name}_sum{self._format_labels(values)} {child.sum}")
+            lines.append(f"{self.name}_count{self._format_labels(values)} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families exposed together."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        """Add a metric family to the registry."""
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+
+    async def render(self) -> str:
+        """Render every metric family."""
+        lines: List[str] = []
+        for metric in list(self.metrics.values()):
+            try:
+                lines.extend(await metric.render())
+            except Exception as e:
+                logger.error(f"Failed to collect metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# HTTP
+HTTP_REQUESTS = Counter(
+    "kentech_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "kentech_http_request_duration_seconds", "HTTP request latency by route", ["method", "route"]
+)
+
+ADMISSION_IN_FLIGHT = Gauge("kentech_http_requests_in_flight", "HTTP requests admitted and running")
+ADMISSION_SHED = Counter("kentech_http_requests_shed_total", "HTTP requests shed by admission control", ["priority"])
+RATE_LIMITED = Counter("kentech_rate_limited_total", "Requests and WebSocket handshakes rejected per client IP", ["kind"])
+
+# WebSockets
+WS_CONNECTIONS = Gauge("kentech_ws_connections", "Open WebSocket connections by kind", ["kind"])
+WS_CONNECTED_BOTS = Gauge("kentech_ws_connected_bots", "Bots attached to a WebSocket connection")
+WS_FRAMES = Counter("kentech_ws_frames_total", "WebSocket frames by direction", ["direction"])
+WS_VIOLATIONS = Counter("kentech_ws_limit_violations_total", "Inbound WebSocket limit violations", ["limit"])
+
+# Database
+DB_QUERY_DURATION = Histogram(
+    "kentech_db_query_duration_seconds", "Database statement latency by operation", ["operation"]
+)
+
+# Pairing
+PAIRING_RUN_DURATION = Histogram(
+    "kentech_pairing_run_duration_seconds", "Auto-pairing run duration by strategy", ["strategy"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+PAIRS_CREATED = Counter("kentech_pairs_created_total", "Pairs created by strategy", ["strategy"])
+GROUPS_CREATED = Counter("kentech_groups_created_total", "Bot groups created by size", ["size"])
+AUTO_PAIR_JOBS = Counter("kentech_auto_pair_jobs_total", "Background auto-pair jobs by event", ["event"])
+TIME_TO_PAIR = Histogram(
+    "kentech_time_to_pair_seconds", "Time bots waited online before being paired, by strategy", ["strategy"],
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+)
+SCHEDULER_LEADER = Gauge("kentech_scheduler_leader", "Whether this worker holds the auto-pair scheduler lease")
+SCHEDULER_INTERVAL = Gauge("kentech_scheduler_next_run_seconds", "Delay chosen before the next scheduled auto-pair run")
+OUTBOX_EVENTS = Counter("kentech_outbox_events_total", "Outbox event deliveries by outcome", ["outcome"])
+OUTBOX_DELIVERY_LAG = Histogram(
+    "kentech_outbox_delivery_lag_seconds", "Time from committing an outbox event to delivering it",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+# Event loop
+LOOP_LAG = Histogram(
+    "kentech_event_loop_lag_seconds", "Event loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = Counter("kentech_event_loop_stalls_total", "Event loop stalls over the stall threshold")
+
+# Bots
+BOTS_BY_STATUS = Gauge("kentech_bots", "Registered bots by status", ["status"])
+
+
+def route_template(scope) -> str:
+    """Matched route template for a request, including any router prefix."""
+    # Newer FastAPI releases keep the unprefixed route in scope["route"]
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+
+
+class MetricsServer:
+    """Minimal HTTP listener serving ``GET /metrics``."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.registry = registry
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str, port: int):
+        """Start listening; failures are logged rather than raised."""
+        try:
+            self._server = await asyncio.start_server(self._handle, host, port)
+            logger.info(f"Metrics available at http://{host}:{port}/metrics")
+        except OSError as e:
+            logger.error(f"Failed to start metrics server on {host}:{port}: {e}")
+
+    async def stop(self):
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Drain headers
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                body = (await self.registry.render()).encode()
+                status_line = "200 OK"
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body = b"Not Found\n"
+                status_line = "404 Not Found"
+                content_type = "text/plain"
+
+            writer.write(
+                f"HTTP/1.1 {status_line}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+
+# Global metrics server
+metrics_server = MetricsServer()
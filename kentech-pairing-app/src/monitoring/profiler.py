@@ -0,0 +1,123 @@
+"""
+On-demand sampling profiler and allocation snapshots.
+
+The profiler samples every thread's stack from a separate thread with
+``sys._current_frames()`` and aggregates them into collapsed stacks, one
+``frame;frame;frame count`` line per unique stack, which flamegraph.pl,
+speedscope and similar tools read directly. Nothing is installed on the
+profiled threads, so overhead is bounded by the sampling rate.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile or snapshot is already running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = os.path.relpath(filename, _APP_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler producing collapsed stacks."""
+
+    def __init__(self, max_depth: int = 64):
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        """Whether a profile or snapshot is currently running."""
+        return self._lock.locked()
+
+    def _sample(self, duration: float, interval: float, stacks: Counter) -> int:
+        sampler_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + duration
+        samples = 0
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id:
+                    continue
+                labels: List[str] = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        return samples
+
+    async def profile(self, duration: float, interval: float = 0.005) -> str:
+        """Sample all threads for ``duration`` seconds and return collapsed stacks."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        try:
+            stacks: Counter = Counter()
+            # Sampling runs on a worker thread so the loop keeps serving other clients
+            await asyncio.to_thread(self._sample, duration, interval, stacks)
+            return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        finally:
+            self._lock.release()
+
+    async def allocations(self, duration: float, top: int = 20, frames: int = 10) -> Dict:
+        """Trace allocations for ``duration`` seconds and report the top ``top`` sites."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        started_here = not tracemalloc.is_tracing()
+        try:
+            if started_here:
+                tracemalloc.start(frames)
+            await asyncio.sleep(duration)
+            # Snapshots walk every traced block, so keep them off the event loop
+            snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            # Tracing slows every allocation, so only keep it on for the requested window
+            if started_here:
+                tracemalloc.stop()
+            self._lock.release()
+
+        return await asyncio.to_thread(self._summarize, snapshot, current, peak, top)
+
+    def _summarize(self, snapshot: tracemalloc.Snapshot, current: int, peak: int, top: int) -> Dict:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        stats = snapshot.statistics("traceback")
+        return {
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [
+                {
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                    "traceback": stat.traceback.format(),
+                }
+                for stat in stats[:top]
+            ],
+        }
+
+
+# Global profiler
+profiler = SamplingProfiler()
@@ -0,0 +1,151 @@
+"""
+Per-request SQL instrumentation.
+
+Engine event hooks attribute every statement to the work currently being
+tracked through a context variable, so each HTTP response can report how
+many queries it ran and how long they took in a ``Server-Timing`` header.
+Statements slower than ``slow_query_threshold`` are logged with the shape
+of their bound parameters, never their values.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from loguru import logger
+from sqlalchemy import event
+
+from src.monitoring.metrics import DB_QUERY_DURATION
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+class QueryStats:
+    """Statement count and database time for one unit of work."""
+
+    __slots__ = ("count", "duration", "statements", "parent")
+
+    def __init__(self, record_statements: bool = False, parent: Optional["QueryStats"] = None):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Optional[List[str]] = [] if record_statements else None
+        self.parent = parent
+
+    def record(self, statement: str, elapsed: float):
+        """Add a statement to these stats and every enclosing tracker."""
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+            if stats.statements is not None:
+                stats.statements.append(statement)
+            stats = stats.parent
+
+    def server_timing(self) -> str:
+        """Format the stats as a ``Server-Timing`` metric."""
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats for the work currently being tracked, if any."""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(record_statements: bool = False) -> Iterator[QueryStats]:
+    """Count the statements run inside the block, including nested trackers."""
+    stats = QueryStats(record_statements, parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail if the block runs more than ``limit`` statements."""
+    with track_queries(record_statements=True) as stats:
+        yield stats
+    if stats.count > limit:
+        statements = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(stats.statements, 1))
+        raise AssertionError(f"Expected at most {limit} queries, ran {stats.count}:\n{statements}")
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Describe bound parameters by name and type without their values."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def instrument_engine(engine, slow_query_threshold: float = 0.0, record_metrics: bool = True):
+    """Time every statement on an engine and attribute it to the current request."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        if record_metrics:
+            operation = statement.lstrip()[:6].upper()
+            if operation not in _OPERATIONS:
+                operation = "OTHER"
+            DB_QUERY_DURATION.labels(operation).observe(elapsed)
+
+        if slow_query_threshold and elapsed >= slow_query_threshold:
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())} "
+                f"params={parameter_shape(parameters, executemany)}"
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        # so the next statement on this connection is not timed against it
+        conn = context.connection
+        if conn is None or not conn.info.get("query_start_time") or context.statement is None:
+            return
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(context.statement, elapsed)
+
+
+class QueryTimingMiddleware:
+    """ASGI middleware adding per-request database ``Server-Timing``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -1,5 +1,6 @@
 """Pairing package initialization."""
 
 from .core import pairing_core
+from .routing import pair_routes
 
-__all__ = ["pairing_core"]
+__all__ = ["pairing_core", "pair_routes"]
@@ -3,19 +3,46 @@ Pairing algorithms for bot matching.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import heapq
 import random
 
 from src.bots.models import Bot
+from src.pairing.history import RecentPairs
 
 
 class PairingAlgorithm(ABC):
     """Abstract base class for pairing algorithms."""
     
+    # Pairs formed recently, to avoid repeating; set by the pairing core
+    recent_pairs: Optional[RecentPairs] = None
+    
     @abstractmethod
     def pair_bots(self, bots: List[Bot]) -> List[Tuple[Bot, Bot]]:
         """Pair bots based on the algorithm logic."""
         pass
+    
+    def is_repeat(self, bot1: Bot, bot2: Bot) -> bool:
+        """Whether the two bots were paired within the recent pairs window."""
+        return self.recent_pairs is not None and self.recent_pairs.contains(bot1.id, bot2.id)
+    
+    def pair_in_order(self, bots: List[Bot]) -> List[Tuple[Bot, Bot]]:
+        """Pair bots in list order, skipping partners they were recently paired with.
+        
+        Without repeats this pairs neighbours; a bot whose only partners are
+        repeats stays unpaired.
+        """
+        pairs = []
+        waiting: List[Bot] = []
+        for bot in bots:
+            for index, partner in enumerate(waiting):
+                if not self.is_repeat(partner, bot):
+                    pairs.append((waiting.pop(index), bot))
+                    break
+            else:
+                waiting.append(bot)
+        return pairs
 
 
 class DefaultPairingAlgorithm(PairingAlgorithm):
@@ -30,11 +57,7 @@ class DefaultPairingAlgorithm(PairingAlgorithm):
         shuffled_bots = bots.copy()
         random.shuffle(shuffled_bots)
         
-        pairs = []
-        for i in range(0, len(shuffled_bots) - 1, 2):
-            pairs.append((shuffled_bots[i], shuffled_bots[i + 1]))
-        
-        return pairs
+        return self.pair_in_order(shuffled_bots)
 
 
 class CapabilityBasedPairingAlgorithm(PairingAlgorithm):
@@ -60,7 +83,7 @@ class CapabilityBasedPairingAlgorithm(PairingAlgorithm):
             best_score = -1
             
             for j, bot2 in enumerate(sorted_bots[i + 1:], i + 1):
-                if bot2.id in used_bots:
+                if bot2.id in used_bots or self.is_repeat(bot1, bot2):
                     continue
                 
                 score = self._calculate_compatibility(bot1, bot2)
@@ -113,18 +136,109 @@ class TypeBasedPairingAlgorithm(PairingAlgorithm):
                 bots1 = [b for b in bot_types[type1] if b.id not in used_bots]
                 bots2 = [b for b in bot_types[type2] if b.id not in used_bots]
                 
-                min_pairs = min(len(bots1), len(bots2))
-                for j in range(min_pairs):
-                    pairs.append((bots1[j], bots2[j]))
-                    used_bots.add(bots1[j].id)
-                    used_bots.add(bots2[j].id)
+                for bot1 in bots1:
+                    partner = next((b for b in bots2 if not self.is_repeat(bot1, b)), None)
+                    if partner is None:
+                        continue
+                    bots2.remove(partner)
+                    pairs.append((bot1, partner))
+                    used_bots.add(bot1.id)
+                    used_bots.add(partner.id)
         
         # Pair remaining bots of same type
         for bot_type, type_bots in bot_types.items():
             available_bots = [b for b in type_bots if b.id not in used_bots]
-            for i in range(0, len(available_bots) - 1, 2):
-                pairs.append((available_bots[i], available_bots[i + 1]))
-                used_bots.add(available_bots[i].id)
-                used_bots.add(available_bots[i + 1].id)
+            for bot1, bot2 in self.pair_in_order(available_bots):
+                pairs.append((bot1, bot2))
+                used_bots.add(bot1.id)
+                used_bots.add(bot2.id)
         
         return pairs
+
+
+def capability_complementarity(bot1: Bot, bot2: Bot) -> float:
+    """Score in [0, 1] for how little two bots' capabilities overlap."""
+    caps1 = {cap for cap in (bot1.capabilities or "").split(",") if cap}
+    caps2 = {cap for cap in (bot2.capabilities or "").split(",") if cap}
+    union = caps1 | caps2
+    return 1 - len(caps1 & caps2) / len(union) if union else 0.0
+
+
+def type_complementarity(bot1: Bot, bot2: Bot) -> float:
+    """1 for bots of differing types, 0 for the same type."""
+    return 1.0 if bot1.bot_type != bot2.bot_type else 0.0
+
+
+def complementarity(bot1: Bot, bot2: Bot) -> float:
+    """Score in [0, 1] for how well two bots complement each other.
+    
+    Half for differing types, half for how little their capabilities overlap.
+    """
+    return (capability_complementarity(bot1, bot2) + type_complementarity(bot1, bot2)) / 2
+
+
+class WaitTimePairingAlgorithm(PairingAlgorithm):
+    """Pair the longest-waiting bots first, trading match quality for wait time.
+    
+    Bots come off a heap ordered by ``available_since``; since every bot ages
+    at the same rate this is also the order of their wait times. Each is
+    offered the best of the next ``window`` waiting bots, scored by
+    ``compatibility`` plus the partner's wait as a fraction of ``max_wait``.
+    A match is accepted if its compatibility reaches ``min_compatibility``
+    scaled down linearly by the bot's own wait, so fresh bots hold out for a
+    good partner and a bot that has waited ``max_wait`` takes any partner.
+    A recent repeat scores zero compatibility, so only such bots accept one.
+    Time to pair is therefore bounded by ``max_wait`` plus one run interval
+    whenever another bot is waiting.
+    """
+    
+    def __init__(
+        self,
+        max_wait: float = 30.0,
+        min_compatibility: float = 0.5,
+        window: int = 32,
+        compatibility: Callable[[Bot, Bot], float] = complementarity
+    ):
+        self.max_wait = max_wait
+        self.min_compatibility = min_compatibility
+        self.window = window
+        self.compatibility = compatibility
+    
+    def pair_bots(self, bots: List[Bot], now: Optional[datetime] = None) -> List[Tuple[Bot, Bot]]:
+        """Pair bots oldest first, each with its best partner among the next waiting bots."""
+        if len(bots) < 2:
+            return []
+        
+        now = now or datetime.utcnow()
+        # Bots without a recorded wait count as having just arrived
+        heap = [(bot.available_since or now, index, bot) for index, bot in enumerate(bots)]
+        heapq.heapify(heap)
+        
+        pairs = []
+        while len(heap) >= 2:
+            _, _, bot = heapq.heappop(heap)
+            candidates = [heapq.heappop(heap) for _ in range(min(self.window, len(heap)))]
+            
+            required = self.min_compatibility * max(0.0, 1 - self._wait(bot, now) / self.max_wait)
+            best, best_score = None, -1.0
+            for position, (_, _, partner) in enumerate(candidates):
+                # Repeats are only taken by bots that have waited long enough to take anyone
+                compatibility = 0.0 if self.is_repeat(bot, partner) else self.compatibility(bot, partner)
+                if compatibility < required:
+                    continue
+                score = compatibility + self._wait(partner, now) / self.max_wait
+                if score > best_score:
+                    best, best_score = position, score
+            
+            if best is not None:
+                pairs.append((bot, candidates.pop(best)[2]))
+            for entry in candidates:
+                heapq.heappush(heap, entry)
+        
+        return pairs
+    
+    @staticmethod
+    def _wait(bot: Bot, now: datetime) -> float:
+        if bot.available_since is None:
+            return 0.0
+        return max((now - bot.available_since).total_seconds(), 0.0)
@@ -2,26 +2,53 @@
 Core pairing logic for the Kentech Bot Pairing Application.
 """
 
-from datetime import datetime
-from typing import List, Optional, Tuple
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+from uuid import uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import or_, select, update
 from loguru import logger
 
-from src.bots.models import Bot, BotPair, BotStatus, PairStatus, BotPairCreate
+from src.bots.models import (
+    Bot, BotPair, BotStatus, PairStatus, BotPairCreate, BotPairSummary, BotResponse, status_values
+)
 from src.bots.manager import bot_manager
-from src.pairing.algorithms import PairingAlgorithm, DefaultPairingAlgorithm
-from src.pairing.strategies import PairingStrategy, get_strategy
+from src.bots.presence import presence
+from src.pairing.algorithms import WaitTimePairingAlgorithm
+from src.pairing.groups import group_manager
+from src.pairing.history import recent_pairs
+from src.pairing.strategies import PairingStrategy, get_available_strategies, get_strategy
+from src.pairing.routing import pair_routes
+from src.pairing.expiry import pair_expiry
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+from src.monitoring.metrics import PAIRING_RUN_DURATION, PAIRS_CREATED, TIME_TO_PAIR
+from src.utils.outbox import outbox, outbox_event
+from src.utils.version import state_version
+
+
+TERMINATE_BATCH_SIZE = 500
+RECENT_PAIRS_OVERLAP = timedelta(seconds=60)
 
 
 class PairingCore:
     """Core pairing functionality."""
     
     def __init__(self):
+        settings = get_settings()
         self.active_pairs = {}
-        self.algorithms = {
-            "default": DefaultPairingAlgorithm(),
-        }
+        self.algorithms = {name: get_strategy(name) for name in get_available_strategies()}
+        self.algorithms[PairingStrategy.WAIT_TIME] = WaitTimePairingAlgorithm(
+            settings.pairing_max_wait, settings.pairing_min_compatibility
+        )
+        for algorithm in self.algorithms.values():
+            algorithm.recent_pairs = recent_pairs
+        # One auto-pairing run at a time, whatever its strategy or caller
+        self.run_lock = asyncio.Lock()
+        # Creation time up to which recent_pairs has seen every worker's pairs
+        self.recent_pairs_loaded_at: Optional[datetime] = None
     
     async def create_pair(self, pair_data: BotPairCreate, db: AsyncSession) -> Optional[BotPair]:
         """Create a new bot pair."""
@@ -39,23 +66,60 @@ class PairingCore:
                 return None
             
             # Create the pair
+            created_at = datetime.utcnow()
+            lifetime, idle_timeout = self.expiry_for(pair_data)
             pair = BotPair(
+                id=str(uuid4()),
                 primary_bot_id=pair_data.primary_bot_id,
                 secondary_bot_id=pair_data.secondary_bot_id,
                 pairing_strategy=pair_data.pairing_strategy,
-                status=PairStatus.ACTIVE
+                status=PairStatus.ACTIVE,
+                created_at=created_at,
+                expires_at=created_at + timedelta(seconds=lifetime) if lifetime else None,
+                idle_timeout=idle_timeout
             )
             
             db.add(pair)
             
-            # Update bot statuses
-            await bot_manager.update_bot_status(pair_data.primary_bot_id, BotStatus.PAIRED, db)
-            await bot_manager.update_bot_status(pair_data.secondary_bot_id, BotStatus.PAIRED, db)
+            # Read before the status updates below clear it on the loaded bots
+            available_since = [
+                bot.available_since for bot in (primary_bot, secondary_bot) if bot.available_since is not None
+            ]
+            
+            # Claim both bots only if they are still online: the status read above
+            # comes from the identity map and a concurrent run may have paired them
+            result = await db.execute(
+                update(Bot)
+                .where(
+                    Bot.id.in_([pair_data.primary_bot_id, pair_data.secondary_bot_id]),
+                    Bot.status == BotStatus.ONLINE
+                )
+                .values(**status_values(BotStatus.PAIRED, created_at))
+            )
+            if result.rowcount != 2:
+                raise RuntimeError("bots changed status while being paired")
+            
+            # Record the notification in the same transaction
+            db.add(outbox_event("pair_created", {
+                "pair_id": pair.id,
+                "primary_bot_id": pair.primary_bot_id,
+                "secondary_bot_id": pair.secondary_bot_id
+            }))
             
+            await state_version.bump(db, "bots", "pairs")
             await db.commit()
+            outbox.wake()
             await db.refresh(pair)
             
             self.active_pairs[pair.id] = pair
+            pair_routes.add_pair(pair.id, pair.primary_bot_id, pair.secondary_bot_id)
+            pair_expiry.track(pair.id, pair.expires_at, pair.idle_timeout)
+            recent_pairs.add(pair.primary_bot_id, pair.secondary_bot_id)
+            PAIRS_CREATED.labels(pair.pairing_strategy).inc()
+            for waiting_since in available_since:
+                TIME_TO_PAIR.labels(pair.pairing_strategy).observe(
+                    (pair.created_at - waiting_since).total_seconds()
+                )
             logger.info(f"Bot pair created: {pair.id}")
             
             return pair
@@ -65,6 +129,18 @@ class PairingCore:
             await db.rollback()
             return None
     
+    @staticmethod
+    def expiry_for(pair_data: BotPairCreate) -> Tuple[Optional[float], Optional[float]]:
+        """Maximum lifetime and idle timeout for a new pair, falling back to the configured defaults."""
+        settings = get_settings()
+        lifetime = (
+            pair_data.max_lifetime
+            or settings.pair_strategy_lifetimes.get(pair_data.pairing_strategy)
+            or settings.pair_max_lifetime
+        )
+        idle_timeout = pair_data.idle_timeout or settings.pair_idle_timeout
+        return lifetime or None, idle_timeout or None
+    
     async def get_pair(self, pair_id: str, db: AsyncSession) -> Optional[BotPair]:
         """Get a bot pair by ID."""
         try:
@@ -97,57 +173,270 @@ class PairingCore:
             logger.error(f"Failed to get active pairs: {e}")
             return []
     
-    async def terminate_pair(self, pair_id: str, db: AsyncSession) -> bool:
-        """Terminate a bot pair."""
+    async def get_pair_rows(self, db: AsyncSession, status: Optional[PairStatus] = None) -> List[dict]:
+        """Get pairs with their bots as nested column dicts in a single query."""
         try:
-            pair = await self.get_pair(pair_id, db)
-            if not pair:
-                return False
-            
-            # Update pair status
-            await db.execute(
-                update(BotPair)
-                .where(BotPair.id == pair_id)
-                .values(
-                    status=PairStatus.TERMINATED,
-                    terminated_at=datetime.utcnow()
-                )
+            pairs = BotPair.__table__
+            primary = Bot.__table__.alias("primary_bot")
+            secondary = Bot.__table__.alias("secondary_bot")
+            # Only the response fields, so internal columns never reach clients
+            pair_columns = [pairs.c[name] for name in BotPairSummary.model_fields]
+            primary_columns = [primary.c[name] for name in BotResponse.model_fields]
+            secondary_columns = [secondary.c[name] for name in BotResponse.model_fields]
+            query = (
+                select(*pair_columns, *primary_columns, *secondary_columns)
+                .join_from(pairs, primary, pairs.c.primary_bot_id == primary.c.id)
+                .join(secondary, pairs.c.secondary_bot_id == secondary.c.id)
             )
+            if status is not None:
+                query = query.where(pairs.c.status == status)
             
-            # Update bot statuses back to online
-            await bot_manager.update_bot_status(pair.primary_bot_id, BotStatus.ONLINE, db)
-            await bot_manager.update_bot_status(pair.secondary_bot_id, BotStatus.ONLINE, db)
+            result = await db.execute(query)
+            pair_keys = tuple(column.key for column in pair_columns)
+            bot_keys = tuple(column.key for column in primary_columns)
+            split = len(pair_keys)
+            rows = []
+            for row in result:
+                pair = dict(zip(pair_keys, row[:split]))
+                pair["primary_bot"] = dict(zip(bot_keys, row[split:split + len(bot_keys)]))
+                pair["secondary_bot"] = dict(zip(bot_keys, row[split + len(bot_keys):]))
+                rows.append(pair)
+            return rows
+        except Exception as e:
+            logger.error(f"Failed to get pair rows: {e}")
+            return []
+    
+    async def terminate_pair(self, pair_id: str, db: AsyncSession) -> bool:
+        """Terminate a bot pair, returning False if it was not active."""
+        return bool(await self.terminate_pairs([pair_id], db))
+    
+    async def find_active_pair_ids(
+        self,
+        db: AsyncSession,
+        pair_ids: Optional[List[str]] = None,
+        strategy: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        bot_type: Optional[str] = None
+    ) -> List[str]:
+        """IDs of active pairs matching every given filter."""
+        query = select(BotPair.id).where(BotPair.status == PairStatus.ACTIVE)
+        if strategy is not None:
+            query = query.where(BotPair.pairing_strategy == strategy)
+        if created_before is not None:
+            query = query.where(BotPair.created_at < created_before)
+        if bot_type is not None:
+            typed_bots = select(Bot.id).where(Bot.bot_type == bot_type)
+            query = query.where(
+                or_(BotPair.primary_bot_id.in_(typed_bots), BotPair.secondary_bot_id.in_(typed_bots))
+            )
+        if pair_ids is None:
+            result = await db.execute(query)
+            return list(result.scalars())
+        
+        found = []
+        for start in range(0, len(pair_ids), TERMINATE_BATCH_SIZE):
+            result = await db.execute(query.where(BotPair.id.in_(pair_ids[start:start + TERMINATE_BATCH_SIZE])))
+            found.extend(result.scalars())
+        return found
+    
+    async def terminate_pairs(
+        self,
+        pair_ids: List[str],
+        db: AsyncSession,
+        reason: Optional[str] = None
+    ) -> Optional[List[Tuple[str, str, str]]]:
+        """Terminate many pairs in one transaction with set-based updates.
+        
+        Returns ``(pair_id, primary_bot_id, secondary_bot_id)`` for the pairs
+        that were still active; the others are skipped. One ``pairs_terminated``
+        outbox event carrying ``reason`` announces them all. Returns None if
+        the transaction failed and was rolled back.
+        """
+        terminated = []
+        try:
+            now = datetime.utcnow()
+            # Stay under the bound parameter limit of SQLite
+            for start in range(0, len(pair_ids), TERMINATE_BATCH_SIZE):
+                batch = pair_ids[start:start + TERMINATE_BATCH_SIZE]
+                result = await db.execute(
+                    update(BotPair)
+                    .where(BotPair.id.in_(batch), BotPair.status == PairStatus.ACTIVE)
+                    .values(status=PairStatus.TERMINATED, terminated_at=now)
+                    .returning(BotPair.id, BotPair.primary_bot_id, BotPair.secondary_bot_id)
+                    .execution_options(synchronize_session=False)
+                )
+                rows = [tuple(row) for row in result.all()]
+                bot_ids = [bot_id for _, primary, secondary in rows for bot_id in (primary, secondary)]
+                if bot_ids:
+                    await db.execute(
+                        update(Bot)
+                        .where(Bot.id.in_(bot_ids), Bot.status == BotStatus.PAIRED)
+                        .values(**status_values(BotStatus.ONLINE, now))
+                        .execution_options(synchronize_session=False)
+                    )
+                terminated.extend(rows)
             
+            if terminated:
+                db.add(outbox_event("pairs_terminated", {"pairs": terminated, "reason": reason}))
+                await state_version.bump(db, "bots", "pairs")
             await db.commit()
-            
-            if pair_id in self.active_pairs:
-                del self.active_pairs[pair_id]
-            
-            logger.info(f"Bot pair terminated: {pair_id}")
-            return True
-            
+            if terminated:
+                outbox.wake()
         except Exception as e:
-            logger.error(f"Failed to terminate pair {pair_id}: {e}")
+            logger.error(f"Failed to terminate {len(pair_ids)} pairs: {e}")
             await db.rollback()
-            return False
+            return None
+        
+        for pair_id, primary_bot_id, secondary_bot_id in terminated:
+            self.active_pairs.pop(pair_id, None)
+            pair_routes.remove_pair(pair_id, primary_bot_id, secondary_bot_id)
+            pair_expiry.untrack(pair_id)
+        
+        logger.info(f"Bulk terminated {len(terminated)} bot pairs")
+        return terminated
+    
+    async def terminate_expired(self, expired: List[Tuple[str, str]]):
+        """Terminate ``(pair_id, reason)`` pairs past their lifetime or idle timeout.
+
+        Raises if a termination fails, so the pairs left are retried.
+        """
+        reasons = dict(expired)
+        async with async_session_maker() as db:
+            for reason in set(reasons.values()):
+                pair_ids = [pair_id for pair_id, pair_reason in reasons.items() if pair_reason == reason]
+                if await self.terminate_pairs(pair_ids, db, reason) is None:
+                    raise RuntimeError(f"failed to terminate {len(pair_ids)} pairs ({reason})")
+    
+    async def terminate_offline(self, bot_ids: List[str]):
+        """Terminate the active pairs and groups of bots that went offline."""
+        async with async_session_maker() as db:
+            pair_ids = set()
+            for start in range(0, len(bot_ids), TERMINATE_BATCH_SIZE):
+                batch = bot_ids[start:start + TERMINATE_BATCH_SIZE]
+                result = await db.execute(
+                    select(BotPair.id)
+                    .where(
+                        BotPair.status == PairStatus.ACTIVE,
+                        or_(BotPair.primary_bot_id.in_(batch), BotPair.secondary_bot_id.in_(batch))
+                    )
+                )
+                pair_ids.update(result.scalars())
+            if pair_ids:
+                await self.terminate_pairs(list(pair_ids), db, "bot_offline")
+            
+            group_ids = await group_manager.find_active_group_ids(bot_ids, db)
+            if group_ids:
+                await group_manager.terminate_groups(group_ids, db, "bot_offline")
     
-    async def auto_pair_bots(self, db: AsyncSession, strategy: str = "default") -> List[BotPair]:
-        """Automatically pair available bots."""
+    async def load_routes(self, db: AsyncSession) -> int:
+        """Rebuild the relay routing table and expiry timers from active pairs."""
         try:
+            result = await db.execute(
+                select(
+                    BotPair.id, BotPair.primary_bot_id, BotPair.secondary_bot_id,
+                    BotPair.expires_at, BotPair.idle_timeout, BotPair.last_activity_at
+                )
+                .where(BotPair.status == PairStatus.ACTIVE)
+            )
+            rows = result.all()
+            pair_routes.rebuild((pair_id, primary, secondary) for pair_id, primary, secondary, *_ in rows)
+            pair_expiry.rebuild((pair_id, *expiry) for pair_id, _, _, *expiry in rows)
+            logger.info(f"Loaded {len(pair_routes)} pair routes")
+            return len(pair_routes)
+        except Exception as e:
+            logger.error(f"Failed to load pair routes: {e}")
+            return 0
+    
+    async def load_recent_pairs(self, db: AsyncSession) -> int:
+        """Rebuild the recent pairs filter from pairs created within its window."""
+        if not recent_pairs.enabled:
+            return 0
+        try:
+            loaded_at = datetime.utcnow()
+            rows = await self._recent_pair_rows(db, loaded_at - timedelta(seconds=recent_pairs.window))
+            recent_pairs.rebuild(rows)
+            self.recent_pairs_loaded_at = loaded_at
+            logger.info(f"Loaded {len(recent_pairs)} recent pairs")
+            return len(recent_pairs)
+        except Exception as e:
+            logger.error(f"Failed to load recent pairs: {e}")
+            return 0
+    
+    async def catch_up_recent_pairs(self, db: AsyncSession) -> int:
+        """Add pairs created since the last load, including other workers' pairs."""
+        if not recent_pairs.enabled:
+            return 0
+        if self.recent_pairs_loaded_at is None:
+            return await self.load_recent_pairs(db)
+        try:
+            loaded_at = datetime.utcnow()
+            # Overlap the last load to cover clock skew and commits still in flight then
+            rows = await self._recent_pair_rows(db, self.recent_pairs_loaded_at - RECENT_PAIRS_OVERLAP)
+            for row in rows:
+                recent_pairs.add(*row)
+            self.recent_pairs_loaded_at = loaded_at
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to catch up on recent pairs: {e}")
+            return 0
+    
+    async def _recent_pair_rows(self, db: AsyncSession, since: datetime) -> List[Tuple[str, str, float]]:
+        result = await db.execute(
+            select(BotPair.primary_bot_id, BotPair.secondary_bot_id, BotPair.created_at)
+            .where(BotPair.created_at >= since)
+        )
+        # Naive datetimes in this app are UTC
+        return [
+            (primary, secondary, created_at.replace(tzinfo=timezone.utc).timestamp())
+            for primary, secondary, created_at in result.all()
+        ]
+    
+    async def auto_pair_bots(
+        self,
+        db: AsyncSession,
+        strategy: str = "default",
+        progress: Optional[Callable[[int, int], Awaitable[bool]]] = None
+    ) -> List[BotPair]:
+        """Automatically pair available bots.
+        
+        ``progress`` is awaited with (bots considered, pairs committed) before
+        each pair is created; returning False stops the run between pairs.
+        Runs wait for the one in progress, so each sees the bots it left.
+        Raises if the run fails; pairs created before the failure stay created.
+        """
+        if strategy not in self.algorithms:
+            raise ValueError(f"Unknown pairing strategy: {strategy}")
+        async with self.run_lock:
+            return await self._auto_pair_bots(db, strategy, progress)
+    
+    async def _auto_pair_bots(
+        self,
+        db: AsyncSession,
+        strategy: str,
+        progress: Optional[Callable[[int, int], Awaitable[bool]]]
+    ) -> List[BotPair]:
+        started = time.perf_counter()
+        try:
+            await self.catch_up_recent_pairs(db)
             available_bots = await bot_manager.get_available_bots(db)
             
             if len(available_bots) < 2:
                 logger.info("Not enough bots available for pairing")
                 return []
             
-            algorithm = self.algorithms.get(strategy, self.algorithms["default"])
-            pairs = algorithm.pair_bots(available_bots)
+            algorithm = self.algorithms[strategy]
+            # Plain ids, since a failed create_pair rolls back and expires the loaded bots
+            pairs = [(primary.id, secondary.id) for primary, secondary in algorithm.pair_bots(available_bots)]
             
             created_pairs = []
-            for primary_bot, secondary_bot in pairs:
+            for primary_bot_id, secondary_bot_id in pairs:
+                if progress is not None and not await progress(len(available_bots), len(created_pairs)):
+                    logger.info(f"Auto-pairing stopped after {len(created_pairs)} pairs")
+                    break
+                
                 pair_data = BotPairCreate(
-                    primary_bot_id=primary_bot.id,
-                    secondary_bot_id=secondary_bot.id,
+                    primary_bot_id=primary_bot_id,
+                    secondary_bot_id=secondary_bot_id,
                     pairing_strategy=strategy
                 )
                 
@@ -160,8 +449,12 @@ class PairingCore:
             
         except Exception as e:
             logger.error(f"Failed to auto-pair bots: {e}")
-            return []
+            raise
+        finally:
+            PAIRING_RUN_DURATION.labels(strategy).observe(time.perf_counter() - started)
 
 
 # Global pairing core instance
 pairing_core = PairingCore()
+pair_expiry.on_expired = pairing_core.terminate_expired
+presence.on_offline = pairing_core.terminate_offline
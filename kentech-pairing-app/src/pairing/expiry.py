@@ -0,0 +1,238 @@
+"""
+Pair lifetime and idle expiry.
+
+Each active pair with a maximum lifetime or an idle timeout has one timer
+in a ``TimingWheel``, set to the earlier of its two deadlines. Relayed
+``pair_message`` frames only record the time in a dict; when an idle timer
+fires for a pair that has been active since, it is re-armed from the last
+activity instead. Expiring pairs therefore costs O(expired) per tick and
+O(1) per message, however many pairs are tracked.
+
+Only the worker relaying a pair's messages sees its activity, so touched
+pairs have ``BotPair.last_activity_at`` written every
+``activity_flush_interval``. Before terminating idle pairs, a worker reads
+that column and re-arms the pairs that were active elsewhere. Lifetime
+expiry needs no shared state and runs on every worker.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, select, update
+from loguru import logger
+
+from src.bots.models import BotPair
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+from src.utils.timing_wheel import TimingWheel
+
+# Pair ids per activity lookup, under the bound parameter limit of SQLite
+ACTIVITY_BATCH_SIZE = 500
+
+
+class PairDeadline:
+    """Expiry settings and last activity of one tracked pair."""
+
+    __slots__ = ("expires_at", "idle_timeout", "last_activity")
+
+    def __init__(self, expires_at: Optional[float], idle_timeout: Optional[float], last_activity: float):
+        self.expires_at = expires_at
+        self.idle_timeout = idle_timeout
+        self.last_activity = last_activity
+
+    def next_deadline(self) -> float:
+        """Earliest time the pair could expire."""
+        deadlines = []
+        if self.expires_at is not None:
+            deadlines.append(self.expires_at)
+        if self.idle_timeout is not None:
+            deadlines.append(self.last_activity + self.idle_timeout)
+        return min(deadlines)
+
+
+class PairExpiry:
+    """Tracks pair deadlines and terminates expired pairs in batches."""
+
+    def __init__(self, tick: float, activity_flush_interval: float):
+        self.tick = tick
+        self.activity_flush_interval = activity_flush_interval
+        self.wheel = TimingWheel(tick, time.time())
+        self.deadlines: Dict[str, PairDeadline] = {}  # pair_id -> deadline, until terminated
+        self._touched: Set[str] = set()  # pairs with activity since the last flush
+        self._last_flush = time.monotonic()
+        self.expired_total = 0
+        self._task: Optional[asyncio.Task] = None
+        # Called with (pair_id, reason) tuples to terminate and notify
+        self.on_expired: Optional[Callable[[List[Tuple[str, str]]], Awaitable[None]]] = None
+
+    def track(self, pair_id: str, expires_at: Optional[datetime], idle_timeout: Optional[float],
+              last_activity: Optional[datetime] = None):
+        """Start or update expiry tracking for an active pair."""
+        if expires_at is None and not idle_timeout:
+            self.untrack(pair_id)
+            return
+        deadline = PairDeadline(
+            _timestamp(expires_at) if expires_at else None,
+            idle_timeout or None,
+            _timestamp(last_activity) if last_activity else time.time()
+        )
+        self.deadlines[pair_id] = deadline
+        self.wheel.schedule(pair_id, deadline.next_deadline())
+
+    def untrack(self, pair_id: str):
+        """Stop tracking a pair that was terminated."""
+        if self.deadlines.pop(pair_id, None) is not None:
+            self.wheel.cancel(pair_id)
+        self._touched.discard(pair_id)
+
+    def touch(self, pair_id: str):
+        """Record pair activity; the idle timer is re-armed lazily when it fires."""
+        deadline = self.deadlines.get(pair_id)
+        if deadline is not None:
+            deadline.last_activity = time.time()
+            if deadline.idle_timeout is not None:
+                self._touched.add(pair_id)
+
+    def rebuild(self, pairs):
+        """Replace tracking with ``(pair_id, expires_at, idle_timeout, last_activity_at)`` rows."""
+        for pair_id in list(self.deadlines):
+            self.untrack(pair_id)
+        for pair_id, expires_at, idle_timeout, last_activity in pairs:
+            # Pairs without recorded activity count idle time from now
+            self.track(pair_id, expires_at, idle_timeout, last_activity)
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """Collect ``(pair_id, reason)`` for pairs past a deadline, re-arming active ones."""
+        now = now if now is not None else time.time()
+        expired = []
+        for pair_id in self.wheel.advance(now):
+            deadline = self.deadlines.get(pair_id)
+            if deadline is None:
+                continue
+            if deadline.expires_at is not None and deadline.expires_at <= now:
+                reason = "max_lifetime"
+            elif deadline.idle_timeout is not None and deadline.last_activity + deadline.idle_timeout <= now:
+                reason = "idle"
+            else:
+                self.wheel.schedule(pair_id, deadline.next_deadline())
+                continue
+            expired.append((pair_id, reason))
+        return expired
+
+    async def flush_activity(self):
+        """Write the last activity of pairs touched since the last flush."""
+        touched, self._touched = self._touched, set()
+        self._last_flush = time.monotonic()
+        rows = [
+            {"pair_id": pair_id, "active_at": datetime.utcfromtimestamp(self.deadlines[pair_id].last_activity)}
+            for pair_id in touched if pair_id in self.deadlines
+        ]
+        if not rows:
+            return
+        try:
+            async with async_session_maker() as db:
+                pairs = BotPair.__table__
+                await db.execute(
+                    update(pairs)
+                    .where(pairs.c.id == bindparam("pair_id"))
+                    .values(last_activity_at=bindparam("active_at")),
+                    rows
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to flush pair activity: {e}")
+            self._touched |= touched
+
+    async def _recheck_idle(self, expired: List[Tuple[str, str]], now: float) -> List[Tuple[str, str]]:
+        """Re-arm idle pairs with newer activity recorded by another worker and drop them from ``expired``."""
+        idle = [pair_id for pair_id, reason in expired if reason == "idle"]
+        if not idle:
+            return expired
+        activity: Dict[str, datetime] = {}
+        async with async_session_maker() as db:
+            for start in range(0, len(idle), ACTIVITY_BATCH_SIZE):
+                result = await db.execute(
+                    select(BotPair.id, BotPair.last_activity_at)
+                    .where(BotPair.id.in_(idle[start:start + ACTIVITY_BATCH_SIZE]), BotPair.last_activity_at.is_not(None))
+                )
+                activity.update(result.all())
+
+        active = set()
+        for pair_id, last_activity in activity.items():
+            deadline = self.deadlines.get(pair_id)
+            if deadline is None:
+                continue
+            deadline.last_activity = max(deadline.last_activity, _timestamp(last_activity))
+            if deadline.last_activity + deadline.idle_timeout > now:
+                self.wheel.schedule(pair_id, deadline.next_deadline())
+                active.add(pair_id)
+        return [(pair_id, reason) for pair_id, reason in expired if pair_id not in active]
+
+    async def expire(self) -> int:
+        """Terminate every pair that is due and return how many there were."""
+        now = time.time()
+        expired = self.due(now)
+        if not expired:
+            return 0
+        try:
+            expired = await self._recheck_idle(expired, now)
+            if not expired:
+                return 0
+            if self.on_expired is not None:
+                await self.on_expired(expired)
+        except Exception:
+            # Pairs terminated before the failure are already untracked; retry the rest
+            for pair_id, _ in expired:
+                if pair_id in self.deadlines:
+                    self.wheel.schedule(pair_id, time.time() + self.tick)
+            raise
+        # Terminated now, or already ended by another worker
+        for pair_id, _ in expired:
+            self.untrack(pair_id)
+        self.expired_total += len(expired)
+        logger.info(f"Expired {len(expired)} pairs")
+        return len(expired)
+
+    async def run(self):
+        """Expire pairs every tick until cancelled."""
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.expire()
+            except Exception as e:
+                logger.error(f"Pair expiry failed: {e}")
+            if time.monotonic() - self._last_flush >= self.activity_flush_interval:
+                await self.flush_activity()
+
+    def stats(self) -> dict:
+        """Summarize tracked and expired pairs."""
+        return {"tracked": len(self.deadlines), "expired": self.expired_total}
+
+    def start(self):
+        """Start the background expiry task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background expiry task and write pending activity."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_activity()
+
+
+def _timestamp(value: datetime) -> float:
+    # Naive datetimes in this app are UTC
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+settings = get_settings()
+
+# Global pair expiry tracker
+pair_expiry = PairExpiry(settings.pair_expiry_tick, settings.pair_activity_flush_interval)
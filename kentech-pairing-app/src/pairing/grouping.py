@@ -0,0 +1,171 @@
+"""
+K-way grouping of bots by compatibility.
+
+Groups are built greedily, longest-waiting bot first: each group starts
+from the oldest ungrouped bot and repeatedly adds the candidate whose
+summed compatibility with the members so far is highest, out of the next
+``window`` bots in wait order. Local search then swaps members between
+random groups whenever that raises the total pairwise compatibility.
+
+Each grouping strategy in ``GROUPING_STRATEGIES`` names the compatibility
+function to maximize. Compatibility depends only on a bot's type and
+capabilities, so it is
+computed once per pair of such profiles, as a full matrix when there are
+few of them and on demand otherwise. Greedy costs O(n * window) lookups
+and each swap attempt O(size); see ``benchmarks/group_formation.py``.
+"""
+
+import random
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from src.bots.models import Bot
+from src.pairing.algorithms import capability_complementarity, complementarity, type_complementarity
+from src.pairing.strategies import PairingStrategy
+
+Profile = Tuple[str, frozenset]
+
+# Distinct profiles up to which all pairwise scores are computed up front
+MAX_MATRIX_PROFILES = 1024
+
+# Grouping strategies and the compatibility each one maximizes
+GROUPING_STRATEGIES: Dict[str, Callable[[Bot, Bot], float]] = {
+    PairingStrategy.DEFAULT: complementarity,
+    PairingStrategy.CAPABILITY_BASED: capability_complementarity,
+    PairingStrategy.TYPE_BASED: type_complementarity,
+}
+
+
+class _LazyRow:
+    """One profile's compatibility with every other, computed on first use."""
+
+    __slots__ = ("profile", "representatives", "compatibility", "cache")
+
+    def __init__(self, profile: int, representatives: List[Bot], compatibility,
+                 cache: Dict[Tuple[int, int], float]):
+        self.profile = profile
+        self.representatives = representatives
+        self.compatibility = compatibility
+        self.cache = cache
+
+    def __getitem__(self, other: int) -> float:
+        key = (self.profile, other) if self.profile <= other else (other, self.profile)
+        value = self.cache.get(key)
+        if value is None:
+            value = self.cache[key] = self.compatibility(
+                self.representatives[key[0]], self.representatives[key[1]]
+            )
+        return value
+
+
+class GroupingEngine:
+    """Forms groups of ``size`` bots that maximize pairwise compatibility."""
+
+    def __init__(
+        self,
+        size: int,
+        window: int = 32,
+        passes: int = 2,
+        compatibility: Callable[[Bot, Bot], float] = complementarity,
+        seed=None
+    ):
+        if size < 2:
+            raise ValueError("Groups need at least two bots")
+        self.size = size
+        self.window = max(window, size - 1)
+        self.passes = passes
+        self.compatibility = compatibility
+        self.random = random.Random(seed)
+
+    def group_bots(self, bots: List[Bot]) -> List[List[Bot]]:
+        """Split bots into groups of ``size``; bots left over stay ungrouped."""
+        if len(bots) < self.size:
+            return []
+
+        # Map every bot to a small profile id so scores can be cached per profile pair
+        profile_ids: Dict[Profile, int] = {}
+        representatives: List[Bot] = []
+        profiles: Dict[str, int] = {}
+        for bot in bots:
+            capabilities = frozenset(cap for cap in (bot.capabilities or "").split(",") if cap)
+            key = (bot.bot_type, capabilities)
+            profile = profile_ids.get(key)
+            if profile is None:
+                profile = profile_ids[key] = len(representatives)
+                representatives.append(bot)
+            profiles[bot.id] = profile
+
+        rows = self._score_rows(representatives)
+        groups = self._greedy(bots, profiles, rows)
+        self._improve(groups, profiles, rows)
+        return groups
+
+    def _score_rows(self, representatives: List[Bot]) -> Sequence[Sequence[float]]:
+        """Compatibility between profiles, indexed ``rows[profile1][profile2]``."""
+        count = len(representatives)
+        if count <= MAX_MATRIX_PROFILES:
+            return [
+                [self.compatibility(representatives[i], representatives[j]) for j in range(count)]
+                for i in range(count)
+            ]
+        # Too many distinct profiles for a full matrix: score pairs on first use
+        cache: Dict[Tuple[int, int], float] = {}
+        return [_LazyRow(i, representatives, self.compatibility, cache) for i in range(count)]
+
+    def _greedy(self, bots: List[Bot], profiles: Dict[str, int], rows) -> List[List[Bot]]:
+        # Oldest first; bots without a recorded wait count as the newest
+        latest = datetime.max
+        pending = deque(sorted(bots, key=lambda bot: bot.available_since or latest))
+        groups = []
+        while len(pending) >= self.size:
+            group = [pending.popleft()]
+            candidates = [pending.popleft() for _ in range(min(self.window, len(pending)))]
+            candidate_profiles = [profiles[candidate.id] for candidate in candidates]
+            # Summed compatibility of each candidate with the members so far
+            row = rows[profiles[group[0].id]]
+            totals = [row[profile] for profile in candidate_profiles]
+            while len(group) < self.size:
+                best = max(range(len(candidates)), key=totals.__getitem__)
+                group.append(candidates.pop(best))
+                row = rows[candidate_profiles.pop(best)]
+                totals.pop(best)
+                totals = [
+                    total + row[profile] for total, profile in zip(totals, candidate_profiles)
+                ]
+            groups.append(group)
+            # Unchosen candidates go back to the front, still in wait order
+            pending.extendleft(reversed(candidates))
+        return groups
+
+    def _improve(self, groups: List[List[Bot]], profiles: Dict[str, int], rows):
+        if len(groups) < 2:
+            return
+        members = [[profiles[bot.id] for bot in group] for group in groups]
+        for _ in range(self.passes * len(groups) * self.size):
+            first, second = self.random.sample(range(len(groups)), 2)
+            i = self.random.randrange(self.size)
+            j = self.random.randrange(self.size)
+            a, b = members[first][i], members[second][j]
+            if a == b:
+                continue
+            # Change in total pairwise compatibility if a and b trade places
+            row_a, row_b = rows[a], rows[b]
+            delta = 0.0
+            for position, other in enumerate(members[first]):
+                if position != i:
+                    delta += row_b[other] - row_a[other]
+            for position, other in enumerate(members[second]):
+                if position != j:
+                    delta += row_a[other] - row_b[other]
+            if delta > 1e-9:
+                members[first][i], members[second][j] = b, a
+                groups[first][i], groups[second][j] = groups[second][j], groups[first][i]
+
+    def group_score(self, group: List[Bot]) -> float:
+        """Mean pairwise compatibility of one group."""
+        scores = [
+            self.compatibility(group[i], group[j])
+            for i in range(len(group)) for j in range(i + 1, len(group))
+        ]
+        return sum(scores) / len(scores)
@@ -0,0 +1,272 @@
+"""
+Groups of three or more bots.
+
+Pairs stay ``BotPair`` rows with their relay routes and expiry. Groups
+extend pairing to up to ``max_bots_per_pair`` members per group and are
+formed by ``GroupingEngine``. Creating and terminating groups is
+set-based: one transaction per call, with one outbox event announcing up
+to ``GROUP_BATCH_SIZE`` groups, so forming many groups costs a handful of
+statements rather than one round of API calls per group.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from src.bots.models import Bot, BotGroup, BotGroupMember, BotStatus, PairStatus, status_values
+from src.config.settings import get_settings
+from src.monitoring.metrics import GROUPS_CREATED, PAIRING_RUN_DURATION, TIME_TO_PAIR
+from src.pairing.grouping import GROUPING_STRATEGIES, GroupingEngine
+from src.utils.outbox import outbox, outbox_event
+from src.utils.version import state_version
+
+# Rows per statement, under the bound parameter limit of SQLite
+GROUP_BATCH_SIZE = 500
+
+GroupMembers = Tuple[str, List[str]]
+
+
+def _batches(items: Sequence, size: int = GROUP_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class GroupManager:
+    """Creates, lists and terminates bot groups."""
+
+    def validate_size(self, size: int) -> Optional[str]:
+        """Why a group of ``size`` bots cannot be formed, or None if it can."""
+        max_size = get_settings().max_bots_per_pair
+        if size == 2:
+            return "Groups of two bots are pairs; use /api/pairs"
+        if size < 3 or size > max_size:
+            return f"Group size must be between 3 and max_bots_per_pair ({max_size})"
+        return None
+
+    async def create_groups(
+        self,
+        groups: List[List[str]],
+        strategy: str,
+        db: AsyncSession
+    ) -> List[GroupMembers]:
+        """Create groups of bot ids in one transaction.
+
+        Groups with a bot that is not online are skipped. If another request
+        takes one of the remaining bots first, nothing is created. Returns
+        ``(group_id, bot_ids)`` for the groups created.
+        """
+        try:
+            now = datetime.utcnow()
+            bot_ids = [bot_id for group in groups for bot_id in group]
+            if len(set(bot_ids)) != len(bot_ids):
+                logger.error("A bot can only be in one group")
+                return []
+
+            waiting: Dict[str, Optional[datetime]] = {}
+            for batch in _batches(bot_ids):
+                result = await db.execute(
+                    select(Bot.id, Bot.available_since)
+                    .where(Bot.id.in_(batch), Bot.status == BotStatus.ONLINE)
+                )
+                waiting.update(result.all())
+            groups = [group for group in groups if all(bot_id in waiting for bot_id in group)]
+            if not groups:
+                logger.error("No group has all of its bots online")
+                return []
+
+            members = [bot_id for group in groups for bot_id in group]
+            claimed = 0
+            for batch in _batches(members):
+                result = await db.execute(
+                    update(Bot)
+                    .where(Bot.id.in_(batch), Bot.status == BotStatus.ONLINE)
+                    .values(**status_values(BotStatus.PAIRED, now))
+                    .execution_options(synchronize_session=False)
+                )
+                claimed += result.rowcount
+            if claimed != len(members):
+                raise RuntimeError("bots changed status while being grouped")
+
+            created = [(str(uuid4()), group) for group in groups]
+            await db.execute(insert(BotGroup.__table__), [
+                {"id": group_id, "status": PairStatus.ACTIVE, "grouping_strategy": strategy,
+                 "size": len(group), "created_at": now}
+                for group_id, group in created
+            ])
+            await db.execute(insert(BotGroupMember.__table__), [
+                {"group_id": group_id, "bot_id": bot_id, "position": position}
+                for group_id, group in created for position, bot_id in enumerate(group)
+            ])
+            for batch in _batches(created):
+                db.add(outbox_event("groups_created", {
+                    "groups": [
+                        {"group_id": group_id, "bot_ids": group} for group_id, group in batch
+                    ],
+                    "grouping_strategy": strategy
+                }))
+
+            await state_version.bump(db, "bots", "groups")
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to create {len(groups)} bot groups: {e}")
+            await db.rollback()
+            return []
+
+        outbox.wake()
+        for group_id, group in created:
+            GROUPS_CREATED.labels(str(len(group))).inc()
+            for bot_id in group:
+                if waiting[bot_id] is not None:
+                    TIME_TO_PAIR.labels(strategy).observe((now - waiting[bot_id]).total_seconds())
+        logger.info(f"Created {len(created)} bot groups")
+        return created
+
+    async def auto_group_bots(
+        self,
+        db: AsyncSession,
+        size: int,
+        strategy: str = "default"
+    ) -> List[GroupMembers]:
+        """Group available bots into groups of ``size``."""
+        if strategy not in GROUPING_STRATEGIES:
+            raise ValueError(f"Unknown grouping strategy: {strategy}")
+        started = time.perf_counter()
+        try:
+            # Only the columns grouping reads, without building ORM objects
+            result = await db.execute(
+                select(Bot.id, Bot.bot_type, Bot.capabilities, Bot.available_since)
+                .where(Bot.status == BotStatus.ONLINE)
+            )
+            available_bots = result.all()
+            if len(available_bots) < size:
+                logger.info("Not enough bots available for grouping")
+                return []
+
+            engine = GroupingEngine(size, compatibility=GROUPING_STRATEGIES[strategy])
+            # CPU-bound for large pools, so keep it off the event loop
+            groups = await asyncio.to_thread(engine.group_bots, available_bots)
+            bot_ids = [[bot.id for bot in group] for group in groups]
+            return await self.create_groups(bot_ids, strategy, db)
+        except Exception as e:
+            logger.error(f"Failed to auto-group bots: {e}")
+            return []
+        finally:
+            PAIRING_RUN_DURATION.labels(f"group:{strategy}").observe(time.perf_counter() - started)
+
+    async def terminate_groups(
+        self,
+        group_ids: List[str],
+        db: AsyncSession,
+        reason: Optional[str] = None
+    ) -> Optional[List[GroupMembers]]:
+        """Terminate groups in one transaction and return the ones that were active.
+
+        Returns None if the transaction failed and was rolled back.
+        """
+        terminated: Dict[str, List[str]] = {}
+        try:
+            now = datetime.utcnow()
+            for batch in _batches(group_ids):
+                result = await db.execute(
+                    update(BotGroup)
+                    .where(BotGroup.id.in_(batch), BotGroup.status == PairStatus.ACTIVE)
+                    .values(status=PairStatus.TERMINATED, terminated_at=now)
+                    .returning(BotGroup.id)
+                    .execution_options(synchronize_session=False)
+                )
+                ended = list(result.scalars())
+                if not ended:
+                    continue
+                result = await db.execute(
+                    select(BotGroupMember.group_id, BotGroupMember.bot_id)
+                    .where(BotGroupMember.group_id.in_(ended))
+                    .order_by(BotGroupMember.group_id, BotGroupMember.position)
+                )
+                bot_ids = []
+                for group_id, bot_id in result.all():
+                    terminated.setdefault(group_id, []).append(bot_id)
+                    bot_ids.append(bot_id)
+                for bot_batch in _batches(bot_ids):
+                    await db.execute(
+                        update(Bot)
+                        .where(Bot.id.in_(bot_batch), Bot.status == BotStatus.PAIRED)
+                        .values(**status_values(BotStatus.ONLINE, now))
+                        .execution_options(synchronize_session=False)
+                    )
+
+            groups = list(terminated.items())
+            for batch in _batches(groups):
+                db.add(outbox_event("groups_terminated", {
+                    "groups": [
+                        {"group_id": group_id, "bot_ids": bot_ids} for group_id, bot_ids in batch
+                    ],
+                    "reason": reason
+                }))
+            if groups:
+                await state_version.bump(db, "bots", "groups")
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to terminate {len(group_ids)} bot groups: {e}")
+            await db.rollback()
+            return None
+
+        if groups:
+            outbox.wake()
+        logger.info(f"Terminated {len(groups)} bot groups")
+        return groups
+
+    async def find_active_group_ids(self, bot_ids: List[str], db: AsyncSession) -> List[str]:
+        """IDs of active groups with any of ``bot_ids`` as a member."""
+        found = set()
+        for batch in _batches(bot_ids):
+            result = await db.execute(
+                select(BotGroupMember.group_id)
+                .join(BotGroup, BotGroup.id == BotGroupMember.group_id)
+                .where(BotGroupMember.bot_id.in_(batch), BotGroup.status == PairStatus.ACTIVE)
+            )
+            found.update(result.scalars())
+        return list(found)
+
+    async def get_group_rows(
+        self,
+        db: AsyncSession,
+        status: Optional[PairStatus] = None,
+        group_ids: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Get groups with their member ids, one query per batch of ``group_ids``."""
+        try:
+            groups = BotGroup.__table__
+            query = (
+                select(*groups.columns, BotGroupMember.bot_id)
+                .join(BotGroupMember, BotGroupMember.group_id == groups.c.id)
+                .order_by(groups.c.created_at, groups.c.id, BotGroupMember.position)
+            )
+            if status is not None:
+                query = query.where(groups.c.status == status)
+            queries = [query] if group_ids is None else [
+                query.where(groups.c.id.in_(batch)) for batch in _batches(group_ids)
+            ]
+
+            keys = tuple(column.key for column in groups.columns)
+            rows: Dict[str, dict] = {}
+            for batch_query in queries:
+                for row in await db.execute(batch_query):
+                    group = rows.get(row.id)
+                    if group is None:
+                        group = rows[row.id] = dict(zip(keys, row[:len(keys)]))
+                        group["bot_ids"] = []
+                    group["bot_ids"].append(row.bot_id)
+            return list(rows.values())
+        except Exception as e:
+            logger.error(f"Failed to get group rows: {e}")
+            return []
+
+
+# Global group manager instance
+group_manager = GroupManager()
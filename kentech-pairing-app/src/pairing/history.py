@@ -0,0 +1,83 @@
+"""
+Recently formed pairs, for strategies that avoid pairing the same bots again.
+
+Pairs are keyed on the unordered pair of bot ids and kept in ``buckets``
+time-bucketed sets that together span ``window`` seconds. A lookup checks
+each bucket once, so it is O(1) for a fixed bucket count. The oldest bucket
+is dropped whole as time moves on, so memory is bounded by the pairs
+formed within one window. Entries are exact, with no false positives, and
+expire up to one bucket width early.
+"""
+
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+from src.config.settings import get_settings
+
+PairKey = Tuple[str, str]
+
+
+def pair_key(bot1_id: str, bot2_id: str) -> PairKey:
+    """Key of a pair regardless of which bot is primary."""
+    return (bot1_id, bot2_id) if bot1_id <= bot2_id else (bot2_id, bot1_id)
+
+
+class RecentPairs:
+    """Time-bucketed set of the bot pairs formed within the last ``window`` seconds."""
+
+    def __init__(self, window: float, buckets: int = 12):
+        self.window = window
+        self.width = window / buckets if window > 0 else 0.0
+        self.buckets: List[Set[PairKey]] = [set() for _ in range(buckets)]
+        self.current = 0  # bucket index of the most recent time seen
+
+    @property
+    def enabled(self) -> bool:
+        """Whether repeats are tracked at all; a window of 0 disables the filter."""
+        return self.window > 0
+
+    def _advance(self, now: float):
+        index = int(now // self.width)
+        if index > self.current:
+            # Clear the buckets that fell out of the window, at most all of them
+            for stale in range(max(self.current + 1, index - len(self.buckets) + 1), index + 1):
+                self.buckets[stale % len(self.buckets)].clear()
+            self.current = index
+
+    def add(self, bot1_id: str, bot2_id: str, at: Optional[float] = None):
+        """Record that two bots were paired at ``at`` (default now)."""
+        if not self.enabled:
+            return
+        at = at if at is not None else time.time()
+        index = int(at // self.width)
+        self._advance(at)
+        if index <= self.current - len(self.buckets):
+            return  # already outside the window
+        self.buckets[index % len(self.buckets)].add(pair_key(bot1_id, bot2_id))
+
+    def contains(self, bot1_id: str, bot2_id: str, now: Optional[float] = None) -> bool:
+        """Whether the two bots were paired within the window."""
+        if not self.enabled:
+            return False
+        self._advance(now if now is not None else time.time())
+        key = pair_key(bot1_id, bot2_id)
+        return any(key in bucket for bucket in self.buckets)
+
+    def rebuild(self, pairs: Iterable[Tuple[str, str, float]]):
+        """Replace the contents with ``(bot1_id, bot2_id, created_at)`` rows."""
+        for bucket in self.buckets:
+            bucket.clear()
+        self.current = 0
+        if self.enabled:
+            self._advance(time.time())
+        for bot1_id, bot2_id, at in pairs:
+            self.add(bot1_id, bot2_id, at)
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self.buckets)
+
+
+settings = get_settings()
+
+# Global recent pairs filter
+recent_pairs = RecentPairs(settings.pair_repeat_window)
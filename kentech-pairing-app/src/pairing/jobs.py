@@ -0,0 +1,199 @@
+"""
+Background auto-pair jobs.
+
+``POST /api/pairs/auto?background=true`` submits a job and returns at once;
+the pairing runs in a task on this worker with its own database session.
+Progress (bots considered, pairs committed) is kept on the job for polling
+and pushed to monitors through ``on_update``. Only one job is pending or
+running at a time: a submission for the same strategy returns that job
+instead of starting another, and one for another strategy is refused with
+``JobConflictError``. Cancellation is cooperative: the job stops between
+pairs, so every pair it committed stays fully created.
+
+Jobs live in the memory of the worker that accepted them and are lost if
+it restarts. With several workers, status and cancel requests only find a
+job on that worker, so run one worker or route ``/api/pairs/auto`` to the
+same worker per client.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from enum import Enum
+from typing import Awaitable, Callable, Optional, Tuple
+from uuid import uuid4
+
+from loguru import logger
+
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+from src.monitoring.metrics import AUTO_PAIR_JOBS
+from src.pairing.core import pairing_core
+
+
+class JobStatus(str, Enum):
+    """Auto-pair job lifecycle states."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class JobConflictError(RuntimeError):
+    """Raised when a job for another strategy is already pending or running."""
+
+    def __init__(self, job: "AutoPairJob"):
+        super().__init__(f"Auto-pair job {job.id} for strategy {job.strategy} is already running")
+        self.job = job
+
+
+class AutoPairJob:
+    """State and progress of a single auto-pair run."""
+
+    def __init__(self, strategy: str):
+        self.id = str(uuid4())
+        self.strategy = strategy
+        self.status = JobStatus.PENDING
+        self.bots_considered = 0
+        self.pairs_committed = 0
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> dict:
+        """Serialize the job for API responses and monitor events."""
+        return {
+            "job_id": self.id,
+            "strategy": self.strategy,
+            "status": self.status.value,
+            "bots_considered": self.bots_considered,
+            "pairs_committed": self.pairs_committed,
+            "cancel_requested": self.cancel_requested,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class AutoPairJobManager:
+    """Runs auto-pair jobs in background tasks and keeps recent results."""
+
+    def __init__(self, history_size: int, progress_interval: float):
+        self.history_size = history_size
+        self.progress_interval = progress_interval
+        self.jobs: "OrderedDict[str, AutoPairJob]" = OrderedDict()
+        self.running: Optional[AutoPairJob] = None  # the unfinished job, if any
+        # Called with the job whenever its status or progress is published
+        self.on_update: Optional[Callable[[AutoPairJob], Awaitable[None]]] = None
+
+    def submit(self, strategy: str) -> Tuple[AutoPairJob, bool]:
+        """Start a job for ``strategy``, or return the one already running for it.
+
+        Returns the job and whether it was newly created. Raises
+        ``JobConflictError`` while a job for another strategy is unfinished.
+        """
+        if self.running is not None:
+            if self.running.strategy != strategy:
+                raise JobConflictError(self.running)
+            return self.running, False
+
+        job = AutoPairJob(strategy)
+        self.jobs[job.id] = job
+        self.running = job
+        self._trim()
+        job.task = asyncio.create_task(self._run(job))
+        AUTO_PAIR_JOBS.labels("submitted").inc()
+        logger.info(f"Auto-pair job {job.id} submitted for strategy {strategy}")
+        return job, True
+
+    def get(self, job_id: str) -> Optional[AutoPairJob]:
+        """Look up a job by ID."""
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[AutoPairJob]:
+        """Ask a job to stop before its next pair."""
+        job = self.jobs.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_requested = True
+            logger.info(f"Auto-pair job {job.id} cancellation requested")
+        return job
+
+    async def stop(self, timeout: float = 5.0):
+        """Cancel unfinished jobs and wait for them to wind down."""
+        job = self.running
+        if job is None or job.task is None:
+            return
+        job.cancel_requested = True
+        _, pending = await asyncio.wait([job.task], timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self, job: AutoPairJob):
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        await self._publish(job)
+        last_published = time.monotonic()
+
+        async def progress(bots_considered: int, pairs_committed: int) -> bool:
+            nonlocal last_published
+            job.bots_considered = bots_considered
+            job.pairs_committed = pairs_committed
+            if time.monotonic() - last_published >= self.progress_interval:
+                last_published = time.monotonic()
+                await self._publish(job)
+            return not job.cancel_requested
+
+        try:
+            async with async_session_maker() as db:
+                pairs = await pairing_core.auto_pair_bots(db, job.strategy, progress)
+            job.pairs_committed = len(pairs)
+            job.status = JobStatus.CANCELLED if job.cancel_requested else JobStatus.COMPLETED
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+            raise
+        except Exception as e:
+            logger.error(f"Auto-pair job {job.id} failed: {e}")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            if self.running is job:
+                self.running = None
+            AUTO_PAIR_JOBS.labels(job.status.value).inc()
+            logger.info(f"Auto-pair job {job.id} {job.status.value}: {job.pairs_committed} pairs")
+
+        await self._publish(job)
+
+    async def _publish(self, job: AutoPairJob):
+        if self.on_update is None:
+            return
+        try:
+            await self.on_update(job)
+        except Exception as e:
+            logger.error(f"Failed to publish auto-pair job {job.id}: {e}")
+
+    def _trim(self):
+        """Drop the oldest finished jobs beyond ``history_size``."""
+        excess = len(self.jobs) - self.history_size
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished][:max(excess, 0)]:
+            del self.jobs[job_id]
+
+
+settings = get_settings()
+
+# Global auto-pair job manager
+auto_pair_jobs = AutoPairJobManager(settings.auto_pair_job_history, settings.auto_pair_progress_interval)
@@ -0,0 +1,82 @@
+"""
+In-memory routing table for relaying messages between paired bots.
+"""
+
+from enum import Enum
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.config.settings import get_settings
+from src.utils.rate import TokenBucket
+
+
+class RelayDecision(str, Enum):
+    """Outcome of a relay authorization check."""
+    ALLOWED = "allowed"
+    NOT_PAIRED = "not_paired"
+    THROTTLED = "throttled"
+
+
+class PairRoute:
+    """Routing entry for one side of an active pair."""
+
+    __slots__ = ("pair_id", "partner_id", "bucket")
+
+    def __init__(self, pair_id: str, partner_id: str, bucket: TokenBucket):
+        self.pair_id = pair_id
+        self.partner_id = partner_id
+        self.bucket = bucket
+
+
+class PairRoutingTable:
+    """Maps each paired bot to its current partner with per-direction flow control."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.routes: Dict[str, PairRoute] = {}  # bot_id -> route to partner
+
+    def add_pair(self, pair_id: str, primary_bot_id: str, secondary_bot_id: str):
+        """Register both directions of a newly active pair."""
+        self.routes[primary_bot_id] = PairRoute(
+            pair_id, secondary_bot_id, TokenBucket(self.rate, self.burst)
+        )
+        self.routes[secondary_bot_id] = PairRoute(
+            pair_id, primary_bot_id, TokenBucket(self.rate, self.burst)
+        )
+
+    def remove_pair(self, pair_id: str, primary_bot_id: str, secondary_bot_id: str):
+        """Drop both directions of a pair if they still belong to it."""
+        for bot_id in (primary_bot_id, secondary_bot_id):
+            route = self.routes.get(bot_id)
+            if route is not None and route.pair_id == pair_id:
+                del self.routes[bot_id]
+
+    def rebuild(self, pairs: Iterable[Tuple[str, str, str]]):
+        """Replace the table with ``(pair_id, primary_bot_id, secondary_bot_id)`` rows."""
+        self.routes.clear()
+        for pair_id, primary_bot_id, secondary_bot_id in pairs:
+            self.add_pair(pair_id, primary_bot_id, secondary_bot_id)
+
+    def get_route(self, bot_id: str) -> Optional[PairRoute]:
+        """Get the route from a bot to its partner."""
+        return self.routes.get(bot_id)
+
+    def authorize(self, bot_id: str, target_bot_id: Optional[str]) -> Tuple[RelayDecision, Optional[PairRoute]]:
+        """Check that ``bot_id`` may relay one message to ``target_bot_id``."""
+        route = self.routes.get(bot_id)
+        if route is None or (target_bot_id and route.partner_id != target_bot_id):
+            return RelayDecision.NOT_PAIRED, route
+
+        if not route.bucket.take():
+            return RelayDecision.THROTTLED, route
+
+        return RelayDecision.ALLOWED, route
+
+    def __len__(self) -> int:
+        return len(self.routes) // 2
+
+
+settings = get_settings()
+
+# Global pair routing table
+pair_routes = PairRoutingTable(settings.pair_relay_rate, settings.pair_relay_burst)
@@ -0,0 +1,131 @@
+"""
+Background auto-pair scheduler.
+
+One worker, the holder of the ``auto_pair`` lease, submits auto-pair jobs
+on a cadence. The delay before the next run shrinks as more bots wait
+(``auto_pair_interval`` at ``auto_pair_target_pool`` waiting bots, half
+that at twice as many) and grows with the cost of the last run, so runs
+never take more than ``auto_pair_max_duty_cycle`` of the time. Delays are
+clamped to ``[auto_pair_min_interval, auto_pair_max_interval]``.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from loguru import logger
+
+from src.bots.manager import bot_manager
+from src.bots.models import BotStatus
+from src.bots.presence import presence
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+from src.monitoring.metrics import SCHEDULER_INTERVAL, SCHEDULER_LEADER
+from src.pairing.jobs import JobConflictError, auto_pair_jobs
+from src.utils.lease import LeaderLease
+
+
+class AutoPairScheduler:
+    """Runs auto-pairing on an adaptive cadence while holding the leader lease."""
+
+    def __init__(self, strategy: str, interval: float, min_interval: float, max_interval: float,
+                 target_pool: int, max_duty_cycle: float, lease: LeaderLease):
+        self.strategy = strategy
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_pool = target_pool
+        self.max_duty_cycle = max_duty_cycle
+        self.lease = lease
+        self.waiting = 0
+        self.last_duration = 0.0
+        self.next_delay = min_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def next_interval(self, waiting: int, last_duration: float) -> float:
+        """Delay before the next run for a waiting pool size and last run cost."""
+        pool_delay = self.interval * self.target_pool / max(waiting, 1)
+        cost_delay = last_duration / self.max_duty_cycle if self.max_duty_cycle > 0 else 0.0
+        return min(max(pool_delay, cost_delay, self.min_interval), self.max_interval)
+
+    async def tick(self) -> float:
+        """Run auto-pairing if enough bots are waiting and return the next delay."""
+        async with async_session_maker() as db:
+            counts = await bot_manager.count_by_status(db)
+        self.waiting = counts.get(BotStatus.ONLINE.value, 0)
+
+        if self.waiting >= 2:
+            try:
+                job, _ = auto_pair_jobs.submit(self.strategy)
+            except JobConflictError as e:
+                # A job for another strategy is pairing the same bots; wait for it instead
+                job = e.job
+            started = time.monotonic()
+            renew_every = self.lease.ttl / 3
+            # Keep the lease alive through long runs without cancelling the job if we stop
+            while not job.task.done():
+                await asyncio.wait([job.task], timeout=renew_every)
+                if not job.task.done():
+                    await self.lease.acquire()
+            self.last_duration = time.monotonic() - started
+            self.waiting = max(self.waiting - 2 * job.pairs_committed, 0)
+
+        self.next_delay = self.next_interval(self.waiting, self.last_duration)
+        SCHEDULER_INTERVAL.set(self.next_delay)
+        return self.next_delay
+
+    async def run(self):
+        """Hold or wait for the lease and run ticks until cancelled."""
+        next_run = 0.0
+        while True:
+            leader = await self.lease.acquire()
+            SCHEDULER_LEADER.set(1 if leader else 0)
+            if leader and time.monotonic() >= next_run:
+                try:
+                    next_run = time.monotonic() + await self.tick()
+                except Exception as e:
+                    logger.error(f"Scheduled auto-pairing failed: {e}")
+                    next_run = time.monotonic() + self.max_interval
+            # Wake often enough to renew the lease, or to take it over when it expires
+            await asyncio.sleep(max(min(self.lease.ttl / 3, next_run - time.monotonic()), 0.05))
+
+    def stats(self) -> dict:
+        """Summarize scheduler state for health checks."""
+        return {
+            "leader": self.lease.is_leader,
+            "holder": self.lease.holder,
+            "waiting_bots": self.waiting,
+            "last_run_seconds": round(self.last_duration, 3),
+            "next_delay_seconds": round(self.next_delay, 3),
+        }
+
+    def start(self):
+        """Start scheduling in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop scheduling and hand the lease to another worker."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.lease.release()
+        SCHEDULER_LEADER.set(0)
+
+
+settings = get_settings()
+
+# Global auto-pair scheduler
+auto_pair_scheduler = AutoPairScheduler(
+    settings.auto_pair_strategy,
+    settings.auto_pair_interval,
+    settings.auto_pair_min_interval,
+    settings.auto_pair_max_interval,
+    settings.auto_pair_target_pool,
+    settings.auto_pair_max_duty_cycle,
+    LeaderLease("auto_pair", presence.worker_id, settings.scheduler_lease_ttl)
+)
@@ -9,7 +9,8 @@ from src.pairing.algorithms import (
     PairingAlgorithm,
     DefaultPairingAlgorithm,
     CapabilityBasedPairingAlgorithm,
-    TypeBasedPairingAlgorithm
+    TypeBasedPairingAlgorithm,
+    WaitTimePairingAlgorithm
 )
 
 
@@ -18,6 +19,7 @@ class PairingStrategy(str, Enum):
     DEFAULT = "default"
     CAPABILITY_BASED = "capability_based"
     TYPE_BASED = "type_based"
+    WAIT_TIME = "wait_time"
 
 
 # Strategy registry
@@ -25,6 +27,7 @@ STRATEGY_REGISTRY: Dict[str, Type[PairingAlgorithm]] = {
     PairingStrategy.DEFAULT: DefaultPairingAlgorithm,
     PairingStrategy.CAPABILITY_BASED: CapabilityBasedPairingAlgorithm,
     PairingStrategy.TYPE_BASED: TypeBasedPairingAlgorithm,
+    PairingStrategy.WAIT_TIME: WaitTimePairingAlgorithm,
 }
 
 
@@ -0,0 +1,85 @@
+"""
+Short-TTL response cache with request coalescing.
+
+Concurrent misses for the same key share one in-flight computation
+instead of each running their own queries. Entries are tagged with the
+tables they were built from and dropped when ``state_version`` reports a
+write to one of them; the least recently used entries are evicted once
+``max_entries`` is reached. Writes made by other workers only show up in
+the shared table versions, so keys should include the ETag.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from src.config.settings import get_settings
+from src.utils.version import state_version
+
+
+class SingleFlightCache:
+    """LRU cache whose concurrent misses wait on a single computation."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, Tuple[float, Tuple[str, ...], Any]]" = OrderedDict()
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]], tables: Tuple[str, ...] = ()) -> Any:
+        """Return the cached value for ``key``, computing it at most once at a time."""
+        if self.ttl <= 0:
+            return await compute()
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+        future = self.inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # Run detached so one caller disconnecting does not cancel it for the others
+            future = asyncio.ensure_future(compute())
+            self.inflight[key] = future
+            future.add_done_callback(lambda done: self._store(key, tables, done))
+        return await asyncio.shield(future)
+
+    def _store(self, key: Hashable, tables: Tuple[str, ...], future: asyncio.Future):
+        self.inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, tables, future.result())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, *tables: str):
+        """Drop entries built from any of ``tables``."""
+        stale = [key for key, (_, entry_tables, _) in self.entries.items() if set(entry_tables) & set(tables)]
+        for key in stale:
+            del self.entries[key]
+
+    def stats(self) -> dict:
+        """Summarize cache effectiveness."""
+        return {
+            "entries": len(self.entries),
+            "inflight": len(self.inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+settings = get_settings()
+
+# Global response cache, invalidated by table writes
+response_cache = SingleFlightCache(settings.response_cache_max_entries, settings.response_cache_ttl)
+state_version.subscribe(response_cache.invalidate)
@@ -0,0 +1,77 @@
+"""
+Database-backed leader lease.
+
+Workers sharing a database compete for a named row in
+``scheduler_leases``; whoever holds an unexpired lease is the leader and
+keeps it by renewing before ``ttl`` runs out. If the leader dies, the
+lease expires and the next worker to try takes it over. Acquisition is a
+single conditional UPDATE (or INSERT for the first holder), so it works
+the same on SQLite and server databases.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from loguru import logger
+
+from src.bots.models import SchedulerLease
+from src.config.database import async_session_maker
+
+
+class LeaderLease:
+    """Named lease that at most one holder has at a time."""
+
+    def __init__(self, name: str, holder: str, ttl: float):
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        """Take or renew the lease, returning whether this holder has it."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        try:
+            async with async_session_maker() as db:
+                result = await db.execute(
+                    update(SchedulerLease)
+                    .where(
+                        SchedulerLease.name == self.name,
+                        or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+                    )
+                    .values(holder=self.holder, expires_at=expires_at)
+                )
+                if result.rowcount == 0:
+                    db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at))
+                try:
+                    await db.commit()
+                    leader = True
+                except IntegrityError:
+                    # Someone else holds an unexpired lease
+                    await db.rollback()
+                    leader = False
+        except Exception as e:
+            logger.error(f"Failed to acquire lease {self.name}: {e}")
+            leader = False
+
+        if leader != self.is_leader:
+            logger.info(f"{'Acquired' if leader else 'Lost'} lease {self.name} as {self.holder}")
+        self.is_leader = leader
+        return leader
+
+    async def release(self):
+        """Give up the lease so another worker can take it at once."""
+        if not self.is_leader:
+            return
+        try:
+            async with async_session_maker() as db:
+                await db.execute(
+                    update(SchedulerLease)
+                    .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                    .values(expires_at=datetime.utcnow())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to release lease {self.name}: {e}")
+        self.is_leader = False
@@ -0,0 +1,308 @@
+"""
+Transactional outbox for notifications.
+
+A change that must be announced adds an ``OutboxEvent`` to the session
+making it, so the event commits or rolls back with the change. A
+dispatcher delivers pending events in batches, off the request path,
+through handlers registered per event type. Each batch is claimed by
+pushing ``available_at`` out by ``claim_timeout``, so if a dispatcher dies
+mid-batch its claims lapse and the events are picked up again. Failed
+deliveries are retried with exponential backoff up to ``max_attempts``.
+Delivery is therefore at least once, and handlers pass the event id on
+as a deduplication id.
+
+Bots can be connected to any worker. Handlers send what they can on this
+worker and hand the rest to ``forward``, which writes messages for bots
+held by another worker (``Bot.connection_worker``) as ``bot_messages``
+events that only that worker claims. Messages for bots connected nowhere
+raise ``UndeliveredError``; the event is then narrowed to just those
+messages and retried, re-resolving where each bot is connected.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+from uuid import uuid4
+
+from sqlalchemy import and_, delete, or_, select, update
+from loguru import logger
+
+from src.bots.models import Bot, OutboxEvent
+from src.bots.presence import presence
+from src.config.database import async_session_maker
+from src.config.settings import get_settings
+from src.monitoring.metrics import OUTBOX_DELIVERY_LAG, OUTBOX_EVENTS
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+# Delivered ids remembered to skip redelivery after a lost acknowledgement
+RECENT_IDS = 10000
+
+# Bot ids per lookup of connection holders, under the bound parameter limit of SQLite
+FORWARD_BATCH_SIZE = 500
+
+# Event type of per-bot messages forwarded between workers
+BOT_MESSAGES = "bot_messages"
+
+
+class UndeliveredError(Exception):
+    """Raised by handlers with the per-bot messages that could not be delivered yet."""
+
+    def __init__(self, messages: Dict[str, dict]):
+        super().__init__(f"{len(messages)} bots not connected: {', '.join(list(messages)[:5])}")
+        self.messages = messages
+
+
+def outbox_event(event_type: str, payload: dict, worker_id: Optional[str] = None) -> OutboxEvent:
+    """Build an event to add to the session of the change it announces."""
+    now = datetime.utcnow()
+    return OutboxEvent(
+        id=str(uuid4()),
+        event_type=event_type,
+        payload=json.dumps(payload),
+        created_at=now,
+        available_at=now,
+        attempts=0,
+        worker_id=worker_id
+    )
+
+
+def _batches(items: Sequence, size: int = FORWARD_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class OutboxDispatcher:
+    """Delivers committed outbox events to their handlers in batches."""
+
+    def __init__(self, batch_size: int, poll_interval: float, max_attempts: int, retry_backoff: float,
+                 claim_timeout: float, retention: float, worker_id: str):
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.claim_timeout = claim_timeout
+        self.retention = retention
+        self.handlers: Dict[str, Handler] = {}
+        self.recent: "OrderedDict[str, None]" = OrderedDict()
+        self._wake = asyncio.Event()
+        self._last_purge = 0.0
+        self.delivered_total = 0
+        self.failed_total = 0
+        self.forwarded_total = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, event_type: str, handler: Handler):
+        """Deliver events of ``event_type`` with ``handler(event_id, payload)``."""
+        self.handlers[event_type] = handler
+
+    def wake(self):
+        """Dispatch now instead of at the next poll, after committing events."""
+        self._wake.set()
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        pending = (
+            select(OutboxEvent.id)
+            .where(
+                OutboxEvent.delivered_at.is_(None),
+                OutboxEvent.available_at <= now,
+                OutboxEvent.attempts < self.max_attempts,
+                or_(OutboxEvent.worker_id.is_(None), OutboxEvent.worker_id == self.worker_id)
+            )
+            .order_by(OutboxEvent.created_at)
+            .limit(self.batch_size)
+        )
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(pending), OutboxEvent.available_at <= now)
+                .values(available_at=now + timedelta(seconds=self.claim_timeout))
+                .returning(
+                    OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.payload,
+                    OutboxEvent.attempts, OutboxEvent.created_at
+                )
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await db.commit()
+        return sorted(rows, key=lambda row: row.created_at)
+
+    async def dispatch(self) -> int:
+        """Deliver one batch of pending events and return how many were claimed."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+
+        delivered = []
+        failed = []
+        for event_id, event_type, payload, attempts, created_at in rows:
+            if event_id not in self.recent:
+                handler = self.handlers.get(event_type)
+                try:
+                    if handler is None:
+                        raise LookupError(f"No outbox handler for {event_type}")
+                    await handler(event_id, json.loads(payload))
+                except UndeliveredError as e:
+                    logger.warning(f"Outbox event {event_id} ({event_type}) not delivered yet: {e}")
+                    failed.append((event_id, attempts + 1, str(e), e.messages))
+                    self.failed_total += 1
+                    OUTBOX_EVENTS.labels("failed").inc()
+                    continue
+                except Exception as e:
+                    logger.error(f"Failed to deliver outbox event {event_id} ({event_type}): {e}")
+                    failed.append((event_id, attempts + 1, str(e), None))
+                    self.failed_total += 1
+                    OUTBOX_EVENTS.labels("failed").inc()
+                    continue
+                self._remember(event_id)
+                self.delivered_total += 1
+                OUTBOX_EVENTS.labels("delivered").inc()
+                OUTBOX_DELIVERY_LAG.observe((datetime.utcnow() - created_at).total_seconds())
+            delivered.append(event_id)
+
+        now = datetime.utcnow()
+        async with async_session_maker() as db:
+            if delivered:
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(delivered))
+                    .values(delivered_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            for event_id, attempts, error, undelivered in failed:
+                values = {
+                    "attempts": attempts,
+                    "last_error": error[:1000],
+                    "available_at": now + timedelta(seconds=self.retry_backoff * 2 ** (attempts - 1)),
+                }
+                if undelivered is not None:
+                    # Retry only the bots still missing, on whichever worker holds them by then
+                    values.update(
+                        event_type=BOT_MESSAGES,
+                        payload=json.dumps({"messages": undelivered}),
+                        worker_id=None
+                    )
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id == event_id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+        return len(rows)
+
+    async def forward(self, messages: Dict[str, dict]):
+        """Hand per-bot messages to the workers holding the bots' connections.
+
+        Messages for bots held by another worker are committed as
+        ``bot_messages`` events for that worker. Raises ``UndeliveredError``
+        with the rest.
+        """
+        bot_ids = list(messages)
+        routed: Dict[str, Dict[str, dict]] = {}
+        async with async_session_maker() as db:
+            for batch in _batches(bot_ids):
+                result = await db.execute(
+                    select(Bot.id, Bot.connection_worker)
+                    .where(Bot.id.in_(batch), Bot.connection_worker.is_not(None))
+                )
+                for bot_id, worker_id in result.all():
+                    if worker_id != self.worker_id:
+                        routed.setdefault(worker_id, {})[bot_id] = messages[bot_id]
+            for worker_id, worker_messages in routed.items():
+                db.add(outbox_event(BOT_MESSAGES, {"messages": worker_messages}, worker_id))
+            await db.commit()
+
+        forwarded = sum(len(worker_messages) for worker_messages in routed.values())
+        self.forwarded_total += forwarded
+        OUTBOX_EVENTS.labels("forwarded").inc(forwarded)
+        if forwarded < len(messages):
+            raise UndeliveredError({
+                bot_id: message for bot_id, message in messages.items()
+                if not any(bot_id in worker_messages for worker_messages in routed.values())
+            })
+
+    async def purge(self) -> int:
+        """Delete delivered events, and events out of attempts, older than ``retention``."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        async with async_session_maker() as db:
+            result = await db.execute(
+                delete(OutboxEvent)
+                .where(or_(
+                    OutboxEvent.delivered_at < cutoff,
+                    and_(OutboxEvent.attempts >= self.max_attempts, OutboxEvent.created_at < cutoff)
+                ))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return result.rowcount
+
+    def _remember(self, event_id: str):
+        self.recent[event_id] = None
+        if len(self.recent) > RECENT_IDS:
+            self.recent.popitem(last=False)
+
+    async def run(self):
+        """Dispatch when woken or every poll interval until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                # Keep going while batches come back full
+                while await self.dispatch() >= self.batch_size:
+                    pass
+                if time.monotonic() - self._last_purge >= self.retention / 10:
+                    self._last_purge = time.monotonic()
+                    await self.purge()
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}")
+
+    def stats(self) -> dict:
+        """Summarize deliveries for health checks."""
+        return {
+            "delivered": self.delivered_total,
+            "failed_attempts": self.failed_total,
+            "forwarded": self.forwarded_total,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    def start(self):
+        """Start the background dispatch task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background dispatch task after a last batch; the rest wait for the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await self.dispatch()
+            except Exception as e:
+                logger.error(f"Final outbox dispatch failed: {e}")
+
+
+settings = get_settings()
+
+# Global outbox dispatcher
+outbox = OutboxDispatcher(
+    settings.outbox_batch_size,
+    settings.outbox_poll_interval,
+    settings.outbox_max_attempts,
+    settings.outbox_retry_backoff,
+    settings.outbox_claim_timeout,
+    settings.outbox_retention,
+    presence.worker_id
+)
@@ -0,0 +1,38 @@
+"""
+Rate limiting primitives shared by the API and WebSocket layers.
+"""
+
+import time
+
+
+class TokenBucket:
+    """Token bucket refilled lazily on each take."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> bool:
+        """Take ``cost`` tokens, returning False if the bucket is short."""
+        if self.rate <= 0:
+            return True
+
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < cost:
+            return False
+
+        self.tokens -= cost
+        return True
+
+    def retry_after(self, cost: float = 1.0) -> float:
+        """Seconds until ``cost`` tokens will be available."""
+        if self.rate <= 0 or self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
@@ -0,0 +1,84 @@
+"""
+Hierarchical timing wheel.
+
+Timers are bucketed by deadline into ``levels`` wheels of ``slots`` slots
+each; level ``n`` slots span ``slots ** n`` ticks. Advancing the clock
+empties the due level-0 slots and, whenever a higher-level slot comes
+round, cascades its timers down to finer levels. Each timer is touched at
+most once per level, so scheduling and cancelling are O(1) and advancing
+costs O(expired) amortized rather than O(all timers).
+"""
+
+import math
+from typing import Dict, Hashable, List, Tuple
+
+
+class TimingWheel:
+    """Hierarchical hashed timing wheel keyed by timer id."""
+
+    def __init__(self, tick: float, start: float, slots: int = 64, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.origin = start
+        self.current = 0  # last tick processed
+        self.wheels: List[List[Dict[Hashable, int]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.locations: Dict[Hashable, Tuple[int, int]] = {}  # key -> (level, slot)
+
+    def _tick_of(self, when: float) -> int:
+        return math.ceil((when - self.origin) / self.tick)
+
+    def _place(self, key: Hashable, due: int):
+        delta = due - self.current
+        level = 0
+        while level < self.levels - 1 and delta >= self.slots ** (level + 1):
+            level += 1
+        # Beyond the wheel's range: park in the furthest top-level slot and re-place on cascade
+        parked = min(due, self.current + self.slots ** self.levels - 1)
+        slot = (parked // self.slots ** level) % self.slots
+        self.wheels[level][slot][key] = due
+        self.locations[key] = (level, slot)
+
+    def schedule(self, key: Hashable, when: float):
+        """Fire ``key`` at time ``when``, replacing any earlier timer for it."""
+        self.cancel(key)
+        self._place(key, max(self._tick_of(when), self.current + 1))
+
+    def cancel(self, key: Hashable) -> bool:
+        """Remove the timer for ``key`` if it is pending."""
+        location = self.locations.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        del self.wheels[level][slot][key]
+        return True
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Move the clock to ``now`` and return the keys that came due."""
+        # Only ticks that have fully elapsed, so nothing fires before its deadline
+        target = math.floor((now - self.origin) / self.tick)
+        expired: List[Hashable] = []
+        while self.current < target:
+            self.current += 1
+            # Cascade coarser slots that start at this tick, highest level first
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots ** level
+                if self.current % span == 0:
+                    bucket = self.wheels[level][(self.current // span) % self.slots]
+                    timers = list(bucket.items())
+                    bucket.clear()
+                    for key, due in timers:
+                        del self.locations[key]
+                        self._place(key, due)
+            bucket = self.wheels[0][self.current % self.slots]
+            for key in bucket:
+                del self.locations[key]
+            expired.extend(bucket)
+            bucket.clear()
+        return expired
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.locations
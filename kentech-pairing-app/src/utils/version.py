@@ -0,0 +1,88 @@
+"""
+Version counters for the bot, pair and group tables.
+
+Every write to a table bumps its counter in ``table_versions`` within the
+same transaction, so an ETag built from the counters changes exactly when
+the data behind a response may have, whichever worker made the write.
+Reading the counters is a single primary key lookup, far cheaper than the
+list it lets a client skip. Counters start at a random value so ETags
+handed out for an earlier database never match a new one.
+"""
+
+import random
+from typing import Callable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from src.bots.models import TableVersion
+
+TABLES = ("bots", "pairs", "groups")
+
+
+class StateVersion:
+    """Per-table write counters shared through the database."""
+
+    def __init__(self):
+        self.listeners: List[Callable[..., None]] = []
+
+    def subscribe(self, listener: Callable[..., None]):
+        """Call ``listener(*tables)`` after every bump."""
+        self.listeners.append(listener)
+
+    async def init(self, db: AsyncSession):
+        """Create the counter rows that do not exist yet."""
+        result = await db.execute(select(TableVersion.name))
+        missing = set(TABLES) - set(result.scalars())
+        if not missing:
+            return
+        for table in missing:
+            db.add(TableVersion(name=table, version=random.getrandbits(31)))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker created them first
+            await db.rollback()
+        logger.info(f"Created version counters for {', '.join(sorted(missing))}")
+
+    async def bump(self, db: AsyncSession, *tables: str):
+        """Record a write to ``tables`` in the transaction making it, before it commits."""
+        await db.execute(
+            update(TableVersion)
+            .where(TableVersion.name.in_(tables))
+            .values(version=TableVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        for listener in self.listeners:
+            listener(*tables)
+
+    async def etag(self, db: AsyncSession, *tables: str) -> str:
+        """Weak ETag for a response built from ``tables``."""
+        result = await db.execute(
+            select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+        )
+        versions = dict(result.all())
+        parts = "-".join(f"{table[0]}{versions.get(table, 0)}" for table in tables)
+        return f'W/"{parts}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+# Global state version
+state_version = StateVersion()
@@ -5,17 +5,24 @@ class BotPairingApp {
         this.pairs = [];
         this.selectedBots = [];
         this.websocket = null;
+        // Position in the server's event log, used to resume after reconnecting
+        this.epoch = null;
+        this.lastSeq = null;
+        this.pendingEvents = new Map();
+        this.resuming = false;
+        this.pingTimer = null;
+        this.pollTimer = null;
+        // Catches up on writes made through other server workers, whose events this feed misses
+        this.fallbackTimer = setInterval(() => this.loadData(), 30000);
+        // Last ETag and body per URL, for conditional GETs
+        this.httpCache = new Map();
         this.init();
     }
 
     init() {
         this.setupEventListeners();
         this.connectWebSocket();
-        this.loadData();
         this.render();
-        
-        // Auto-refresh data every 5 seconds
-        setInterval(() => this.loadData(), 5000);
     }
 
     setupEventListeners() {
@@ -37,6 +44,10 @@ class BotPairingApp {
             this.websocket.onopen = () => {
                 console.log('Connected to monitoring WebSocket');
                 this.updateStatus('Connected to real-time monitoring');
+                clearInterval(this.pollTimer);
+                this.pollTimer = null;
+                // Fetch what we missed, or a full snapshot on first connect
+                this.requestResume();
             };
             
             this.websocket.onmessage = (event) => {
@@ -46,7 +57,12 @@ class BotPairingApp {
             
             this.websocket.onclose = () => {
                 console.log('WebSocket connection closed');
+                clearInterval(this.pingTimer);
                 this.updateStatus('Disconnected - attempting to reconnect...');
+                // Poll with conditional GETs until the live feed is back; unchanged data costs a 304
+                if (!this.pollTimer) {
+                    this.pollTimer = setInterval(() => this.loadData(), 5000);
+                }
                 // Attempt to reconnect after 3 seconds
                 setTimeout(() => this.connectWebSocket(), 3000);
             };
@@ -61,42 +77,190 @@ class BotPairingApp {
         }
     }
 
+    requestResume() {
+        if (!this.websocket || this.websocket.readyState !== WebSocket.OPEN) return;
+        this.resuming = true;
+        this.websocket.send(JSON.stringify({
+            type: 'resume',
+            epoch: this.epoch,
+            last_seq: this.lastSeq
+        }));
+    }
+
     handleWebSocketMessage(data) {
         switch (data.type) {
+            case 'connected':
+                // The server closes connections that stay silent for too long
+                clearInterval(this.pingTimer);
+                this.pingTimer = setInterval(() => {
+                    if (this.websocket.readyState === WebSocket.OPEN) {
+                        this.websocket.send(JSON.stringify({ type: 'ping', timestamp: Date.now() }));
+                    }
+                }, data.heartbeat_interval * 1000);
+                break;
+            case 'snapshot':
+                this.epoch = data.epoch;
+                this.lastSeq = data.seq;
+                this.bots = data.bots;
+                this.pairs = data.pairs;
+                this.resuming = false;
+                this.applyEvents(data.events);
+                break;
+            case 'replay':
+                this.epoch = data.epoch;
+                this.resuming = false;
+                this.applyEvents(data.events);
+                break;
+            default:
+                if (data.seq !== undefined) {
+                    this.applyEvents([data]);
+                }
+        }
+    }
+
+    applyEvents(events) {
+        if (this.lastSeq === null) return;
+
+        for (const event of events) {
+            if (event.seq > this.lastSeq) {
+                this.pendingEvents.set(event.seq, event);
+            }
+        }
+
+        // Apply events strictly in sequence order
+        let applied = false;
+        while (this.pendingEvents.has(this.lastSeq + 1)) {
+            const event = this.pendingEvents.get(this.lastSeq + 1);
+            this.pendingEvents.delete(this.lastSeq + 1);
+            this.applyEvent(event);
+            this.lastSeq = event.seq;
+            applied = true;
+        }
+
+        // Prune anything already covered, then ask for the gap if one remains
+        for (const seq of this.pendingEvents.keys()) {
+            if (seq <= this.lastSeq) this.pendingEvents.delete(seq);
+        }
+        if (this.pendingEvents.size > 0 && !this.resuming) {
+            this.requestResume();
+        }
+
+        if (applied) this.render();
+    }
+
+    applyEvent(event) {
+        switch (event.type) {
             case 'bot_registered':
-                this.loadData(); // Refresh bots list
-                this.updateStatus(`New bot registered: ${data.bot_name}`);
+            case 'bot_updated':
+                this.upsertBot(event.bot);
+                if (event.type === 'bot_registered') {
+                    this.updateStatus(`New bot registered: ${event.bot.name}`);
+                }
+                break;
+            case 'bot_deregistered':
+            case 'bot_connected':
+            case 'bot_disconnected':
+                this.setBotStatus(event.bot_id, event.status);
+                if (event.type === 'bot_disconnected') {
+                    this.updateStatus(`Bot disconnected: ${this.getBotName(event.bot_id)}`);
+                }
                 break;
             case 'pair_created':
-                this.loadData(); // Refresh pairs list
+                if (!this.pairs.some(p => p.id === event.pair_id)) {
+                    this.pairs.push({
+                        id: event.pair_id,
+                        primary_bot_id: event.primary_bot_id,
+                        secondary_bot_id: event.secondary_bot_id,
+                        status: 'active',
+                        created_at: event.timestamp
+                    });
+                }
+                this.setBotStatus(event.primary_bot_id, 'paired');
+                this.setBotStatus(event.secondary_bot_id, 'paired');
                 this.updateStatus(`New pair created`);
                 break;
             case 'pair_terminated':
-                this.loadData(); // Refresh pairs list
+                this.pairs = this.pairs.map(p => p.id === event.pair_id
+                    ? { ...p, status: 'terminated', terminated_at: event.timestamp }
+                    : p);
+                this.setBotStatus(event.primary_bot_id, 'online');
+                this.setBotStatus(event.secondary_bot_id, 'online');
                 this.updateStatus(`Pair terminated`);
                 break;
-            case 'bot_disconnected':
-                this.loadData(); // Refresh bots list
-                this.updateStatus(`Bot disconnected: ${data.bot_name}`);
+            case 'pairs_terminated': {
+                const ended = new Map(event.pairs.map(p => [p.pair_id, p]));
+                this.pairs = this.pairs.map(p => ended.has(p.id)
+                    ? { ...p, status: 'terminated', terminated_at: event.timestamp }
+                    : p);
+                for (const pair of event.pairs) {
+                    this.setBotStatus(pair.primary_bot_id, 'online');
+                    this.setBotStatus(pair.secondary_bot_id, 'online');
+                }
+                this.updateStatus(`${event.pairs.length} pairs terminated`);
+                break;
+            }
+            case 'groups_created':
+            case 'groups_terminated': {
+                const status = event.type === 'groups_created' ? 'paired' : 'online';
+                for (const group of event.groups) {
+                    for (const botId of group.bot_ids) this.setBotStatus(botId, status);
+                }
+                const verb = event.type === 'groups_created' ? 'created' : 'terminated';
+                this.updateStatus(`${event.groups.length} groups ${verb}`);
                 break;
+            }
+        }
+    }
+
+    upsertBot(bot) {
+        const index = this.bots.findIndex(b => b.id === bot.id);
+        if (index === -1) {
+            this.bots.push(bot);
+        } else {
+            this.bots[index] = bot;
+        }
+    }
+
+    setBotStatus(botId, status) {
+        const bot = this.bots.find(b => b.id === botId);
+        if (bot) bot.status = status;
+    }
+
+    async fetchCached(url) {
+        // Revalidate with the last ETag; the server answers 304 without touching the database
+        const cached = this.httpCache.get(url);
+        const headers = cached ? { 'If-None-Match': cached.etag } : {};
+        const response = await fetch(url, { headers, cache: 'no-store' });
+
+        if (response.status === 304 && cached) {
+            return { data: cached.data, changed: false };
+        }
+        if (!response.ok) {
+            return null;
         }
+
+        const data = await response.json();
+        const etag = response.headers.get('ETag');
+        if (etag) {
+            this.httpCache.set(url, { etag, data });
+        }
+        return { data, changed: true };
     }
 
     async loadData() {
         try {
-            // Load bots
-            const botsResponse = await fetch('/api/bots');
-            if (botsResponse.ok) {
-                this.bots = await botsResponse.json();
-            }
+            const [bots, pairs] = await Promise.all([
+                this.fetchCached('/api/bots'),
+                this.fetchCached('/api/pairs')
+            ]);
 
-            // Load pairs
-            const pairsResponse = await fetch('/api/pairs');
-            if (pairsResponse.ok) {
-                this.pairs = await pairsResponse.json();
-            }
+            if (bots) this.bots = bots.data;
+            if (pairs) this.pairs = pairs.data;
 
-            this.render();
+            // Skip re-rendering when neither list changed
+            if ((bots && bots.changed) || (pairs && pairs.changed)) {
+                this.render();
+            }
         } catch (error) {
             console.error('Failed to load data:', error);
             this.updateStatus('Failed to load data from server');
@@ -125,7 +289,7 @@ class BotPairingApp {
                 const pair = await response.json();
                 this.updateStatus(`Pair created successfully between ${this.getBotName(this.selectedBots[0])} and ${this.getBotName(this.selectedBots[1])}`);
                 this.selectedBots = [];
-                this.loadData(); // Refresh the display
+                this.render();
             } else {
                 const error = await response.text();
                 this.updateStatus(`Failed to create pair: ${error}`);
@@ -148,7 +312,6 @@ class BotPairingApp {
 
             if (response.ok) {
                 this.updateStatus('Pair terminated successfully');
-                this.loadData(); // Refresh the display
             } else {
                 const error = await response.text();
                 this.updateStatus(`Failed to terminate pair: ${error}`);
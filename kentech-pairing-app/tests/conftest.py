@@ -2,14 +2,25 @@
 Test configuration and fixtures.
 """
 
+import os
+import tempfile
+
 import pytest
 import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+# Point the app at a throwaway database before its engine is created
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'kentech_test.db')}"
+)
 
-from src.config.database import Base
-from src.config.settings import get_settings
-from main import create_app
+from src.config.database import Base, async_session_maker, engine, init_database  # noqa: E402
+from src.config.settings import get_settings  # noqa: E402
+from src.monitoring.queries import assert_max_queries  # noqa: E402
+from src.utils.version import state_version  # noqa: E402
+from main import create_app  # noqa: E402
 
 
 @pytest.fixture(scope="session")
@@ -38,6 +49,17 @@ async def test_db():
     await engine.dispose()
 
 
+@pytest.fixture
+async def app_db():
+    """Create the app's own tables for a test and drop them afterwards."""
+    await init_database()
+    async with async_session_maker() as db:
+        await state_version.init(db)
+    yield async_session_maker
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
 @pytest.fixture
 def client():
     """Create a test client."""
@@ -45,6 +67,20 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+async def async_client():
+    """Create an in-process async client sharing the test's context."""
+    app = create_app()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.fixture
+def max_queries():
+    """Assert a block runs at most N statements: ``with max_queries(3): ...``."""
+    return assert_max_queries
+
+
 @pytest.fixture
 def test_settings():
     """Get test settings."""
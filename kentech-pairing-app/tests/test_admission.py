@@ -0,0 +1,88 @@
+"""
+Admission control under overload.
+
+Slow exports stand in for expensive low-priority traffic: each holds its
+admission slot until its first page is ready. Flooding them alongside
+health probes and heartbeats must shed the excess exports with 503 while
+the critical requests keep a low tail latency.
+"""
+
+import asyncio
+import gzip
+import time
+
+import pytest
+
+from src.api import export
+from src.api.admission import admission
+from src.bots.presence import presence
+
+# Seconds a slow export takes to produce its first page
+EXPORT_DELAY = 1.0
+# p99 latency critical requests must stay under while exports flood in
+CRITICAL_P99_BOUND = 0.25
+
+
+async def slow_stream(query, table, batch_size, compress=False):
+    await asyncio.sleep(EXPORT_DELAY)
+    yield gzip.compress(b"{}\n") if compress else b"{}\n"
+
+
+@pytest.fixture
+def overload(monkeypatch):
+    """Slow exports, a short admission queue and a bot connected to this worker."""
+    monkeypatch.setattr(export, "stream_ndjson", slow_stream)
+    monkeypatch.setattr(admission, "queue_timeout", 0.1)
+    monkeypatch.setattr(admission, "pool_saturated", lambda: False)
+    presence.connected("overload-bot", "overload-connection")
+    yield "overload-bot"
+    presence.disconnected("overload-bot", "overload-connection")
+    presence.entries.pop("overload-bot", None)
+
+
+async def timed(request) -> tuple:
+    started = time.perf_counter()
+    response = await request
+    return response.status_code, time.perf_counter() - started
+
+
+def p99(latencies) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+async def test_overload_sheds_low_priority_and_keeps_critical_fast(async_client, overload):
+    exports = [
+        asyncio.create_task(timed(async_client.get("/api/export/bots")))
+        for _ in range(10 * admission.low_priority_limit)
+    ]
+    # Let the exports take every low-priority slot and fill the queue
+    await asyncio.sleep(0.05)
+
+    critical = []
+    for _ in range(50):
+        critical.append(timed(async_client.get("/health/live")))
+        critical.append(timed(async_client.post(f"/api/bots/{overload}/heartbeat")))
+    critical_results = await asyncio.gather(*critical)
+    export_results = await asyncio.gather(*exports)
+
+    assert all(status_code == 200 for status_code, _ in critical_results)
+    assert p99([latency for _, latency in critical_results]) < CRITICAL_P99_BOUND
+
+    statuses = [status_code for status_code, _ in export_results]
+    assert statuses.count(200) == admission.low_priority_limit
+    assert statuses.count(503) == len(statuses) - admission.low_priority_limit
+    # Shed exports are answered quickly instead of waiting for a slot
+    shed_latencies = [latency for status_code, latency in export_results if status_code == 503]
+    assert max(shed_latencies) < EXPORT_DELAY
+
+
+async def test_overload_sheds_low_priority_while_pool_is_saturated(async_client, overload, monkeypatch):
+    monkeypatch.setattr(admission, "pool_saturated", lambda: True)
+
+    shed = await async_client.get("/api/export/bots")
+    heartbeat = await async_client.post(f"/api/bots/{overload}/heartbeat")
+
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"]
+    assert heartbeat.status_code == 200
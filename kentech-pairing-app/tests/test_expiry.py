@@ -0,0 +1,35 @@
+"""
+Expiry retries pairs whose termination failed.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.pairing import pairing_core
+from src.pairing.expiry import PairExpiry
+
+TICK = 0.01
+
+
+async def test_failed_termination_is_retried(monkeypatch):
+    calls = []
+
+    async def failing_terminate_pairs(pair_ids, db, reason=None):
+        calls.append(list(pair_ids))
+        return None
+
+    monkeypatch.setattr(pairing_core, "terminate_pairs", failing_terminate_pairs)
+    expiry = PairExpiry(TICK, 60.0)
+    expiry.on_expired = pairing_core.terminate_expired
+    expiry.track("p1", datetime.utcnow() - timedelta(seconds=1), None)
+
+    for _ in range(2):
+        await asyncio.sleep(TICK * 3)
+        with pytest.raises(RuntimeError):
+            await expiry.expire()
+
+    assert calls == [["p1"], ["p1"]]
+    assert "p1" in expiry.deadlines
+    assert expiry.expired_total == 0
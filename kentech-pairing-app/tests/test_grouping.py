@@ -0,0 +1,41 @@
+"""
+Grouping strategies pick the compatibility that groups are formed by.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.config.settings import get_settings
+from src.pairing.grouping import GROUPING_STRATEGIES, GroupingEngine
+
+
+def make_bots():
+    # Same-type bots differ in capabilities, different-type bots share them
+    start = datetime(2024, 1, 1)
+    profiles = [("chat", "text"), ("chat", "code"), ("search", "text"), ("search", "code")]
+    return [
+        SimpleNamespace(
+            id=str(i), bot_type=bot_type, capabilities=capabilities,
+            available_since=start + timedelta(seconds=i)
+        )
+        for i, (bot_type, capabilities) in enumerate(profiles)
+    ]
+
+
+def group_types(strategy: str):
+    engine = GroupingEngine(2, passes=0, compatibility=GROUPING_STRATEGIES[strategy])
+    return [sorted(bot.bot_type for bot in group) for group in engine.group_bots(make_bots())]
+
+
+def test_strategies_form_different_groups():
+    assert group_types("type_based") == [["chat", "search"], ["chat", "search"]]
+    assert group_types("capability_based") == [["chat", "chat"], ["search", "search"]]
+
+
+async def test_auto_group_rejects_strategies_without_a_compatibility(async_client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "max_bots_per_pair", 4)
+    response = await async_client.post(
+        "/api/groups/auto", params={"size": 3, "strategy": "wait_time"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown strategy")
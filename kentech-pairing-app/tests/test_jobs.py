@@ -0,0 +1,53 @@
+"""
+Background auto-pair jobs.
+"""
+
+import asyncio
+
+from src.bots.manager import bot_manager
+from src.pairing.jobs import auto_pair_jobs
+
+
+async def hold_run(monkeypatch) -> asyncio.Event:
+    """Keep submitted runs waiting until the returned event is set."""
+    release = asyncio.Event()
+    get_available_bots = bot_manager.get_available_bots
+
+    async def waiting_get_available_bots(db):
+        await release.wait()
+        return await get_available_bots(db)
+
+    monkeypatch.setattr(bot_manager, "get_available_bots", waiting_get_available_bots)
+    return release
+
+
+async def test_submission_for_another_strategy_conflicts(async_client, app_db, monkeypatch):
+    release = await hold_run(monkeypatch)
+    first = await async_client.post("/api/pairs/auto", params={"background": "true"})
+    same = await async_client.post("/api/pairs/auto", params={"background": "true"})
+    other = await async_client.post(
+        "/api/pairs/auto", params={"background": "true", "strategy": "capability_based"}
+    )
+    release.set()
+    await auto_pair_jobs.get(first.json()["job_id"]).task
+
+    assert first.status_code == 202
+    assert same.status_code == 202
+    assert same.json()["job_id"] == first.json()["job_id"]
+    assert other.status_code == 409
+    assert first.json()["job_id"] in other.json()["detail"]
+    assert other.headers["location"] == f"/api/pairs/auto/{first.json()['job_id']}"
+
+
+async def test_failed_run_reports_failure(async_client, app_db, monkeypatch):
+    async def failing_get_available_bots(db):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(bot_manager, "get_available_bots", failing_get_available_bots)
+    response = await async_client.post("/api/pairs/auto", params={"background": "true"})
+    await auto_pair_jobs.get(response.json()["job_id"]).task
+
+    job = (await async_client.get(f"/api/pairs/auto/{response.json()['job_id']}")).json()
+    assert job["status"] == "failed"
+    assert job["error"] == "database unavailable"
+    assert (await async_client.post("/api/pairs/auto")).status_code == 500
@@ -0,0 +1,39 @@
+"""
+Per-request query counting and the ``Server-Timing`` header.
+"""
+
+import re
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.config.database import async_session_maker
+from src.monitoring.queries import track_queries
+
+# Statements listing pairs may run: the ETag lookup and the pair rows
+PAIR_LIST_QUERIES = 2
+SERVER_TIMING = re.compile(r'db;dur=\d+\.\d{2};desc="(\d+) queries"')
+
+
+async def test_pair_list_stays_within_its_query_budget(async_client, app_db, max_queries):
+    with max_queries(PAIR_LIST_QUERIES) as stats:
+        response = await async_client.get("/api/pairs")
+
+    assert response.status_code == 200
+    timing = SERVER_TIMING.fullmatch(response.headers["server-timing"])
+    assert timing
+    assert int(timing.group(1)) == stats.count
+
+
+async def test_failed_statement_is_counted_and_untimed(app_db):
+    async with async_session_maker() as db:
+        with track_queries(record_statements=True) as stats:
+            with pytest.raises(OperationalError):
+                await db.execute(text("SELECT * FROM missing_table"))
+        connection = await db.connection()
+        start_times = connection.sync_connection.info.get("query_start_time")
+
+    assert stats.count == 1
+    assert stats.statements == ["SELECT * FROM missing_table"]
+    assert not start_times
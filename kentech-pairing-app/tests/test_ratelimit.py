@@ -0,0 +1,43 @@
+"""
+WebSocket connection caps with request rate limiting left off.
+"""
+
+import asyncio
+
+from src.api.ratelimit import MemoryBackend, RateLimiter, RateLimitMiddleware
+from main import create_app
+
+
+async def test_connection_cap_applies_without_request_limits():
+    # An empty bucket would reject every request if request rates were limited
+    limiter = RateLimiter(MemoryBackend(0.0, 0.0, 100), {}, 1, 60.0, limit_requests=False)
+    release = asyncio.Event()
+    sent = []
+
+    async def app(scope, receive, send):
+        if scope["type"] == "websocket":
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = RateLimitMiddleware(app, limiter)
+    client = {"client": ("10.0.0.1", 5000), "headers": []}
+
+    await middleware({"type": "http", "method": "GET", "path": "/api/bots", **client}, None, send)
+    assert sent.pop()["status"] == 200
+
+    held = asyncio.create_task(middleware({"type": "websocket", "path": "/ws", **client}, None, send))
+    await asyncio.sleep(0)
+    await middleware({"type": "websocket", "path": "/ws", **client}, None, send)
+    assert sent.pop() == {"type": "websocket.close", "code": 1008}
+
+    release.set()
+    await held
+    assert limiter.backend.connections == {}
+
+
+def test_connection_cap_middleware_is_installed_by_default():
+    app = create_app()
+    assert any(middleware.cls is RateLimitMiddleware for middleware in app.user_middleware)
@@ -0,0 +1,49 @@
+"""
+List endpoints build rows from columns rather than response models.
+
+Their rows must carry exactly the fields of the single-item endpoints, so
+columns added for internal bookkeeping never reach clients.
+"""
+
+INTERNAL_FIELDS = {"connection_worker", "last_activity_at"}
+
+
+async def create_pair(async_client) -> dict:
+    bot_ids = []
+    for name in ("alpha", "beta"):
+        response = await async_client.post(
+            "/api/bots", json={"name": name, "bot_type": "chat", "endpoint": f"http://{name}"}
+        )
+        assert response.status_code == 201
+        bot_ids.append(response.json()["id"])
+    response = await async_client.post(
+        "/api/pairs", json={"primary_bot_id": bot_ids[0], "secondary_bot_id": bot_ids[1]}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+async def test_bot_list_rows_match_single_bot(async_client, app_db):
+    pair = await create_pair(async_client)
+
+    rows = (await async_client.get("/api/bots")).json()
+    single = (await async_client.get(f"/api/bots/{pair['primary_bot_id']}")).json()
+
+    assert rows
+    for row in rows:
+        assert row.keys() == single.keys()
+        assert not INTERNAL_FIELDS & row.keys()
+
+
+async def test_pair_list_rows_match_single_pair(async_client, app_db):
+    pair = await create_pair(async_client)
+
+    single = (await async_client.get(f"/api/pairs/{pair['id']}")).json()
+    for path in ("/api/pairs", "/api/pairs/active"):
+        rows = (await async_client.get(path)).json()
+        assert len(rows) == 1
+        row = rows[0]
+        assert row.keys() == single.keys()
+        assert row["primary_bot"].keys() == single["primary_bot"].keys()
+        assert row["secondary_bot"].keys() == single["secondary_bot"].keys()
+        assert not INTERNAL_FIELDS & (row.keys() | row["primary_bot"].keys())